@@ -0,0 +1,27 @@
+"""participant weights and weighted draw mode
+
+Revision ID: 0004_weighted_draw
+Revises: 0003_ticker_message
+Create Date: 2026-10-19 09:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_weighted_draw'
+down_revision: Union[str, Sequence[str], None] = '0003_ticker_message'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('participants', sa.Column('weight', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('giveaways', sa.Column('weighted_draw', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('giveaways', 'weighted_draw')
+    op.drop_column('participants', 'weight')
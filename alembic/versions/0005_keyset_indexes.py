@@ -0,0 +1,31 @@
+"""composite indexes for keyset pagination
+
+Revision ID: 0005_keyset_indexes
+Revises: 0004_weighted_draw
+Create Date: 2026-10-19 10:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_keyset_indexes'
+down_revision: Union[str, Sequence[str], None] = '0004_weighted_draw'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_participants_giveaway_first_seen',
+        'participants',
+        ['giveaway_id', 'first_seen', 'id'],
+        unique=False,
+    )
+    op.create_index('ix_winners_giveaway_drawn_at', 'winners', ['giveaway_id', 'drawn_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_winners_giveaway_drawn_at', table_name='winners')
+    op.drop_index('ix_participants_giveaway_first_seen', table_name='participants')
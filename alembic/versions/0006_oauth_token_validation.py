@@ -0,0 +1,27 @@
+"""cached oauth token validation state
+
+Revision ID: 0006_oauth_token_validation
+Revises: 0005_keyset_indexes
+Create Date: 2026-10-19 11:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0006_oauth_token_validation'
+down_revision: Union[str, Sequence[str], None] = '0005_keyset_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('oauth_accounts', sa.Column('token_valid', sa.Boolean(), nullable=True))
+    op.add_column('oauth_accounts', sa.Column('validated_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('oauth_accounts', 'validated_at')
+    op.drop_column('oauth_accounts', 'token_valid')
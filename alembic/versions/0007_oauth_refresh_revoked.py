@@ -0,0 +1,25 @@
+"""track rejected oauth refresh tokens separately
+
+Revision ID: 0007_oauth_refresh_revoked
+Revises: 0006_oauth_token_validation
+Create Date: 2026-10-19 12:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0007_oauth_refresh_revoked'
+down_revision: Union[str, Sequence[str], None] = '0006_oauth_token_validation'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('oauth_accounts', sa.Column('refresh_revoked_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('oauth_accounts', 'refresh_revoked_at')
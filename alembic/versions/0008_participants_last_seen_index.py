@@ -0,0 +1,29 @@
+"""index participants by last_seen per giveaway
+
+Revision ID: 0008_participants_last_seen_index
+Revises: 0007_oauth_refresh_revoked
+Create Date: 2026-10-19 13:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0008_participants_last_seen_index'
+down_revision: Union[str, Sequence[str], None] = '0007_oauth_refresh_revoked'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_participants_giveaway_last_seen',
+        'participants',
+        ['giveaway_id', 'last_seen', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_participants_giveaway_last_seen', table_name='participants')
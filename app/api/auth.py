@@ -5,7 +5,8 @@ from fastapi import APIRouter, Depends, Form, HTTPException, Query, Request, sta
 from fastapi.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import generate_csrf_token, require_csrf
+from app.core.security import PasswordHasherBusy, generate_csrf_token, require_csrf
+from app.db.redis_client import get_redis
 from app.db.session import get_db_session
 from app.services.auth_service import (
     authenticate_user,
@@ -23,9 +24,25 @@ from app.services.social_auth_service import (
     google_auth_authorize_url,
     google_auth_exchange_code,
 )
+from app.services.user_cache import invalidate_session_user
 
 router = APIRouter()
 
+PASSWORD_BUSY_RETRY_SECONDS = 2
+
+
+def _busy_response(request: Request, template: str):
+    return request.app.state.templates.TemplateResponse(
+        template,
+        {
+            'request': request,
+            'error': 'Muitos acessos no momento. Tente novamente em alguns segundos.',
+            'csrf_token': request.session.get('csrf_token'),
+        },
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': str(PASSWORD_BUSY_RETRY_SECONDS)},
+    )
+
 
 @router.get('/register')
 async def register_page(request: Request):
@@ -56,7 +73,10 @@ async def register_action(
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
-    user = await create_user(db, email, password)
+    try:
+        user = await create_user(db, email, password)
+    except PasswordHasherBusy:
+        return _busy_response(request, 'auth/register.html')
     await db.commit()
     request.session['user_id'] = user.id
     request.session['csrf_token'] = generate_csrf_token()
@@ -88,7 +108,10 @@ async def login_action(
     db: AsyncSession = Depends(get_db_session),
 ):
     await require_csrf(request)
-    user = await authenticate_user(db, email, password)
+    try:
+        user = await authenticate_user(db, email, password)
+    except PasswordHasherBusy:
+        return _busy_response(request, 'auth/login.html')
     if not user:
         return request.app.state.templates.TemplateResponse(
             'auth/login.html',
@@ -116,6 +139,7 @@ async def google_auth_callback(
     code: str = Query(...),
     state: str = Query(...),
     db: AsyncSession = Depends(get_db_session),
+    redis=Depends(get_redis),
 ):
     if request.session.get('oauth_state_google_auth') != state:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='OAuth state inválido')
@@ -139,6 +163,7 @@ async def google_auth_callback(
         await link_identity(db, user.id, data['provider'], data['provider_user_id'], email)
 
     await db.commit()
+    await invalidate_session_user(user.id, redis)
     request.session['user_id'] = user.id
     request.session['csrf_token'] = generate_csrf_token()
     response = RedirectResponse('/dashboard', status_code=status.HTTP_302_FOUND)
@@ -159,6 +184,7 @@ async def github_auth_callback(
     code: str = Query(...),
     state: str = Query(...),
     db: AsyncSession = Depends(get_db_session),
+    redis=Depends(get_redis),
 ):
     if request.session.get('oauth_state_github_auth') != state:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='OAuth state inválido')
@@ -185,6 +211,7 @@ async def github_auth_callback(
         await link_identity(db, user.id, data['provider'], data['provider_user_id'], email)
 
     await db.commit()
+    await invalidate_session_user(user.id, redis)
     request.session['user_id'] = user.id
     request.session['csrf_token'] = generate_csrf_token()
     response = RedirectResponse('/dashboard', status_code=status.HTTP_302_FOUND)
@@ -193,8 +220,11 @@ async def github_auth_callback(
 
 
 @router.post('/logout')
-async def logout_action(request: Request):
+async def logout_action(request: Request, redis=Depends(get_redis)):
     await require_csrf(request)
+    user_id = request.session.get('user_id')
+    if user_id:
+        await invalidate_session_user(int(user_id), redis)
     request.session.clear()
     response = RedirectResponse('/login', status_code=status.HTTP_302_FOUND)
     response.delete_cookie('csrf_token')
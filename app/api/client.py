@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from redis.asyncio import Redis
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db_session
-from app.models import Giveaway, OAuthAccount, OAuthProvider, User
+from app.db.redis_client import get_redis
+from app.db.session import get_read_db_session, read_session_factory
+from app.models import OAuthAccount, OAuthProvider
 from app.services.dependencies import get_current_user
+from app.services.giveaway_summary import get_giveaway_summary, list_giveaway_summaries
+from app.services.user_cache import SessionUser, get_session_user
 
 router = APIRouter(prefix='/api/v1', tags=['client'])
 
 
-async def _session_user(request: Request, db: AsyncSession) -> User | None:
+async def _session_user(request: Request, redis: Redis) -> SessionUser | None:
     raw_user_id = request.session.get('user_id')
     if not raw_user_id:
         return None
@@ -17,8 +21,7 @@ async def _session_user(request: Request, db: AsyncSession) -> User | None:
         user_id = int(raw_user_id)
     except (TypeError, ValueError):
         return None
-    result = await db.execute(select(User).where(User.id == user_id))
-    return result.scalar_one_or_none()
+    return await get_session_user(read_session_factory(request.session), user_id, redis)
 
 
 @router.get('/public/links')
@@ -35,8 +38,12 @@ async def public_links(request: Request):
 
 
 @router.get('/session')
-async def session_status(request: Request, db: AsyncSession = Depends(get_db_session)):
-    user = await _session_user(request, db)
+async def session_status(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db_session),
+    redis: Redis = Depends(get_redis),
+):
+    user = await _session_user(request, redis)
     if user is None:
         return {
             'authenticated': False,
@@ -48,7 +55,8 @@ async def session_status(request: Request, db: AsyncSession = Depends(get_db_ses
     accounts = (
         await db.execute(select(OAuthAccount).where(OAuthAccount.user_id == user.id))
     ).scalars()
-    providers = {account.provider for account in accounts}
+    # Same rule as the dashboard: an account Twitch rejected is not connected.
+    providers = {account.provider for account in accounts if account.token_valid is not False}
 
     return {
         'authenticated': True,
@@ -63,26 +71,25 @@ async def session_status(request: Request, db: AsyncSession = Depends(get_db_ses
 
 @router.get('/giveaways')
 async def giveaways_list(
-    db: AsyncSession = Depends(get_db_session),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db_session),
+    redis: Redis = Depends(get_redis),
+    user: SessionUser = Depends(get_current_user),
 ):
-    items = (
-        await db.execute(
-            select(Giveaway)
-            .where(Giveaway.user_id == user.id)
-            .order_by(Giveaway.id.desc())
-        )
-    ).scalars().all()
+    summaries = await list_giveaway_summaries(db, user.id, redis)
     return {
-        'items': [
-            {
-                'id': giveaway.id,
-                'name': giveaway.name,
-                'command': giveaway.command,
-                'is_open': giveaway.is_open,
-                'created_at': giveaway.created_at,
-            }
-            for giveaway in items
-        ],
-        'count': len(items),
+        'items': [summary.as_dict() for summary in summaries],
+        'count': len(summaries),
     }
+
+
+@router.get('/giveaways/{giveaway_id}')
+async def giveaway_summary(
+    giveaway_id: int,
+    db: AsyncSession = Depends(get_read_db_session),
+    redis: Redis = Depends(get_redis),
+    user: SessionUser = Depends(get_current_user),
+):
+    summary = await get_giveaway_summary(db, giveaway_id, user.id, redis)
+    if summary is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Giveaway not found')
+    return summary.as_dict()
@@ -1,27 +1,38 @@
 import logging
-import csv
-import asyncio
 import secrets
-from io import StringIO
 from urllib.parse import quote
 
-from fastapi import APIRouter, Depends, Form, HTTPException, Request, status
-from fastapi.responses import RedirectResponse, Response
-from sqlalchemy import func, select
+from fastapi import APIRouter, Depends, Form, HTTPException, Query, Request, Response, status
+from fastapi.responses import RedirectResponse, StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
 from app.core.rate_limit import RateLimiter
 from app.core.security import generate_csrf_token, require_csrf, sign_overlay_token
 from app.db.redis_client import get_redis
-from app.db.session import get_db_session
+from app.db.session import get_db_session, get_read_db_session, read_session_factory
 from app.models import Giveaway, OAuthAccount, OAuthProvider, Participant, Winner
+from app.services import hot_roster
 from app.services.audit import add_audit_log
 from app.services.dependencies import get_current_user, get_owned_giveaway
-from app.services.giveaway_service import clear_participants, draw_winner, normalize_command
-from app.services.oauth_service import decrypt_access_token, get_google_live_chat_id, validate_twitch_access_token
-from app.services.realtime import build_giveaway_state, publish_control, publish_draw_started, publish_state
+from app.services.entry_stream import discard_entries
+from app.services.export_service import EXPORT_MEDIA_TYPES, stream_participants_export
+from app.services.giveaway_service import clear_participants, draw_winner, normalize_command, prepare_alias_table
+from app.services.giveaway_summary import get_giveaway_summary, list_giveaway_summaries
+from app.services.giveaway_version import bump_giveaway_version, check_not_modified, conditional_headers
+from app.services.oauth_service import decrypt_access_token, get_google_live_chat_id
+from app.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, fetch_keyset_page
+from app.services.realtime import (
+    build_giveaway_state,
+    hold_winner_reveal,
+    publish_control,
+    publish_draw_started,
+    publish_state,
+)
+from app.services.recent_entrants import clear_entrants, latest_entrants
 from app.services.youtube_utils import parse_youtube_video_id
+from app.workers.entry_persister import drain_entries
 
 router = APIRouter()
 settings = get_settings()
@@ -38,30 +49,18 @@ async def home(request: Request):
 @router.get('/dashboard')
 async def dashboard(
     request: Request,
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
+    redis=Depends(get_redis),
     user=Depends(get_current_user),
 ):
-    giveaways = (await db.execute(select(Giveaway).where(Giveaway.user_id == user.id).order_by(Giveaway.id.desc()))).scalars().all()
+    giveaways = await list_giveaway_summaries(db, user.id, redis)
+    # Token validity is refreshed by the worker's background validator, so
+    # rendering never waits on Twitch; revoked accounts show as disconnected.
     oauth_accounts = (
         await db.execute(select(OAuthAccount).where(OAuthAccount.user_id == user.id))
     ).scalars().all()
-    removed_invalid_twitch = False
-    for acc in list(oauth_accounts):
-        if acc.provider != OAuthProvider.TWITCH:
-            continue
-        token = decrypt_access_token(acc)
-        is_valid = await validate_twitch_access_token(token)
-        if is_valid is False:
-            await db.delete(acc)
-            removed_invalid_twitch = True
-
-    if removed_invalid_twitch:
-        await db.commit()
-        oauth_accounts = (
-            await db.execute(select(OAuthAccount).where(OAuthAccount.user_id == user.id))
-        ).scalars().all()
-
-    connected = {acc.provider.value for acc in oauth_accounts}
+
+    connected = {acc.provider.value for acc in oauth_accounts if acc.token_valid is not False}
     oauth_error = request.query_params.get('oauth_error')
     create_error = request.query_params.get('create_error')
     csrf = request.session.get('csrf_token') or generate_csrf_token()
@@ -89,6 +88,7 @@ async def create_giveaway(
     command: str = Form(default='!participar'),
     youtube_video_id: str = Form(default=''),
     ticker_message: str = Form(default=''),
+    weighted_draw: bool = Form(default=False),
     db: AsyncSession = Depends(get_db_session),
     user=Depends(get_current_user),
 ):
@@ -105,6 +105,7 @@ async def create_giveaway(
         command=normalize_command(command),
         youtube_video_id=parsed_video_id,
         ticker_message=ticker_message.strip() or None,
+        weighted_draw=weighted_draw,
     )
     db.add(giveaway)
     await add_audit_log(db, user_id=user.id, giveaway_id=None, action='giveaway_created', payload={'name': giveaway.name})
@@ -116,18 +117,20 @@ async def create_giveaway(
 async def giveaway_detail(
     giveaway_id: int,
     request: Request,
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
+    redis=Depends(get_redis),
     user=Depends(get_current_user),
 ):
-    giveaway = await get_owned_giveaway(giveaway_id, user, db)
+    summary = await get_giveaway_summary(db, giveaway_id, user.id, redis)
+    if summary is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Giveaway not found')
+    giveaway = summary.giveaway
     participants = (
         await db.execute(select(Participant).where(Participant.giveaway_id == giveaway_id).order_by(Participant.first_seen.desc()).limit(100))
     ).scalars().all()
     winners = (
         await db.execute(select(Winner).where(Winner.giveaway_id == giveaway_id).order_by(Winner.drawn_at.desc()).limit(10))
     ).scalars().all()
-    winners_total = await db.scalar(select(func.count(Winner.id)).where(Winner.giveaway_id == giveaway_id))
-    participants_count = await db.scalar(select(func.count(Participant.id)).where(Participant.giveaway_id == giveaway_id))
     overlay_token = sign_overlay_token(giveaway_id)
     warning = request.query_params.get('warning')
     ticker_default = giveaway.ticker_message or f'Sorteio {giveaway.name} rolando agora. Digite {giveaway.command}'
@@ -139,9 +142,9 @@ async def giveaway_detail(
             'request': request,
             'giveaway': giveaway,
             'participants': participants,
-            'participants_count': participants_count or 0,
+            'participants_count': summary.participants_count,
             'winners': winners,
-            'winners_total': winners_total or 0,
+            'winners_total': summary.winners_count,
             'csrf_token': csrf,
             'overlay_token': overlay_token,
             'warning': warning,
@@ -173,7 +176,12 @@ async def start_giveaway(
     if google_acc and not giveaway.youtube_live_chat_id:
         try:
             token = decrypt_access_token(google_acc)
-            discovered = await get_google_live_chat_id(token, giveaway.youtube_video_id)
+            discovered = await get_google_live_chat_id(
+                token,
+                giveaway.youtube_video_id,
+                channel_id=google_acc.provider_user_id,
+                redis=redis,
+            )
             if discovered:
                 giveaway.youtube_live_chat_id = discovered[0]
             else:
@@ -184,8 +192,11 @@ async def start_giveaway(
 
     await add_audit_log(db, user_id=user.id, giveaway_id=giveaway_id, action='giveaway_start')
     await db.commit()
+    if settings.hot_roster_enabled:
+        await hot_roster.activate(redis, db, giveaway_id)
+    await bump_giveaway_version(redis, giveaway_id)
     await publish_control(redis, 'start', giveaway_id, user.id)
-    state = await build_giveaway_state(db, giveaway_id)
+    state = await build_giveaway_state(db, giveaway_id, redis=redis)
     await publish_state(redis, state)
     if warning:
         return RedirectResponse(f'/giveaways/{giveaway_id}?warning={warning}', status_code=status.HTTP_302_FOUND)
@@ -205,8 +216,14 @@ async def stop_giveaway(
     giveaway.is_open = False
     await add_audit_log(db, user_id=user.id, giveaway_id=giveaway_id, action='giveaway_stop')
     await db.commit()
+    # Closed giveaways are read from the table again, so it must hold every entry.
+    await drain_entries(redis, giveaway_id)
+    await hot_roster.flush_and_deactivate(redis, db, giveaway_id)
+    await bump_giveaway_version(redis, giveaway_id)
+    if giveaway.weighted_draw:
+        await prepare_alias_table(db, giveaway_id, redis)
     await publish_control(redis, 'stop', giveaway_id, user.id)
-    state = await build_giveaway_state(db, giveaway_id)
+    state = await build_giveaway_state(db, giveaway_id, redis=redis)
     await publish_state(redis, state)
     return RedirectResponse(f'/giveaways/{giveaway_id}', status_code=status.HTTP_302_FOUND)
 
@@ -224,7 +241,11 @@ async def clear_giveaway(
     removed = await clear_participants(db, giveaway_id)
     await add_audit_log(db, user_id=user.id, giveaway_id=giveaway_id, action='participants_clear', payload={'removed': removed})
     await db.commit()
-    state = await build_giveaway_state(db, giveaway_id)
+    await discard_entries(redis, giveaway_id)
+    await hot_roster.clear(redis, giveaway_id)
+    await clear_entrants(redis, giveaway_id)
+    await bump_giveaway_version(redis, giveaway_id, roster=True)
+    state = await build_giveaway_state(db, giveaway_id, redis=redis)
     await publish_state(redis, state)
     return RedirectResponse(f'/giveaways/{giveaway_id}', status_code=status.HTTP_302_FOUND)
 
@@ -239,12 +260,10 @@ async def draw_giveaway(
 ):
     await require_csrf(request)
     giveaway = await get_owned_giveaway(giveaway_id, user, db)
-    winner = await draw_winner(db, giveaway)
+    winner = await draw_winner(db, giveaway, redis=redis)
     if winner is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Sem participantes')
     draw_duration_ms = 3000 + secrets.randbelow(2001)
-    await publish_draw_started(redis, giveaway_id, winner.display_name, draw_duration_ms)
-    await asyncio.sleep(draw_duration_ms / 1000)
     await add_audit_log(
         db,
         user_id=user.id,
@@ -252,9 +271,13 @@ async def draw_giveaway(
         action='winner_drawn',
         payload={'platform': winner.platform.value, 'display_name': winner.display_name},
     )
+    # Keep the winner out of published state until the animation finishes;
+    # the reveal is published by the background scheduler, not this request.
+    await hold_winner_reveal(redis, giveaway_id, winner.id, draw_duration_ms)
     await db.commit()
-    state = await build_giveaway_state(db, giveaway_id)
-    await publish_state(redis, state)
+    await bump_giveaway_version(redis, giveaway_id)
+    await publish_draw_started(redis, giveaway_id, winner.display_name, draw_duration_ms)
+    request.app.state.reveal_scheduler.schedule(giveaway_id, winner.id, draw_duration_ms / 1000)
     return RedirectResponse(f'/giveaways/{giveaway_id}', status_code=status.HTTP_302_FOUND)
 
 
@@ -264,6 +287,7 @@ async def update_ticker_message(
     request: Request,
     ticker_message: str = Form(default=''),
     db: AsyncSession = Depends(get_db_session),
+    redis=Depends(get_redis),
     user=Depends(get_current_user),
 ):
     await require_csrf(request)
@@ -277,6 +301,39 @@ async def update_ticker_message(
         payload={'ticker_message': giveaway.ticker_message},
     )
     await db.commit()
+    await bump_giveaway_version(redis, giveaway_id)
+    return RedirectResponse(f'/giveaways/{giveaway_id}', status_code=status.HTTP_302_FOUND)
+
+
+@router.post('/giveaways/{giveaway_id}/youtube-video', dependencies=[Depends(RateLimiter('giveaway_control', 60, 60))])
+async def update_youtube_video(
+    giveaway_id: int,
+    request: Request,
+    youtube_video_id: str = Form(default=''),
+    db: AsyncSession = Depends(get_db_session),
+    redis=Depends(get_redis),
+    user=Depends(get_current_user),
+):
+    await require_csrf(request)
+    giveaway = await get_owned_giveaway(giveaway_id, user, db)
+    parsed_video_id = parse_youtube_video_id(youtube_video_id)
+    if youtube_video_id.strip() and not parsed_video_id:
+        return RedirectResponse(
+            f'/giveaways/{giveaway_id}?warning={quote("URL/ID do YouTube invalido. Cole a URL da live ou o ID do video.")}',
+            status_code=status.HTTP_302_FOUND,
+        )
+    giveaway.youtube_video_id = parsed_video_id
+    giveaway.youtube_live_chat_id = None
+    await add_audit_log(
+        db,
+        user_id=user.id,
+        giveaway_id=giveaway_id,
+        action='youtube_video_updated',
+        payload={'youtube_video_id': parsed_video_id},
+    )
+    await db.commit()
+    await bump_giveaway_version(redis, giveaway_id)
+    await publish_control(redis, 'video_changed', giveaway_id, user.id)
     return RedirectResponse(f'/giveaways/{giveaway_id}', status_code=status.HTTP_302_FOUND)
 
 
@@ -300,41 +357,104 @@ async def delete_giveaway(
     )
     await db.delete(giveaway)
     await db.commit()
+    await discard_entries(redis, giveaway_id)
+    await hot_roster.deactivate(redis, giveaway_id)
+    await clear_entrants(redis, giveaway_id)
     return RedirectResponse('/dashboard', status_code=status.HTTP_302_FOUND)
 
 
 @router.get('/giveaways/{giveaway_id}/participants')
 async def list_participants(
     giveaway_id: int,
+    request: Request,
+    response: Response,
     format: str = 'json',
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    since: str | None = None,
     db: AsyncSession = Depends(get_db_session),
+    redis=Depends(get_redis),
     user=Depends(get_current_user),
 ):
     await get_owned_giveaway(giveaway_id, user, db)
-    items = (
-        await db.execute(select(Participant).where(Participant.giveaway_id == giveaway_id).order_by(Participant.display_name.asc()))
-    ).scalars().all()
-
-    if format.lower() == 'csv':
-        output = StringIO()
-        writer = csv.writer(output)
-        writer.writerow(['platform', 'platform_user_id', 'display_name'])
-        for p in items:
-            writer.writerow([p.platform.value, p.platform_user_id, p.display_name])
-        csv_body = output.getvalue()
-        headers = {'Content-Disposition': f'attachment; filename="participantes_giveaway_{giveaway_id}.csv"'}
-        return Response(content=csv_body, media_type='text/csv; charset=utf-8', headers=headers)
-
-    return [{'platform': p.platform.value, 'platform_user_id': p.platform_user_id, 'display_name': p.display_name} for p in items]
+    export_format = format.lower()
+    # Without limit/cursor/since the JSON call keeps its original shape, a bare
+    # list of every participant, streamed like the exports. Paging clients get
+    # {items, next_cursor, poll_cursor}.
+    paged = limit is not None or cursor is not None or since is not None
+
+    if export_format in EXPORT_MEDIA_TYPES and not (export_format == 'json' and paged):
+        compress = 'gzip' in request.headers.get('accept-encoding', '').lower()
+
+        async def export_body():
+            # The request-scoped session is released before a streaming body
+            # runs, so the export owns its own session for the whole cursor.
+            async with read_session_factory(request.session)() as export_db:
+                async for chunk in stream_participants_export(export_db, giveaway_id, export_format, compress):
+                    yield chunk
+
+        headers = {'Vary': 'Accept-Encoding'}
+        if export_format != 'json':
+            headers['Content-Disposition'] = (
+                f'attachment; filename="participantes_giveaway_{giveaway_id}.{export_format}"'
+            )
+        if compress:
+            headers['Content-Encoding'] = 'gzip'
+        return StreamingResponse(export_body(), media_type=EXPORT_MEDIA_TYPES[export_format], headers=headers)
+
+    # ETagged responses read the primary: the version comes from Redis, and a
+    # lagging replica would get an old body cached under the new ETag.
+    etag, not_modified = await check_not_modified(request, redis, giveaway_id)
+    if not_modified:
+        return not_modified
+    response.headers.update(conditional_headers(etag))
+    page = await fetch_keyset_page(
+        db,
+        select(
+            Participant.id,
+            Participant.platform,
+            Participant.platform_user_id,
+            Participant.display_name,
+            Participant.first_seen,
+        ).where(Participant.giveaway_id == giveaway_id),
+        Participant.first_seen,
+        Participant.id,
+        limit=limit or DEFAULT_PAGE_SIZE,
+        cursor=cursor,
+        since=since,
+    )
+    return {
+        'items': [
+            {
+                'platform': p.platform.value,
+                'platform_user_id': p.platform_user_id,
+                'display_name': p.display_name,
+                'first_seen': p.first_seen.isoformat(),
+            }
+            for p in page['rows']
+        ],
+        'next_cursor': page['next_cursor'],
+        'poll_cursor': page['poll_cursor'],
+    }
 
 
 @router.get('/giveaways/{giveaway_id}/participants/latest')
 async def latest_participant(
     giveaway_id: int,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db_session),
+    redis=Depends(get_redis),
     user=Depends(get_current_user),
 ):
     await get_owned_giveaway(giveaway_id, user, db)
+    etag, not_modified = await check_not_modified(request, redis, giveaway_id)
+    if not_modified:
+        return not_modified
+    response.headers.update(conditional_headers(etag))
+    recent = await latest_entrants(redis, giveaway_id, 1)
+    if recent:
+        return {'display_name': recent[0]['display_name'], 'platform': recent[0]['platform']}
     participant = (
         await db.execute(
             select(Participant)
@@ -348,6 +468,24 @@ async def latest_participant(
     return {'display_name': participant.display_name, 'platform': participant.platform.value}
 
 
+@router.get('/giveaways/{giveaway_id}/participants/recent')
+async def recent_participants(
+    giveaway_id: int,
+    request: Request,
+    response: Response,
+    limit: int = Query(default=10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db_session),
+    redis=Depends(get_redis),
+    user=Depends(get_current_user),
+):
+    await get_owned_giveaway(giveaway_id, user, db)
+    etag, not_modified = await check_not_modified(request, redis, giveaway_id)
+    if not_modified:
+        return not_modified
+    response.headers.update(conditional_headers(etag))
+    return {'items': await latest_entrants(redis, giveaway_id, min(limit, settings.recent_entrants_size))}
+
+
 @router.get('/demo')
 async def demo_page(request: Request):
     return request.app.state.templates.TemplateResponse('overlay/demo.html', {'request': request})
@@ -357,23 +495,58 @@ async def demo_page(request: Request):
 async def winners_history(
     giveaway_id: int,
     request: Request,
+    response: Response,
+    format: str = 'html',
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    since: str | None = None,
     db: AsyncSession = Depends(get_db_session),
+    redis=Depends(get_redis),
     user=Depends(get_current_user),
 ):
     giveaway = await get_owned_giveaway(giveaway_id, user, db)
-    winners = (
-        await db.execute(select(Winner).where(Winner.giveaway_id == giveaway_id).order_by(Winner.drawn_at.desc()))
-    ).scalars().all()
+    json_format = format.lower() == 'json'
+    if json_format:
+        etag, not_modified = await check_not_modified(request, redis, giveaway_id)
+        if not_modified:
+            return not_modified
+        response.headers.update(conditional_headers(etag))
+    page = await fetch_keyset_page(
+        db,
+        select(
+            Winner.id,
+            Winner.platform,
+            Winner.platform_user_id,
+            Winner.display_name,
+            Winner.drawn_at,
+        ).where(Winner.giveaway_id == giveaway_id),
+        Winner.drawn_at,
+        Winner.id,
+        limit=limit,
+        cursor=cursor,
+        since=since,
+    )
+    if json_format:
+        return {
+            'items': [
+                {
+                    'platform': w.platform.value,
+                    'platform_user_id': w.platform_user_id,
+                    'display_name': w.display_name,
+                    'drawn_at': w.drawn_at.isoformat(),
+                }
+                for w in page['rows']
+            ],
+            'next_cursor': page['next_cursor'],
+            'poll_cursor': page['poll_cursor'],
+        }
     return request.app.state.templates.TemplateResponse(
         'giveaways/winners.html',
         {
             'request': request,
             'giveaway': giveaway,
-            'winners': winners,
+            'winners': page['rows'],
+            'next_cursor': page['next_cursor'],
             'csrf_token': request.session.get('csrf_token'),
         },
     )
-
-
-
-
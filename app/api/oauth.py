@@ -7,6 +7,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import require_csrf
+from app.db.redis_client import get_redis
 from app.db.session import get_db_session
 from app.models import OAuthAccount, OAuthProvider
 from app.services.audit import add_audit_log
@@ -19,6 +20,7 @@ from app.services.oauth_service import (
     twitch_authorize_url,
     twitch_exchange_code,
 )
+from app.services.realtime import publish_oauth_event
 
 router = APIRouter(prefix='/oauth')
 
@@ -36,6 +38,7 @@ async def twitch_callback(
     code: str = Query(...),
     state: str = Query(...),
     db: AsyncSession = Depends(get_db_session),
+    redis=Depends(get_redis),
     user=Depends(get_current_user),
 ):
     if request.session.get('oauth_state_twitch') != state:
@@ -53,6 +56,7 @@ async def twitch_callback(
     )
     await add_audit_log(db, user_id=user.id, action='oauth_connected', payload={'provider': 'twitch'})
     await db.commit()
+    await publish_oauth_event(redis, 'oauth_connected', user.id, 'twitch')
     return RedirectResponse('/dashboard?connected=twitch', status_code=status.HTTP_302_FOUND)
 
 
@@ -69,6 +73,7 @@ async def google_callback(
     code: str = Query(...),
     state: str = Query(...),
     db: AsyncSession = Depends(get_db_session),
+    redis=Depends(get_redis),
     user=Depends(get_current_user),
 ):
     if request.session.get('oauth_state_google') != state:
@@ -92,6 +97,7 @@ async def google_callback(
     )
     await add_audit_log(db, user_id=user.id, action='oauth_connected', payload={'provider': 'google'})
     await db.commit()
+    await publish_oauth_event(redis, 'oauth_connected', user.id, 'google')
     return RedirectResponse('/dashboard?connected=google', status_code=status.HTTP_302_FOUND)
 
 
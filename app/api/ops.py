@@ -1,10 +1,17 @@
-﻿from fastapi import APIRouter, Depends
+﻿import json
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
 from redis.asyncio import Redis
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.metrics import CONTENT_TYPE, REGISTRY
+from app.core.security import get_password_hash_metrics
 from app.db.redis_client import get_redis
-from app.db.session import get_db_session
+from app.db.session import get_db_session, get_pool_metrics
+from app.services.entry_stream import get_entry_pipeline_metrics
+from app.workers.entry_spool import SPOOL_METRICS_KEY
 
 router = APIRouter()
 
@@ -17,8 +24,35 @@ async def health(db: AsyncSession = Depends(get_db_session), redis: Redis = Depe
 
 
 @router.get('/metrics')
-async def metrics(db: AsyncSession = Depends(get_db_session)):
-    # simple placeholder metrics in plaintext format
-    result = await db.execute(text('SELECT COUNT(*) FROM giveaways'))
-    giveaways = result.scalar() or 0
-    return {'giveaways_total': giveaways}
+async def metrics():
+    # Served purely from in-process collectors; scrapes never hit the DB or Redis.
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+def _spool_totals(per_worker: list[dict]) -> dict:
+    return {
+        'workers': len(per_worker),
+        'size_bytes': sum(metrics.get('size_bytes', 0) for metrics in per_worker),
+        'spooled_total': sum(metrics.get('spooled_total', 0) for metrics in per_worker),
+        'replayed_total': sum(metrics.get('replayed_total', 0) for metrics in per_worker),
+    }
+
+
+@router.get('/status')
+async def ops_status(redis: Redis = Depends(get_redis)):
+    # Unauthenticated like /health and /metrics, so only aggregates go out:
+    # no worker hostnames or pids, no ids of live giveaways.
+    pipeline = await get_entry_pipeline_metrics(redis)
+    if pipeline['available']:
+        pipeline = {
+            'available': True,
+            'streams': len(pipeline['streams']),
+            'lag_total': pipeline['lag_total'],
+            'pending_total': pipeline['pending_total'],
+        }
+    return {
+        'db_pools': get_pool_metrics(),
+        'password_hashing': get_password_hash_metrics(),
+        'entry_pipeline': pipeline,
+        'chat_spool': _spool_totals([json.loads(raw) for raw in await redis.hvals(SPOOL_METRICS_KEY)]),
+    }
@@ -1,14 +1,17 @@
 ﻿import json
 
-from fastapi import APIRouter, Depends, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import APIRouter, Depends, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 from redis.asyncio import Redis
 from sqlalchemy import select
 
+from app.core.metrics import websocket_tracker
 from app.db.redis_client import get_redis
-from app.db.session import AsyncSessionLocal
+from app.db.session import AsyncSessionLocal, read_session_factory
 from app.models import Giveaway
+from app.services.giveaway_version import check_not_modified, conditional_headers
 from app.services.realtime import EVENT_CHANNEL, build_giveaway_state
+from app.services.roster_sample import SAMPLE_MODES, normalize_sample_request, sample_roster
 
 router = APIRouter()
 
@@ -26,40 +29,43 @@ async def giveaway_ws(
         await websocket.close(code=4401)
         return
 
-    async with AsyncSessionLocal() as db:
+    async with read_session_factory(session)() as db:
         owned = await db.execute(select(Giveaway).where(Giveaway.id == giveaway_id, Giveaway.user_id == int(user_id)))
         if owned.scalar_one_or_none() is None:
             await websocket.close(code=4404)
             return
-        state = await build_giveaway_state(db, giveaway_id)
+        state = await build_giveaway_state(db, giveaway_id, redis=redis)
     if state:
         await websocket.send_json({'type': 'state', 'state': state})
 
     pubsub = redis.pubsub()
     await pubsub.subscribe(EVENT_CHANNEL)
     try:
-        while True:
-            msg = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-            if not msg:
-                continue
-            payload = json.loads(msg['data'])
-            event_type = payload.get('type')
-            if event_type == 'state':
-                event_state = payload.get('state', {})
-                if int(event_state.get('giveaway_id', 0)) != giveaway_id:
-                    continue
-                await websocket.send_json({'type': 'state', 'state': event_state})
-            elif event_type == 'draw_started':
-                if int(payload.get('giveaway_id', 0)) != giveaway_id:
+        with websocket_tracker('dashboard') as tracker:
+            while True:
+                msg = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if not msg:
                     continue
-                await websocket.send_json(
-                    {
-                        'type': 'draw_started',
-                        'giveaway_id': giveaway_id,
-                        'winner_name': payload.get('winner_name'),
-                        'duration_ms': int(payload.get('duration_ms', 4000)),
-                    }
-                )
+                payload = json.loads(msg['data'])
+                event_type = payload.get('type')
+                if event_type == 'state':
+                    event_state = payload.get('state', {})
+                    if int(event_state.get('giveaway_id', 0)) != giveaway_id:
+                        continue
+                    tracker.observe_event(payload)
+                    await websocket.send_json({'type': 'state', 'state': event_state})
+                elif event_type == 'draw_started':
+                    if int(payload.get('giveaway_id', 0)) != giveaway_id:
+                        continue
+                    tracker.observe_event(payload)
+                    await websocket.send_json(
+                        {
+                            'type': 'draw_started',
+                            'giveaway_id': giveaway_id,
+                            'winner_name': payload.get('winner_name'),
+                            'duration_ms': int(payload.get('duration_ms', 4000)),
+                        }
+                    )
     except WebSocketDisconnect:
         pass
     finally:
@@ -92,11 +98,35 @@ async def overlay_roulette_page(giveaway_id: int, token: str, request: Request):
     )
 
 
+@router.get('/overlay/{giveaway_id}/roster-sample')
+async def overlay_roster_sample(
+    giveaway_id: int,
+    token: str,
+    request: Request,
+    response: Response,
+    size: int | None = Query(default=None, ge=1),
+    mode: str = Query(default='random', pattern=f'^({"|".join(SAMPLE_MODES)})$'),
+    redis: Redis = Depends(get_redis),
+):
+    giveaway = await request.app.state.overlay_loader(giveaway_id, token)
+    if not giveaway:
+        return JSONResponse({'detail': 'Invalid overlay token'}, status_code=401)
+    size, mode = normalize_sample_request(size, mode)
+    etag, not_modified = await check_not_modified(request, redis, giveaway_id, variant=f'{mode}:{size}')
+    if not_modified:
+        return not_modified
+    response.headers.update(conditional_headers(etag))
+    # Primary, not a replica: the sample is cached under the Redis version.
+    async with AsyncSessionLocal() as db:
+        return await sample_roster(db, redis, giveaway_id, size=size, mode=mode)
+
+
 async def _overlay_ws_stream(
     websocket: WebSocket,
     giveaway_id: int,
     token: str,
     redis: Redis,
+    endpoint: str,
 ):
     giveaway = await websocket.app.state.overlay_loader(giveaway_id, token)
     if not giveaway:
@@ -104,36 +134,39 @@ async def _overlay_ws_stream(
         return
 
     await websocket.accept()
-    async with AsyncSessionLocal() as db:
-        state = await build_giveaway_state(db, giveaway_id)
+    async with read_session_factory(websocket.scope.get('session'))() as db:
+        state = await build_giveaway_state(db, giveaway_id, redis=redis)
     if state:
         await websocket.send_json({'type': 'state', 'state': state})
 
     pubsub = redis.pubsub()
     await pubsub.subscribe(EVENT_CHANNEL)
     try:
-        while True:
-            msg = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-            if not msg:
-                continue
-            payload = json.loads(msg['data'])
-            event_type = payload.get('type')
-            if event_type == 'state':
-                event_state = payload.get('state', {})
-                if int(event_state.get('giveaway_id', 0)) != giveaway_id:
-                    continue
-                await websocket.send_json({'type': 'state', 'state': event_state})
-            elif event_type == 'draw_started':
-                if int(payload.get('giveaway_id', 0)) != giveaway_id:
+        with websocket_tracker(endpoint) as tracker:
+            while True:
+                msg = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if not msg:
                     continue
-                await websocket.send_json(
-                    {
-                        'type': 'draw_started',
-                        'giveaway_id': giveaway_id,
-                        'winner_name': payload.get('winner_name'),
-                        'duration_ms': int(payload.get('duration_ms', 4000)),
-                    }
-                )
+                payload = json.loads(msg['data'])
+                event_type = payload.get('type')
+                if event_type == 'state':
+                    event_state = payload.get('state', {})
+                    if int(event_state.get('giveaway_id', 0)) != giveaway_id:
+                        continue
+                    tracker.observe_event(payload)
+                    await websocket.send_json({'type': 'state', 'state': event_state})
+                elif event_type == 'draw_started':
+                    if int(payload.get('giveaway_id', 0)) != giveaway_id:
+                        continue
+                    tracker.observe_event(payload)
+                    await websocket.send_json(
+                        {
+                            'type': 'draw_started',
+                            'giveaway_id': giveaway_id,
+                            'winner_name': payload.get('winner_name'),
+                            'duration_ms': int(payload.get('duration_ms', 4000)),
+                        }
+                    )
     except WebSocketDisconnect:
         pass
     finally:
@@ -148,7 +181,7 @@ async def overlay_ws_legacy(
     token: str,
     redis: Redis = Depends(get_redis),
 ):
-    await _overlay_ws_stream(websocket, giveaway_id, token, redis)
+    await _overlay_ws_stream(websocket, giveaway_id, token, redis, 'overlay')
 
 
 @router.websocket('/ws/overlay/banner/{giveaway_id}')
@@ -158,7 +191,7 @@ async def overlay_ws_banner(
     token: str,
     redis: Redis = Depends(get_redis),
 ):
-    await _overlay_ws_stream(websocket, giveaway_id, token, redis)
+    await _overlay_ws_stream(websocket, giveaway_id, token, redis, 'overlay_banner')
 
 
 @router.websocket('/ws/overlay/roulette/{giveaway_id}')
@@ -168,4 +201,4 @@ async def overlay_ws_roulette(
     token: str,
     redis: Redis = Depends(get_redis),
 ):
-    await _overlay_ws_stream(websocket, giveaway_id, token, redis)
+    await _overlay_ws_stream(websocket, giveaway_id, token, redis, 'overlay_roulette')
@@ -10,6 +10,9 @@ class Settings(BaseSettings):
     environment: str = 'development'
     secret_key: str = Field(default='dev_secret_key_change_in_production_123', min_length=32)
     token_encryption_key: str = Field(default='dev_token_encryption_key_change_prod_123', min_length=32)
+    token_encryption_previous_keys: str = ''
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 32
 
     database_url: str = 'sqlite+aiosqlite:///./dev.db'
     sync_database_url: str = 'sqlite:///./dev.db'
@@ -18,10 +21,19 @@ class Settings(BaseSettings):
     db_max_overflow: int = 5
     db_pool_timeout_seconds: int = 30
     db_pool_recycle_seconds: int = 1800
+    database_replica_url: str = ''
+    db_replica_pool_size: int = 10
+    db_replica_max_overflow: int = 10
+    db_read_your_writes_seconds: int = 5
 
     session_cookie_name: str = 'roleta_session'
     session_max_age_seconds: int = 60 * 60 * 24 * 7
     csrf_header_name: str = 'x-csrf-token'
+    user_cache_ttl_seconds: int = 30
+    user_cache_redis_ttl_seconds: int = 300
+    user_cache_max_entries: int = 10000
+    rate_limit_fail_open: bool = True
+    rate_limit_local_max_entries: int = 10000
 
     twitch_client_id: str = ''
     twitch_client_secret: str = ''
@@ -30,12 +42,18 @@ class Settings(BaseSettings):
     google_client_id: str = ''
     google_client_secret: str = ''
     google_redirect_uri: str = 'http://localhost:8000/oauth/google/callback'
+    google_token_url: str = 'https://oauth2.googleapis.com/token'
+    twitch_token_url: str = 'https://id.twitch.tv/oauth2/token'
+    oauth_refresh_lead_seconds: int = 300
+    oauth_refresh_reload_seconds: int = 300
     google_auth_client_id: str = ''
     google_auth_client_secret: str = ''
     google_auth_redirect_uri: str = 'http://localhost:8000/auth/google/callback'
     github_auth_client_id: str = ''
     github_auth_client_secret: str = ''
     github_auth_redirect_uri: str = 'http://localhost:8000/auth/github/callback'
+    twitch_validation_interval_seconds: int = 3600
+    twitch_validation_poll_seconds: int = 60
 
     cors_origins: str = 'http://localhost:8000'
     public_frontend_url: str = 'http://localhost:5173'
@@ -43,8 +61,49 @@ class Settings(BaseSettings):
     run_embedded_worker: bool = False
 
     default_command: str = '!participar'
+    subscriber_ticket_weight: int = 2
     youtube_polling_floor_seconds: float = 2.0
     youtube_backoff_cap_seconds: float = 60.0
+    youtube_stream_probe_initial_seconds: float = 30.0
+    youtube_stream_probe_cap_seconds: float = 600.0
+    youtube_daily_quota_units: int = 10000
+    youtube_quota_reserve_units: int = 500
+    youtube_poll_spacing_seconds: float = 0.5
+    youtube_idle_poll_cap_seconds: float = 20.0
+    youtube_priority_window_seconds: float = 300.0
+    youtube_quota_starved_seconds: float = 300.0
+    youtube_live_chat_cache_seconds: int = 900
+    youtube_live_chat_negative_cache_seconds: int = 60
+    youtube_ingest_mode: str = 'poll'
+    youtube_stream_url: str = ''
+    youtube_stream_idle_timeout_seconds: float = 90.0
+    youtube_stream_retry_seconds: float = 300.0
+    chat_user_burst: int = 2
+    chat_user_refill_seconds: float = 5.0
+    chat_channel_max_per_second: float = 50.0
+    chat_guard_max_users: int = 50000
+    chat_drop_report_seconds: float = 30.0
+    chat_seen_window_size: int = 5000
+    chat_pipeline_mode: str = 'inline'
+    chat_entry_stream_maxlen: int = 100000
+    chat_persister_batch_size: int = 200
+    chat_persister_claim_idle_ms: int = 30000
+    chat_spool_path: str = './data/chat_spool.bin'
+    chat_spool_fsync_batch: int = 50
+    chat_spool_fsync_interval_seconds: float = 0.2
+    chat_spool_replay_interval_seconds: float = 5.0
+    chat_spool_replay_batch: int = 500
+    hot_roster_enabled: bool = False
+    hot_roster_flush_seconds: float = 2.0
+    hot_roster_flush_batch: int = 500
+    hot_roster_flush_lock_ms: int = 30000
+    hot_roster_publish_seconds: float = 0.5
+    roster_sample_default_size: int = 48
+    roster_sample_max_size: int = 80
+    roster_sample_cache_seconds: int = 300
+    recent_entrants_size: int = 50
+    recent_entrants_ticker_size: int = 10
+    youtube_checkpoint_ttl_seconds: int = 24 * 3600
 
 
 @lru_cache(maxsize=1)
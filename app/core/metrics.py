@@ -0,0 +1,254 @@
+"""In-process Prometheus collectors, rendered in the text exposition format.
+
+Everything here is plain in-memory state updated on the hot path; a scrape
+only formats it, so /metrics never touches the database or Redis.
+"""
+
+import bisect
+import math
+import time
+from collections.abc import Callable
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}', *self._samples()]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def _samples(self) -> list[str]:
+        return [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+            for key, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[tuple[str, ...], float] = {}
+        self._callback: Callable[[], dict[tuple[str, ...], float]] | None = None
+
+    def set(self, value: float, **labels: str) -> None:
+        self.values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set_callback(self, callback: Callable[[], dict[tuple[str, ...], float]]) -> None:
+        # Read at scrape time from state the process already holds in memory.
+        self._callback = callback
+
+    def _samples(self) -> list[str]:
+        values = dict(self.values)
+        if self._callback is not None:
+            values.update(self._callback())
+        return [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (non-cumulative) + overflow, sum].
+        self.series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def _samples(self) -> list[str]:
+        lines = []
+        for key, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total[0])}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f'metric {metric.name} already registered')
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(
+    Histogram('liveroll_http_request_duration_seconds', 'HTTP request latency by route.', ('method', 'route', 'status'))
+)
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.register(
+    Gauge('liveroll_http_requests_in_flight', 'HTTP requests currently being served.')
+)
+DB_POOL_CHECKOUTS = REGISTRY.register(
+    Counter('liveroll_db_pool_checkouts_total', 'Connections checked out of the SQLAlchemy pool.', ('pool',))
+)
+DB_POOL_CHECKOUT_WAIT = REGISTRY.register(
+    Histogram(
+        'liveroll_db_pool_checkout_wait_seconds',
+        'Time spent waiting for a pooled connection.',
+        ('pool',),
+        buckets=FAST_BUCKETS,
+    )
+)
+DB_POOL_CONNECTIONS = REGISTRY.register(
+    Gauge('liveroll_db_pool_connections', 'SQLAlchemy pool connections by state.', ('pool', 'state'))
+)
+REDIS_COMMAND_DURATION = REGISTRY.register(
+    Histogram('liveroll_redis_command_duration_seconds', 'Redis command latency.', ('command',), buckets=FAST_BUCKETS)
+)
+WEBSOCKET_CONNECTIONS = REGISTRY.register(
+    Gauge('liveroll_websocket_connections', 'Open WebSocket connections by endpoint.', ('endpoint',))
+)
+PUBSUB_FANOUT_LAG = REGISTRY.register(
+    Histogram(
+        'liveroll_pubsub_fanout_lag_seconds',
+        'Delay between publishing an event and sending it to a WebSocket.',
+        ('endpoint',),
+    )
+)
+PASSWORD_HASH_JOBS = REGISTRY.register(
+    Gauge('liveroll_password_hash_jobs', 'Password hashing jobs by state (pending, queued).', ('state',))
+)
+PASSWORD_HASH_WORKERS = REGISTRY.register(
+    Gauge('liveroll_password_hash_workers', 'Threads in the password hashing pool.')
+)
+PASSWORD_HASH_REJECTIONS = REGISTRY.register(
+    Counter('liveroll_password_hash_rejections_total', 'Password hashing jobs shed because the pool was full.')
+)
+
+
+class websocket_tracker:
+    """Counts an open WebSocket for the duration of a `with` block."""
+
+    def __init__(self, endpoint: str) -> None:
+        self.endpoint = endpoint
+
+    def __enter__(self) -> 'websocket_tracker':
+        WEBSOCKET_CONNECTIONS.inc(endpoint=self.endpoint)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        WEBSOCKET_CONNECTIONS.dec(endpoint=self.endpoint)
+
+    def observe_event(self, payload: dict) -> None:
+        published_at = payload.get('published_at')
+        if published_at is not None:
+            PUBSUB_FANOUT_LAG.observe(max(time.time() - float(published_at), 0.0), endpoint=self.endpoint)
+
+
+class PrometheusMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # Route templates, not raw paths, so label cardinality stays bounded.
+            route = scope.get('route')
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                method=scope['method'],
+                route=getattr(route, 'path', 'unmatched'),
+                status=str(status_code),
+            )
@@ -1,21 +1,101 @@
-﻿from fastapi import Depends, HTTPException, Request, status
+﻿import logging
+import math
+import time
+from collections import OrderedDict
+
+from fastapi import Depends, HTTPException, Request, status
 from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
+from app.core.config import get_settings
 from app.db.redis_client import get_redis
 
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Token bucket kept in a hash: refill by elapsed time, take one token, set TTL,
+# all in a single round trip. Redis' own clock keeps API processes in agreement.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], ttl)
+return {allowed, tostring(tokens)}
+"""
+
 
 class RateLimiter:
     def __init__(self, bucket: str, max_requests: int, window_seconds: int) -> None:
         self.bucket = bucket
         self.max_requests = max_requests
         self.window_seconds = window_seconds
+        self.refill_per_second = max_requests / window_seconds
+        self._local: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._script = None
+
+    def _take_local(self, key: str) -> float | None:
+        # This process' share of the traffic is a lower bound on the global
+        # count, so an empty local bucket means the shared one is empty too.
+        now = time.monotonic()
+        tokens, ts = self._local.pop(key, (float(self.max_requests), now))
+        tokens = min(self.max_requests, tokens + (now - ts) * self.refill_per_second)
+        if tokens < 1:
+            self._store_local(key, tokens, now)
+            return None
+        tokens -= 1
+        self._store_local(key, tokens, now)
+        return tokens
+
+    def _store_local(self, key: str, tokens: float, now: float) -> None:
+        self._local[key] = (tokens, now)
+        self._local.move_to_end(key)
+        while len(self._local) > settings.rate_limit_local_max_entries:
+            self._local.popitem(last=False)
+
+    def _too_many(self, tokens: float) -> HTTPException:
+        retry_after = math.ceil((1 - max(tokens, 0)) / self.refill_per_second)
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail='Too many requests',
+            headers={'Retry-After': str(max(retry_after, 1))},
+        )
 
     async def __call__(self, request: Request, redis: Redis = Depends(get_redis)) -> None:
         ip = request.client.host if request.client else 'unknown'
         user_id = request.session.get('user_id', 'anon')
         key = f'ratelimit:{self.bucket}:{user_id}:{ip}'
-        count = await redis.incr(key)
-        if count == 1:
-            await redis.expire(key, self.window_seconds)
-        if count > self.max_requests:
-            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail='Too many requests')
+
+        local_tokens = self._take_local(key)
+        if local_tokens is None:
+            raise self._too_many(0)
+
+        if self._script is None or self._script.registered_client is not redis:
+            self._script = redis.register_script(TOKEN_BUCKET_LUA)
+        try:
+            allowed, remaining = await self._script(
+                keys=[key],
+                args=[self.max_requests, self.refill_per_second, self.window_seconds],
+            )
+        except RedisError:
+            logger.warning('rate_limit_redis_unavailable bucket=%s fail_open=%s', self.bucket, settings.rate_limit_fail_open)
+            if settings.rate_limit_fail_open:
+                return
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail='Rate limiter unavailable')
+
+        remaining = float(remaining)
+        if remaining < local_tokens:
+            self._store_local(key, remaining, time.monotonic())
+        if not int(allowed):
+            raise self._too_many(remaining)
@@ -1,15 +1,19 @@
-﻿from base64 import urlsafe_b64encode
+﻿import asyncio
+from base64 import urlsafe_b64encode
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 import hashlib
 import hmac
 import secrets
 
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet
 from fastapi import HTTPException, Request, status
 from itsdangerous import URLSafeTimedSerializer
 from passlib.context import CryptContext
 
 from app.core.config import get_settings
+from app.core.metrics import PASSWORD_HASH_JOBS, PASSWORD_HASH_REJECTIONS, PASSWORD_HASH_WORKERS
 
 pwd_context = CryptContext(schemes=['pbkdf2_sha256'], deprecated='auto')
 
@@ -22,6 +26,65 @@ def verify_password(raw_password: str, password_hash: str) -> bool:
     return pwd_context.verify(raw_password, password_hash)
 
 
+class PasswordHasherBusy(Exception):
+    pass
+
+
+_password_executor: ThreadPoolExecutor | None = None
+_password_pending = 0
+_password_rejected_total = 0
+
+
+def _get_password_executor() -> ThreadPoolExecutor:
+    global _password_executor
+    if _password_executor is None:
+        _password_executor = ThreadPoolExecutor(
+            max_workers=get_settings().password_hash_workers,
+            thread_name_prefix='password-hash',
+        )
+    return _password_executor
+
+
+async def _run_password_job(func, *args):
+    # pbkdf2 releases the GIL, so a small dedicated pool keeps the event loop
+    # (and every WebSocket on it) responsive; past the pending cap we shed load
+    # instead of letting logins queue up behind each other.
+    global _password_pending, _password_rejected_total
+    if _password_pending >= get_settings().password_hash_max_pending:
+        _password_rejected_total += 1
+        PASSWORD_HASH_REJECTIONS.inc()
+        raise PasswordHasherBusy()
+    _password_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_password_executor(), func, *args)
+    finally:
+        _password_pending -= 1
+
+
+async def hash_password_async(raw_password: str) -> str:
+    return await _run_password_job(hash_password, raw_password)
+
+
+async def verify_password_async(raw_password: str, password_hash: str) -> bool:
+    return await _run_password_job(verify_password, raw_password, password_hash)
+
+
+def get_password_hash_metrics() -> dict[str, int]:
+    settings = get_settings()
+    return {
+        'workers': settings.password_hash_workers,
+        'pending': _password_pending,
+        'queued': max(_password_pending - settings.password_hash_workers, 0),
+        'rejected_total': _password_rejected_total,
+    }
+
+
+PASSWORD_HASH_JOBS.set_callback(
+    lambda: {(state,): value for state, value in get_password_hash_metrics().items() if state in ('pending', 'queued')}
+)
+PASSWORD_HASH_WORKERS.set_callback(lambda: {(): get_settings().password_hash_workers})
+
+
 def get_serializer() -> URLSafeTimedSerializer:
     settings = get_settings()
     return URLSafeTimedSerializer(settings.secret_key, salt='roleta-session')
@@ -44,18 +107,31 @@ async def require_csrf(request: Request) -> None:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='CSRF validation failed')
 
 
-def get_fernet() -> Fernet:
-    settings = get_settings()
-    digest = hashlib.sha256(settings.token_encryption_key.encode('utf-8')).digest()
+@lru_cache(maxsize=8)
+def _derive_fernet(secret: str) -> Fernet:
+    digest = hashlib.sha256(secret.encode('utf-8')).digest()
     return Fernet(urlsafe_b64encode(digest))
 
 
+@lru_cache(maxsize=1)
+def get_keyring() -> MultiFernet:
+    # The current key encrypts; previous keys (comma separated) only decrypt,
+    # so secrets keep working while a rotation is rolled out.
+    settings = get_settings()
+    previous = [key.strip() for key in settings.token_encryption_previous_keys.split(',') if key.strip()]
+    return MultiFernet([_derive_fernet(settings.token_encryption_key), *map(_derive_fernet, previous)])
+
+
 def encrypt_value(value: str) -> str:
-    return get_fernet().encrypt(value.encode('utf-8')).decode('utf-8')
+    return get_keyring().encrypt(value.encode('utf-8')).decode('utf-8')
 
 
 def decrypt_value(value: str) -> str:
-    return get_fernet().decrypt(value.encode('utf-8')).decode('utf-8')
+    return get_keyring().decrypt(value.encode('utf-8')).decode('utf-8')
+
+
+def rotate_value(value: str) -> str:
+    return get_keyring().rotate(value.encode('utf-8')).decode('utf-8')
 
 
 def sign_overlay_token(giveaway_id: int) -> str:
@@ -1,9 +1,37 @@
-﻿from redis.asyncio import Redis
+﻿from time import perf_counter
+
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
 
 from app.core.config import get_settings
+from app.core.metrics import REDIS_COMMAND_DURATION
 
 settings = get_settings()
-redis_client = Redis.from_url(settings.redis_url, decode_responses=True)
+
+
+class InstrumentedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        started = perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            command = 'MULTI' if self.is_transaction else 'PIPELINE'
+            REDIS_COMMAND_DURATION.observe(perf_counter() - started, command=command)
+
+
+class InstrumentedRedis(Redis):
+    async def execute_command(self, *args, **options):
+        started = perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_DURATION.observe(perf_counter() - started, command=str(args[0]).upper())
+
+    def pipeline(self, transaction: bool = True, shard_hint: str | None = None) -> Pipeline:
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+redis_client = InstrumentedRedis.from_url(settings.redis_url, decode_responses=True)
 
 
 async def get_redis() -> Redis:
@@ -1,20 +1,128 @@
-﻿from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+﻿from time import perf_counter, time
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import get_settings
+from app.core.metrics import DB_POOL_CHECKOUT_WAIT, DB_POOL_CHECKOUTS, DB_POOL_CONNECTIONS
 
 settings = get_settings()
-engine = create_async_engine(
-    settings.database_url,
-    future=True,
-    pool_pre_ping=True,
-    pool_size=settings.db_pool_size,
-    max_overflow=settings.db_max_overflow,
-    pool_timeout=settings.db_pool_timeout_seconds,
-    pool_recycle=settings.db_pool_recycle_seconds,
+PRIMARY_STICKY_SESSION_KEY = 'db_primary_until'
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    # _do_get is where a checkout blocks on a saturated pool (or opens an
+    # overflow connection), so timing it gives the checkout wait.
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            name = self.logging_name or 'primary'
+            DB_POOL_CHECKOUTS.inc(pool=name)
+            DB_POOL_CHECKOUT_WAIT.observe(perf_counter() - started, pool=name)
+
+
+def _create_engine(url: str, pool_size: int, max_overflow: int, name: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        future=True,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
+        pool_pre_ping=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+    )
+
+
+engine = _create_engine(settings.database_url, settings.db_pool_size, settings.db_max_overflow, 'primary')
+replica_engine = (
+    _create_engine(
+        settings.database_replica_url,
+        settings.db_replica_pool_size,
+        settings.db_replica_max_overflow,
+        'replica',
+    )
+    if settings.database_replica_url
+    else None
+)
+
+
+class TrackedSession(Session):
+    pass
+
+
+@event.listens_for(TrackedSession, 'after_commit')
+def _mark_committed(session: Session) -> None:
+    session.info['committed'] = True
+
+
+AsyncSessionLocal = async_sessionmaker(
+    engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    sync_session_class=TrackedSession,
 )
-AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+ReadSessionLocal = async_sessionmaker(replica_engine or engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def prefers_primary(session_data: dict | None) -> bool:
+    if replica_engine is None or not session_data:
+        return True
+    return float(session_data.get(PRIMARY_STICKY_SESSION_KEY, 0)) > time()
 
 
-async def get_db_session() -> AsyncSession:
+def read_session_factory(session_data: dict | None = None) -> async_sessionmaker:
+    return AsyncSessionLocal if prefers_primary(session_data) else ReadSessionLocal
+
+
+def _stick_to_primary(request: Request) -> None:
+    if 'session' in request.scope:
+        request.session[PRIMARY_STICKY_SESSION_KEY] = time() + settings.db_read_your_writes_seconds
+
+
+async def get_db_session(request: Request) -> AsyncSession:
     async with AsyncSessionLocal() as session:
         yield session
+        if replica_engine is not None and session.info.get('committed'):
+            _stick_to_primary(request)
+
+
+async def get_read_db_session(request: Request) -> AsyncSession:
+    session_data = request.session if 'session' in request.scope else None
+    async with read_session_factory(session_data)() as session:
+        yield session
+
+
+def _pool_stats(db_engine: AsyncEngine) -> dict:
+    pool = db_engine.sync_engine.pool
+    stats = {'pool': type(pool).__name__}
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        reader = getattr(pool, name, None)
+        if callable(reader):
+            stats[name] = reader()
+    return stats
+
+
+def get_pool_metrics() -> dict[str, dict]:
+    metrics = {'primary': _pool_stats(engine)}
+    if replica_engine is not None:
+        metrics['replica'] = _pool_stats(replica_engine)
+    return metrics
+
+
+def _pool_connection_gauges() -> dict[tuple[str, ...], float]:
+    values = {}
+    for name, stats in get_pool_metrics().items():
+        for state in ('size', 'checkedin', 'checkedout'):
+            if state in stats:
+                values[(name, state)] = stats[state]
+    return values
+
+
+DB_POOL_CONNECTIONS.set_callback(_pool_connection_gauges)
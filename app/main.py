@@ -13,9 +13,11 @@ from starlette.middleware.sessions import SessionMiddleware
 from app.api import auth, client, dashboard, oauth, ops, realtime
 from app.core.config import get_settings
 from app.core.logging import configure_logging
+from app.core.metrics import PrometheusMiddleware
 from app.core.security import parse_overlay_token
-from app.db.session import AsyncSessionLocal
+from app.db.session import ReadSessionLocal
 from app.models import Giveaway
+from app.services.draw_scheduler import RevealScheduler
 from app.workers.chat_worker import worker_loop
 
 BRAZIL_TZ = ZoneInfo('America/Sao_Paulo')
@@ -67,23 +69,33 @@ def create_app() -> FastAPI:
         allow_headers=['*'],
     )
     app.add_middleware(SecurityHeadersMiddleware)
+    app.add_middleware(PrometheusMiddleware)
 
     templates = Jinja2Templates(directory='app/templates')
     templates.env.filters['br_datetime'] = format_brt_datetime
     templates.env.globals['public_frontend_url'] = settings.public_frontend_url
     app.state.templates = templates
     app.state.embedded_worker_task = None
+    app.state.reveal_scheduler = RevealScheduler()
 
     async def overlay_loader(giveaway_id: int, token: str):
         parsed = parse_overlay_token(token)
         if parsed != giveaway_id:
             return None
-        async with AsyncSessionLocal() as db:
+        async with ReadSessionLocal() as db:
             giveaway = await db.get(Giveaway, giveaway_id)
             return giveaway
 
     app.state.overlay_loader = overlay_loader
 
+    @app.on_event('startup')
+    async def startup_reveal_scheduler():
+        await app.state.reveal_scheduler.start()
+
+    @app.on_event('shutdown')
+    async def shutdown_reveal_scheduler():
+        await app.state.reveal_scheduler.stop()
+
     @app.on_event('startup')
     async def startup_embedded_worker():
         if settings.run_embedded_worker:
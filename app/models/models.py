@@ -1,7 +1,7 @@
 ﻿from datetime import datetime
 from enum import StrEnum
 
-from sqlalchemy import JSON, Boolean, DateTime, Enum, ForeignKey, String, UniqueConstraint, func
+from sqlalchemy import JSON, Boolean, DateTime, Enum, ForeignKey, Index, Integer, String, UniqueConstraint, false, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -59,6 +59,9 @@ class OAuthAccount(Base):
     expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     scopes: Mapped[str] = mapped_column(String(1024), default='')
     provider_user_id: Mapped[str] = mapped_column(String(255))
+    token_valid: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    validated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    refresh_revoked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -74,6 +77,7 @@ class Giveaway(Base):
     command: Mapped[str] = mapped_column(String(50), default='!participar')
     ticker_message: Mapped[str | None] = mapped_column(String(255), nullable=True)
     is_open: Mapped[bool] = mapped_column(Boolean, default=False, index=True)
+    weighted_draw: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false())
     youtube_video_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
     youtube_live_chat_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -88,6 +92,8 @@ class Participant(Base):
     __tablename__ = 'participants'
     __table_args__ = (
         UniqueConstraint('giveaway_id', 'platform', 'platform_user_id', name='uq_participant_unique'),
+        Index('ix_participants_giveaway_first_seen', 'giveaway_id', 'first_seen', 'id'),
+        Index('ix_participants_giveaway_last_seen', 'giveaway_id', 'last_seen', 'id'),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -95,6 +101,7 @@ class Participant(Base):
     platform: Mapped[Platform] = mapped_column(Enum(Platform, name='platform_kind'))
     platform_user_id: Mapped[str] = mapped_column(String(255))
     display_name: Mapped[str] = mapped_column(String(255))
+    weight: Mapped[int] = mapped_column(Integer, default=1, server_default='1')
     first_seen: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     last_seen: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -103,6 +110,7 @@ class Participant(Base):
 
 class Winner(Base):
     __tablename__ = 'winners'
+    __table_args__ = (Index('ix_winners_giveaway_drawn_at', 'giveaway_id', 'drawn_at', 'id'),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     giveaway_id: Mapped[int] = mapped_column(ForeignKey('giveaways.id', ondelete='CASCADE'), index=True)
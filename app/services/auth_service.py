@@ -1,12 +1,12 @@
 ﻿from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import hash_password, verify_password
+from app.core.security import hash_password_async, verify_password_async
 from app.models import AuthIdentity, User
 
 
 async def create_user(db: AsyncSession, email: str, password: str) -> User:
-    user = User(email=email.lower().strip(), password_hash=hash_password(password))
+    user = User(email=email.lower().strip(), password_hash=await hash_password_async(password))
     db.add(user)
     await db.flush()
     return user
@@ -24,7 +24,7 @@ async def authenticate_user(db: AsyncSession, email: str, password: str) -> User
     user = result.scalar_one_or_none()
     if not user or not user.password_hash:
         return None
-    if not verify_password(password, user.password_hash):
+    if not await verify_password_async(password, user.password_hash):
         return None
     return user
 
@@ -1,23 +1,27 @@
 ﻿from fastapi import Depends, HTTPException, Request, status
+from redis.asyncio import Redis
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db_session
+from app.db.redis_client import get_redis
+from app.db.session import read_session_factory
 from app.models import Giveaway, User
+from app.services.user_cache import SessionUser, get_session_user
 
 
-async def get_current_user(request: Request, db: AsyncSession = Depends(get_db_session)) -> User:
+async def get_current_user(request: Request, redis: Redis = Depends(get_redis)) -> SessionUser:
     user_id = request.session.get('user_id')
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Authentication required')
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    user = result.scalar_one_or_none()
+    # No request-scoped session here: read endpoints would otherwise hold a
+    # primary connection next to their replica one on every cache miss.
+    user = await get_session_user(read_session_factory(request.session), int(user_id), redis)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid user session')
     return user
 
 
-async def get_owned_giveaway(giveaway_id: int, user: User, db: AsyncSession) -> Giveaway:
+async def get_owned_giveaway(giveaway_id: int, user: User | SessionUser, db: AsyncSession) -> Giveaway:
     result = await db.execute(
         select(Giveaway).where(Giveaway.id == giveaway_id, Giveaway.user_id == user.id)
     )
@@ -0,0 +1,68 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import suppress
+
+from app.db.redis_client import redis_client
+from app.db.session import AsyncSessionLocal
+from app.services.realtime import build_giveaway_state, publish_state, release_winner_reveal
+
+logger = logging.getLogger(__name__)
+
+
+class RevealScheduler:
+    def __init__(self):
+        self._heap: list[tuple[float, int, int, int]] = []
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def schedule(self, giveaway_id: int, winner_id: int, delay_seconds: float) -> None:
+        heapq.heappush(self._heap, (time.monotonic() + delay_seconds, next(self._counter), giveaway_id, winner_id))
+        self._wakeup.set()
+
+    def pending(self) -> int:
+        return len(self._heap)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name='draw-reveal-scheduler')
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        # Reveal whatever is still queued so overlays are not left spinning.
+        while self._heap:
+            _, _, giveaway_id, winner_id = heapq.heappop(self._heap)
+            await self._reveal(giveaway_id, winner_id)
+
+    async def _run(self) -> None:
+        while True:
+            if not self._heap:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            delay = self._heap[0][0] - time.monotonic()
+            if delay > 0:
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                self._wakeup.clear()
+                continue
+            _, _, giveaway_id, winner_id = heapq.heappop(self._heap)
+            await self._reveal(giveaway_id, winner_id)
+
+    async def _reveal(self, giveaway_id: int, winner_id: int) -> None:
+        try:
+            await release_winner_reveal(redis_client, giveaway_id, winner_id)
+            async with AsyncSessionLocal() as db:
+                state = await build_giveaway_state(db, giveaway_id, redis=redis_client)
+            if state:
+                await publish_state(redis_client, state)
+        except Exception:
+            logger.exception('draw_reveal_failed giveaway=%s', giveaway_id)
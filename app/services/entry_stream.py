@@ -0,0 +1,88 @@
+import time
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, ResponseError
+
+from app.core.config import get_settings
+from app.models import Platform
+
+settings = get_settings()
+
+ENTRY_STREAMS_KEY = 'giveaway:entry_streams'
+ENTRY_GROUP = 'persisters'
+
+
+def entry_stream_key(giveaway_id: int) -> str:
+    return f'giveaway:{giveaway_id}:entries'
+
+
+def giveaway_id_from_stream(stream_key: str) -> int:
+    return int(stream_key.split(':')[1])
+
+
+async def append_entry(
+    redis: Redis,
+    giveaway_id: int,
+    platform: Platform,
+    platform_user_id: str,
+    display_name: str,
+    weight: int = 1,
+) -> None:
+    key = entry_stream_key(giveaway_id)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.xadd(
+            key,
+            {
+                'p': platform.value,
+                'u': platform_user_id,
+                'n': display_name,
+                'w': weight,
+                't': int(time.time() * 1000),
+            },
+            maxlen=settings.chat_entry_stream_maxlen,
+            approximate=True,
+        )
+        pipe.sadd(ENTRY_STREAMS_KEY, key)
+        await pipe.execute()
+
+
+async def ensure_entry_group(redis: Redis, stream_key: str) -> None:
+    try:
+        await redis.xgroup_create(stream_key, ENTRY_GROUP, id='0', mkstream=True)
+    except ResponseError as exc:
+        if 'BUSYGROUP' not in str(exc):
+            raise
+
+
+async def discard_entries(redis: Redis, giveaway_id: int) -> None:
+    # Entries still queued for a cleared or deleted giveaway must not
+    # resurrect participants after the fact.
+    key = entry_stream_key(giveaway_id)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.delete(key)
+        pipe.srem(ENTRY_STREAMS_KEY, key)
+        await pipe.execute()
+
+
+async def get_entry_pipeline_metrics(redis: Redis) -> dict:
+    streams = {}
+    try:
+        for key in await redis.smembers(ENTRY_STREAMS_KEY):
+            length = await redis.xlen(key)
+            pending = lag = None
+            try:
+                for group in await redis.xinfo_groups(key):
+                    if group.get('name') == ENTRY_GROUP:
+                        pending = group.get('pending')
+                        lag = group.get('lag')
+            except ResponseError:
+                pass
+            streams[giveaway_id_from_stream(key)] = {'length': length, 'pending': pending, 'lag': lag}
+    except RedisError:
+        return {'available': False}
+    return {
+        'available': True,
+        'streams': streams,
+        'lag_total': sum(stream['lag'] or 0 for stream in streams.values()),
+        'pending_total': sum(stream['pending'] or 0 for stream in streams.values()),
+    }
@@ -0,0 +1,92 @@
+import csv
+import json
+import zlib
+from collections.abc import AsyncIterator, Sequence
+from io import StringIO
+
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Participant
+
+EXPORT_BATCH_SIZE = 2000
+EXPORT_COLUMNS = ('platform', 'platform_user_id', 'display_name')
+EXPORT_MEDIA_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+
+async def iter_participant_rows(db: AsyncSession, giveaway_id: int) -> AsyncIterator[Sequence[Row]]:
+    stmt = (
+        select(Participant.platform, Participant.platform_user_id, Participant.display_name)
+        .where(Participant.giveaway_id == giveaway_id)
+        .order_by(Participant.id.asc())
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        yield partition
+
+
+def _encode_csv(rows: Sequence[Sequence[str]]) -> bytes:
+    output = StringIO()
+    csv.writer(output).writerows(rows)
+    return output.getvalue().encode('utf-8')
+
+
+def _row_json(row: Row) -> str:
+    return json.dumps(
+        {'platform': row.platform.value, 'platform_user_id': row.platform_user_id, 'display_name': row.display_name},
+        ensure_ascii=False,
+    )
+
+
+def _encode_ndjson(rows: Sequence[Row]) -> bytes:
+    return ''.join(_row_json(row) + '\n' for row in rows).encode('utf-8')
+
+
+def _encode_json_items(rows: Sequence[Row], first: bool) -> bytes:
+    # Elements of one JSON array written across chunks; `first` drops the
+    # leading comma of the very first element.
+    body = ','.join(_row_json(row) for row in rows)
+    return (body if first else ',' + body).encode('utf-8') if body else b''
+
+
+async def stream_participants_export(
+    db: AsyncSession,
+    giveaway_id: int,
+    fmt: str,
+    compress: bool = False,
+) -> AsyncIterator[bytes]:
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise ValueError(f'unsupported export format: {fmt}')
+    # wbits=31 makes zlib emit a gzip container, chunk by chunk.
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def encode(chunk: bytes) -> bytes:
+        return compressor.compress(chunk) if compressor else chunk
+
+    if fmt == 'csv':
+        yield encode(_encode_csv([EXPORT_COLUMNS]))
+    elif fmt == 'json':
+        yield encode(b'[')
+
+    first = True
+    async for rows in iter_participant_rows(db, giveaway_id):
+        if fmt == 'csv':
+            chunk = encode(_encode_csv([(row.platform.value, row.platform_user_id, row.display_name) for row in rows]))
+        elif fmt == 'json':
+            chunk = encode(_encode_json_items(rows, first))
+            first = first and not rows
+        else:
+            chunk = encode(_encode_ndjson(rows))
+        if chunk:
+            yield chunk
+
+    if fmt == 'json':
+        yield encode(b']')
+
+    if compressor:
+        yield compressor.flush()
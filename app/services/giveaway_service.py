@@ -2,22 +2,70 @@
 import secrets
 from datetime import datetime, timezone
 
+from redis.asyncio import Redis
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import Giveaway, Participant, Platform, Winner
+from app.services import hot_roster
+from app.services.giveaway_version import get_roster_version
 
 logger = logging.getLogger(__name__)
 
 
-async def add_or_refresh_participant(
+class AliasTable:
+    # Vose alias method over integer weights: every column holds a scaled
+    # probability out of `total`, so a draw is one uniform column pick plus one
+    # integer comparison, both from the OS CSPRNG.
+    def __init__(self, participant_ids: list[int], weights: list[int]):
+        if not participant_ids or len(participant_ids) != len(weights):
+            raise ValueError('alias table needs one positive weight per participant')
+        size = len(weights)
+        total = sum(weights)
+        if total <= 0 or any(weight <= 0 for weight in weights):
+            raise ValueError('alias table needs one positive weight per participant')
+
+        scaled = [weight * size for weight in weights]
+        prob = [total] * size
+        alias = list(range(size))
+        small = [idx for idx, value in enumerate(scaled) if value < total]
+        large = [idx for idx, value in enumerate(scaled) if value >= total]
+        while small and large:
+            low = small.pop()
+            high = large.pop()
+            prob[low] = scaled[low]
+            alias[low] = high
+            scaled[high] -= total - scaled[low]
+            if scaled[high] < total:
+                small.append(high)
+            else:
+                large.append(high)
+
+        self.participant_ids = participant_ids
+        self.prob = prob
+        self.alias = alias
+        self.total = total
+
+    def __len__(self) -> int:
+        return len(self.participant_ids)
+
+    def pick(self) -> int:
+        column = secrets.randbelow(len(self.prob))
+        if secrets.randbelow(self.total) < self.prob[column]:
+            return self.participant_ids[column]
+        return self.participant_ids[self.alias[column]]
+
+
+_alias_tables: dict[int, tuple[int, AliasTable]] = {}
+
+
+async def _find_participant(
     db: AsyncSession,
     giveaway_id: int,
     platform: Platform,
     platform_user_id: str,
-    display_name: str,
-) -> tuple[Participant, bool]:
+) -> Participant | None:
     result = await db.execute(
         select(Participant).where(
             Participant.giveaway_id == giveaway_id,
@@ -25,10 +73,22 @@ async def add_or_refresh_participant(
             Participant.platform_user_id == platform_user_id,
         )
     )
-    participant = result.scalar_one_or_none()
+    return result.scalar_one_or_none()
+
+
+async def add_or_refresh_participant(
+    db: AsyncSession,
+    giveaway_id: int,
+    platform: Platform,
+    platform_user_id: str,
+    display_name: str,
+    weight: int = 1,
+) -> tuple[Participant, bool]:
+    participant = await _find_participant(db, giveaway_id, platform, platform_user_id)
     now = datetime.now(timezone.utc)
     if participant:
         participant.display_name = display_name
+        participant.weight = weight
         participant.last_seen = now
         return participant, False
 
@@ -37,40 +97,100 @@ async def add_or_refresh_participant(
         platform=platform,
         platform_user_id=platform_user_id,
         display_name=display_name,
+        weight=weight,
         first_seen=now,
         last_seen=now,
     )
-    db.add(participant)
     try:
-        await db.flush()
+        # Savepoint: losing the insert race to another writer must only undo
+        # this row, not everything the caller already added in its transaction.
+        async with db.begin_nested():
+            db.add(participant)
     except IntegrityError:
-        await db.rollback()
-        result = await db.execute(
-            select(Participant).where(
-                Participant.giveaway_id == giveaway_id,
-                Participant.platform == platform,
-                Participant.platform_user_id == platform_user_id,
-            )
-        )
-        participant = result.scalar_one()
+        participant = await _find_participant(db, giveaway_id, platform, platform_user_id)
         participant.display_name = display_name
+        participant.weight = weight
         participant.last_seen = now
         return participant, False
     return participant, True
 
 
-async def draw_winner(db: AsyncSession, giveaway: Giveaway) -> Winner | None:
-    result = await db.execute(select(Participant).where(Participant.giveaway_id == giveaway.id))
-    participants = result.scalars().all()
-    if not participants:
+async def prepare_alias_table(db: AsyncSession, giveaway_id: int, redis: Redis | None = None) -> AliasTable | None:
+    # Every write to `participants` bumps the roster version in Redis, so a
+    # cached table is checked with one GET instead of scanning the roster, and
+    # stays valid across processes. The version is read before the rows: a
+    # write racing the build bumps it again and the next draw rebuilds.
+    if redis is None:
+        _alias_tables.pop(giveaway_id, None)
+        signature = None
+    else:
+        signature = await get_roster_version(redis, giveaway_id)
+        cached = _alias_tables.get(giveaway_id)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+    rows = (
+        await db.execute(
+            select(Participant.id, Participant.weight)
+            .where(Participant.giveaway_id == giveaway_id)
+            .order_by(Participant.id.asc())
+        )
+    ).all()
+    if not rows:
+        _alias_tables.pop(giveaway_id, None)
         return None
+    table = AliasTable([row.id for row in rows], [max(int(row.weight or 1), 1) for row in rows])
+    if signature is not None:
+        _alias_tables[giveaway_id] = (signature, table)
+    logger.info('alias_table_built giveaway=%s participants=%s', giveaway_id, len(table))
+    return table
+
+
+def invalidate_alias_table(giveaway_id: int) -> None:
+    _alias_tables.pop(giveaway_id, None)
+
+
+async def _pick_weighted(db: AsyncSession, giveaway_id: int, redis: Redis | None = None) -> Participant | None:
+    for _ in range(2):
+        table = await prepare_alias_table(db, giveaway_id, redis)
+        if table is None:
+            return None
+        picked = await db.get(Participant, table.pick())
+        if picked is not None:
+            return picked
+        invalidate_alias_table(giveaway_id)
+    return None
+
+
+async def draw_winner(db: AsyncSession, giveaway: Giveaway, redis: Redis | None = None) -> Winner | None:
+    hot = redis is not None and await hot_roster.is_hot(redis, giveaway.id)
+    if hot:
+        # Persist pending entries first so the winner always exists in the
+        # table; weighted draws then use the cached alias table below.
+        await hot_roster.flush(redis, db, giveaway.id)
+    if hot and not giveaway.weighted_draw:
+        hot_pick = await hot_roster.pick(redis, giveaway.id)
+        if hot_pick is None:
+            return None
+        platform, platform_user_id, display_name = hot_pick
+    else:
+        if giveaway.weighted_draw:
+            picked = await _pick_weighted(db, giveaway.id, redis)
+            if picked is None:
+                return None
+        else:
+            result = await db.execute(select(Participant).where(Participant.giveaway_id == giveaway.id))
+            participants = result.scalars().all()
+            if not participants:
+                return None
+            picked = secrets.choice(participants)
+        platform, platform_user_id, display_name = picked.platform, picked.platform_user_id, picked.display_name
 
-    picked = secrets.choice(participants)
     winner = Winner(
         giveaway_id=giveaway.id,
-        platform=picked.platform,
-        platform_user_id=picked.platform_user_id,
-        display_name=picked.display_name,
+        platform=platform,
+        platform_user_id=platform_user_id,
+        display_name=display_name,
     )
     db.add(winner)
     await db.flush()
@@ -83,6 +203,7 @@ async def clear_participants(db: AsyncSession, giveaway_id: int) -> int:
     count = len(rows)
     for row in rows:
         await db.delete(row)
+    invalidate_alias_table(giveaway_id)
     return count
 
 
@@ -0,0 +1,95 @@
+from dataclasses import dataclass
+
+from redis.asyncio import Redis
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Giveaway, Participant, Winner
+from app.services.realtime import pending_reveal_ids, pending_reveal_ids_for
+
+
+@dataclass(frozen=True, slots=True)
+class GiveawaySummary:
+    giveaway: Giveaway
+    participants_count: int
+    winners_count: int
+    last_winner: str | None
+    last_entrant: str | None
+
+    def as_dict(self) -> dict:
+        return {
+            'id': self.giveaway.id,
+            'name': self.giveaway.name,
+            'command': self.giveaway.command,
+            'is_open': self.giveaway.is_open,
+            'created_at': self.giveaway.created_at,
+            'participants_count': self.participants_count,
+            'winners_count': self.winners_count,
+            'last_winner': self.last_winner,
+            'last_entrant': self.last_entrant,
+        }
+
+
+def _summary_query(hidden_winner_ids: list[int] | None = None) -> Select:
+    # Correlated scalar subqueries keep this a single statement on both
+    # Postgres and SQLite; each one is served by a (giveaway_id, ...) index,
+    # last_entrant by ix_participants_giveaway_last_seen. Winners whose reveal
+    # animation is still running are left out, as in the live state.
+    visible_winner = Winner.giveaway_id == Giveaway.id
+    if hidden_winner_ids:
+        visible_winner = visible_winner & Winner.id.notin_(hidden_winner_ids)
+    participants_count = (
+        select(func.count(Participant.id))
+        .where(Participant.giveaway_id == Giveaway.id)
+        .correlate(Giveaway)
+        .scalar_subquery()
+    )
+    winners_count = select(func.count(Winner.id)).where(visible_winner).correlate(Giveaway).scalar_subquery()
+    last_winner = (
+        select(Winner.display_name)
+        .where(visible_winner)
+        .order_by(Winner.drawn_at.desc(), Winner.id.desc())
+        .limit(1)
+        .correlate(Giveaway)
+        .scalar_subquery()
+    )
+    last_entrant = (
+        select(Participant.display_name)
+        .where(Participant.giveaway_id == Giveaway.id)
+        .order_by(Participant.last_seen.desc(), Participant.id.desc())
+        .limit(1)
+        .correlate(Giveaway)
+        .scalar_subquery()
+    )
+    return select(Giveaway, participants_count, winners_count, last_winner, last_entrant)
+
+
+def _to_summary(row) -> GiveawaySummary:
+    giveaway, participants_count, winners_count, last_winner, last_entrant = row
+    return GiveawaySummary(giveaway, int(participants_count or 0), int(winners_count or 0), last_winner, last_entrant)
+
+
+async def list_giveaway_summaries(db: AsyncSession, user_id: int, redis: Redis | None = None) -> list[GiveawaySummary]:
+    hidden_winner_ids = None
+    if redis is not None:
+        giveaway_ids = (await db.execute(select(Giveaway.id).where(Giveaway.user_id == user_id))).scalars().all()
+        hidden_winner_ids = await pending_reveal_ids_for(redis, list(giveaway_ids))
+    rows = await db.execute(
+        _summary_query(hidden_winner_ids).where(Giveaway.user_id == user_id).order_by(Giveaway.id.desc())
+    )
+    return [_to_summary(row) for row in rows.all()]
+
+
+async def get_giveaway_summary(
+    db: AsyncSession,
+    giveaway_id: int,
+    user_id: int,
+    redis: Redis | None = None,
+) -> GiveawaySummary | None:
+    hidden_winner_ids = await pending_reveal_ids(redis, giveaway_id) if redis is not None else None
+    row = (
+        await db.execute(
+            _summary_query(hidden_winner_ids).where(Giveaway.id == giveaway_id, Giveaway.user_id == user_id)
+        )
+    ).one_or_none()
+    return _to_summary(row) if row else None
@@ -0,0 +1,94 @@
+import hashlib
+import time
+
+from fastapi import Request, Response, status
+from redis.asyncio import Redis
+
+
+def _version_key(giveaway_id: int) -> str:
+    return f'giveaway:{giveaway_id}:version'
+
+
+def _version_seed() -> int:
+    # Seeding from the wall clock keeps versions moving forward even if the
+    # key is lost, so a client can never revalidate against a reused version.
+    return int(time.time() * 1000)
+
+
+def _roster_version_key(giveaway_id: int) -> str:
+    return f'giveaway:{giveaway_id}:roster_version'
+
+
+async def bump_giveaway_version(redis: Redis, giveaway_id: int, roster: bool = False) -> int:
+    # `roster` marks writes to `participants`; only those move the roster
+    # version that cached alias tables are checked against.
+    key = _version_key(giveaway_id)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.set(key, _version_seed(), nx=True)
+        pipe.incr(key)
+        if roster:
+            pipe.set(_roster_version_key(giveaway_id), _version_seed(), nx=True)
+            pipe.incr(_roster_version_key(giveaway_id))
+        _, version, *_ = await pipe.execute()
+    return int(version)
+
+
+async def bump_roster_version(redis: Redis, giveaway_id: int) -> int:
+    key = _roster_version_key(giveaway_id)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.set(key, _version_seed(), nx=True)
+        pipe.incr(key)
+        _, version = await pipe.execute()
+    return int(version)
+
+
+async def get_giveaway_version(redis: Redis, giveaway_id: int) -> int:
+    return await _get_or_seed(redis, _version_key(giveaway_id))
+
+
+async def get_roster_version(redis: Redis, giveaway_id: int) -> int:
+    return await _get_or_seed(redis, _roster_version_key(giveaway_id))
+
+
+async def _get_or_seed(redis: Redis, key: str) -> int:
+    version = await redis.get(key)
+    if version is None:
+        seed = _version_seed()
+        if await redis.set(key, seed, nx=True):
+            return seed
+        version = await redis.get(key)
+    return int(version)
+
+
+def make_etag(request: Request, giveaway_id: int, version: int, variant: str = '') -> str:
+    # `variant` names response parameters resolved server side (defaults,
+    # clamping) that the raw query string does not spell out.
+    variant = hashlib.sha1(f'{request.url.path}?{request.url.query}#{variant}'.encode('utf-8')).hexdigest()[:10]
+    return f'W/"g{giveaway_id}-v{version}-{variant}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(candidate.strip().removeprefix('W/') == opaque for candidate in header.split(','))
+
+
+async def check_not_modified(
+    request: Request,
+    redis: Redis,
+    giveaway_id: int,
+    variant: str = '',
+) -> tuple[str, Response | None]:
+    version = await get_giveaway_version(redis, giveaway_id)
+    etag = make_etag(request, giveaway_id, version, variant)
+    if etag_matches(request, etag):
+        return etag, Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=conditional_headers(etag))
+    return etag, None
+
+
+def conditional_headers(etag: str) -> dict[str, str]:
+    return {'ETag': etag, 'Cache-Control': 'private, no-cache'}
@@ -0,0 +1,366 @@
+import asyncio
+import json
+import logging
+import secrets
+import time
+from datetime import datetime, timezone
+
+from redis.asyncio import Redis
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.models import Giveaway, Participant, Platform
+from app.services.audit import add_audit_log
+from app.services.giveaway_version import bump_roster_version
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Write-behind roster for open giveaways (HOT_ROSTER_ENABLED). While a
+# giveaway is hot, entries only touch Redis: a hash of details keyed by
+# '{platform}:{user id}', zsets for first/last seen and a dirty set that
+# flush() drains into `participants` in batches. Stop and draw flush
+# synchronously, so the table is complete whenever it is the source of truth.
+HOT_ROSTERS_KEY = 'giveaway:hot_rosters'
+
+
+def _details_key(giveaway_id: int) -> str:
+    return f'giveaway:{giveaway_id}:roster'
+
+
+def _order_key(giveaway_id: int) -> str:
+    return f'giveaway:{giveaway_id}:roster_order'
+
+
+def _seen_key(giveaway_id: int) -> str:
+    return f'giveaway:{giveaway_id}:roster_seen'
+
+
+def _dirty_key(giveaway_id: int) -> str:
+    return f'giveaway:{giveaway_id}:roster_dirty'
+
+
+def _member(platform: Platform, platform_user_id: str) -> str:
+    return f'{platform.value}:{platform_user_id}'
+
+
+def _split_member(member: str) -> tuple[Platform, str]:
+    platform, platform_user_id = member.split(':', 1)
+    return Platform(platform), platform_user_id
+
+
+def _ms(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+def _from_ms(value: float) -> datetime:
+    return datetime.fromtimestamp(value / 1000, timezone.utc)
+
+
+def _roster_keys(giveaway_id: int) -> list[str]:
+    return [_details_key(giveaway_id), _order_key(giveaway_id), _seen_key(giveaway_id), _dirty_key(giveaway_id)]
+
+
+async def is_hot(redis: Redis, giveaway_id: int) -> bool:
+    return bool(await redis.sismember(HOT_ROSTERS_KEY, giveaway_id))
+
+
+async def activate(redis: Redis, db: AsyncSession, giveaway_id: int) -> None:
+    # Seed Redis with whatever the table already holds so counts, names and
+    # draws stay complete when a giveaway is reopened. An already hot roster
+    # is left alone: reseeding it would drop entries not flushed yet.
+    if await is_hot(redis, giveaway_id):
+        return
+    rows = (
+        await db.execute(
+            select(
+                Participant.platform,
+                Participant.platform_user_id,
+                Participant.display_name,
+                Participant.weight,
+                Participant.first_seen,
+                Participant.last_seen,
+            ).where(Participant.giveaway_id == giveaway_id)
+        )
+    ).all()
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.delete(*_roster_keys(giveaway_id))
+        if rows:
+            pipe.hset(
+                _details_key(giveaway_id),
+                mapping={
+                    _member(row.platform, row.platform_user_id): json.dumps({'n': row.display_name, 'w': row.weight or 1})
+                    for row in rows
+                },
+            )
+            pipe.zadd(_order_key(giveaway_id), {_member(row.platform, row.platform_user_id): _ms(row.first_seen) for row in rows})
+            pipe.zadd(_seen_key(giveaway_id), {_member(row.platform, row.platform_user_id): _ms(row.last_seen) for row in rows})
+        pipe.sadd(HOT_ROSTERS_KEY, giveaway_id)
+        await pipe.execute()
+
+
+async def add_entry(
+    redis: Redis,
+    giveaway_id: int,
+    platform: Platform,
+    platform_user_id: str,
+    display_name: str,
+    weight: int = 1,
+) -> bool:
+    member = _member(platform, platform_user_id)
+    now_ms = int(time.time() * 1000)
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.zadd(_order_key(giveaway_id), {member: now_ms}, nx=True)
+        pipe.hset(_details_key(giveaway_id), member, json.dumps({'n': display_name, 'w': weight}))
+        pipe.zadd(_seen_key(giveaway_id), {member: now_ms})
+        pipe.sadd(_dirty_key(giveaway_id), member)
+        created, *_ = await pipe.execute()
+    return bool(created)
+
+
+async def mirror_entries(redis: Redis, giveaway_id: int, entries: list[dict]) -> None:
+    """Add entries another writer already committed to `participants`.
+
+    Used by the stream persister: the roster must still see them, but they are
+    not marked dirty since there is nothing left to flush.
+    """
+    if not entries:
+        return
+    async with redis.pipeline(transaction=True) as pipe:
+        for entry in entries:
+            member = _member(Platform(entry['p']), entry['u'])
+            seen_ms = int(entry.get('t') or time.time() * 1000)
+            pipe.zadd(_order_key(giveaway_id), {member: seen_ms}, nx=True)
+            pipe.hset(_details_key(giveaway_id), member, json.dumps({'n': entry['n'], 'w': int(entry.get('w') or 1)}))
+            pipe.zadd(_seen_key(giveaway_id), {member: seen_ms})
+        await pipe.execute()
+
+
+async def latest_name(redis: Redis, giveaway_id: int) -> str | None:
+    latest = await redis.zrevrange(_seen_key(giveaway_id), 0, 0)
+    if not latest:
+        return None
+    raw = await redis.hget(_details_key(giveaway_id), latest[0])
+    return json.loads(raw)['n'] if raw else None
+
+
+async def sample(redis: Redis, giveaway_id: int, size: int, stratified: bool = False) -> tuple[int, list[str]]:
+    total = await redis.zcard(_order_key(giveaway_id))
+    if total <= size:
+        members = await redis.zrange(_order_key(giveaway_id), 0, -1)
+    elif stratified:
+        async with redis.pipeline(transaction=False) as pipe:
+            for slot in range(size):
+                index = slot * total // size
+                pipe.zrange(_order_key(giveaway_id), index, index)
+            members = [member for found in await pipe.execute() for member in found]
+    else:
+        members = await redis.zrandmember(_order_key(giveaway_id), size)
+    if not members:
+        return total, []
+    details = await redis.hmget(_details_key(giveaway_id), members)
+    return total, [json.loads(raw)['n'] for raw in details if raw]
+
+
+async def pick(redis: Redis, giveaway_id: int) -> tuple[Platform, str, str] | None:
+    # Uniform draws only; weighted draws flush and use the alias table instead.
+    found = await redis.zrandmember(_order_key(giveaway_id), 1)
+    if not found:
+        return None
+    member = found[0]
+    raw = await redis.hget(_details_key(giveaway_id), member)
+    if raw is None:
+        return None
+    platform, platform_user_id = _split_member(member)
+    return platform, platform_user_id, json.loads(raw)['n']
+
+
+def _flush_lock_key(giveaway_id: int) -> str:
+    return f'giveaway:{giveaway_id}:roster_flush_lock'
+
+
+async def _acquire_flush_lock(redis: Redis, giveaway_id: int, wait: bool) -> str | None:
+    token = secrets.token_hex(8)
+    while True:
+        if await redis.set(_flush_lock_key(giveaway_id), token, nx=True, px=settings.hot_roster_flush_lock_ms):
+            return token
+        if not wait:
+            return None
+        # The lock expires on its own if its holder died, so this wait is bounded.
+        await asyncio.sleep(0.05)
+
+
+async def _release_flush_lock(redis: Redis, giveaway_id: int, token: str) -> None:
+    # Only drop our own lock; one that expired and was re-taken belongs to someone else.
+    if await redis.get(_flush_lock_key(giveaway_id)) == token:
+        await redis.delete(_flush_lock_key(giveaway_id))
+
+
+async def flush(redis: Redis, db: AsyncSession, giveaway_id: int, wait: bool = True) -> int:
+    """Write dirty roster entries to `participants`; returns how many were written.
+
+    Flushes of one giveaway are serialised by a Redis lock. Stop and draw
+    wait for it; the background loop (wait=False) skips a locked giveaway.
+    """
+    token = await _acquire_flush_lock(redis, giveaway_id, wait)
+    if token is None:
+        return 0
+    try:
+        return await _flush_locked(redis, db, giveaway_id)
+    finally:
+        await _release_flush_lock(redis, giveaway_id, token)
+
+
+async def _flush_locked(redis: Redis, db: AsyncSession, giveaway_id: int) -> int:
+    dirty, flushing = _dirty_key(giveaway_id), f'{_dirty_key(giveaway_id)}:flushing'
+    # Entries arriving mid-flush land in a fresh dirty set; a failed flush
+    # merges its batch back so nothing is dropped.
+    if not await redis.exists(flushing):
+        if not await redis.exists(dirty):
+            return 0
+        await redis.rename(dirty, flushing)
+    members = sorted(await redis.smembers(flushing))
+    giveaway = await db.get(Giveaway, giveaway_id)
+    if giveaway is None:
+        # Deleted meanwhile: there is nothing left to write these rows to.
+        await redis.delete(flushing)
+        return 0
+    try:
+        written = 0
+        for start in range(0, len(members), settings.hot_roster_flush_batch):
+            batch = members[start : start + settings.hot_roster_flush_batch]
+            written += await _write_members(redis, db, giveaway, batch)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        await redis.sunionstore(dirty, [dirty, flushing])
+        await redis.delete(flushing)
+        raise
+    await redis.delete(flushing)
+    if written:
+        await bump_roster_version(redis, giveaway_id)
+    return written
+
+
+async def _existing_participants(db: AsyncSession, giveaway_id: int, keys: list[tuple[Platform, str]]) -> dict:
+    rows = await db.execute(
+        select(Participant).where(
+            Participant.giveaway_id == giveaway_id,
+            tuple_(Participant.platform, Participant.platform_user_id).in_(keys),
+        )
+    )
+    return {(row.platform, row.platform_user_id): row for row in rows.scalars()}
+
+
+def _apply(participant: Participant, values: dict) -> None:
+    participant.display_name = values['display_name']
+    participant.weight = values['weight']
+    participant.last_seen = values['last_seen']
+
+
+async def _write_members(redis: Redis, db: AsyncSession, giveaway: Giveaway, members: list[str]) -> int:
+    giveaway_id = giveaway.id
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.hmget(_details_key(giveaway_id), members)
+        pipe.zmscore(_order_key(giveaway_id), members)
+        pipe.zmscore(_seen_key(giveaway_id), members)
+        details, firsts, lasts = await pipe.execute()
+
+    pending: dict[tuple[Platform, str], dict] = {}
+    for member, raw, first_ms, last_ms in zip(members, details, firsts, lasts):
+        if raw is None:
+            continue
+        data = json.loads(raw)
+        last_seen = _from_ms(last_ms or first_ms or time.time() * 1000)
+        pending[_split_member(member)] = {
+            'display_name': data['n'],
+            'weight': data.get('w') or 1,
+            'first_seen': _from_ms(first_ms) if first_ms else last_seen,
+            'last_seen': last_seen,
+        }
+    if not pending:
+        return 0
+
+    existing = await _existing_participants(db, giveaway_id, list(pending))
+    new_keys = [key for key in pending if key not in existing]
+    for key in existing:
+        _apply(existing[key], pending[key])
+    await db.flush()
+
+    def new_participant(key: tuple[Platform, str]) -> Participant:
+        values = pending[key]
+        return Participant(giveaway_id=giveaway_id, platform=key[0], platform_user_id=key[1], **values)
+
+    try:
+        async with db.begin_nested():
+            db.add_all([new_participant(key) for key in new_keys])
+    except IntegrityError:
+        # Someone else (inline writer, spool replay) inserted a few of these
+        # meanwhile: retry one row at a time, updating the ones that exist.
+        for key in new_keys:
+            try:
+                async with db.begin_nested():
+                    db.add(new_participant(key))
+            except IntegrityError:
+                _apply((await _existing_participants(db, giveaway_id, [key]))[key], pending[key])
+        await db.flush()
+
+    # The hot path skips the per-entry audit row the other pipelines write;
+    # it is recorded here instead, once per flushed member.
+    for platform, platform_user_id in pending:
+        await add_audit_log(
+            db,
+            user_id=giveaway.user_id,
+            giveaway_id=giveaway_id,
+            action='participant_seen',
+            payload={
+                'platform': platform.value,
+                'platform_user_id': platform_user_id,
+                'created': (platform, platform_user_id) in new_keys,
+                'hot': True,
+            },
+        )
+    return len(pending)
+
+
+async def clear(redis: Redis, giveaway_id: int) -> None:
+    await redis.delete(*_roster_keys(giveaway_id), f'{_dirty_key(giveaway_id)}:flushing')
+
+
+async def deactivate(redis: Redis, giveaway_id: int) -> None:
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.srem(HOT_ROSTERS_KEY, giveaway_id)
+        pipe.delete(*_roster_keys(giveaway_id), f'{_dirty_key(giveaway_id)}:flushing')
+        await pipe.execute()
+
+
+async def flush_and_deactivate(redis: Redis, db: AsyncSession, giveaway_id: int) -> int:
+    if not await is_hot(redis, giveaway_id):
+        return 0
+    written = await flush(redis, db, giveaway_id)
+    await deactivate(redis, giveaway_id)
+    logger.info('hot_roster_deactivated giveaway=%s flushed=%s', giveaway_id, written)
+    return written
+
+
+async def hot_giveaway_ids(redis: Redis) -> list[int]:
+    return sorted(int(giveaway_id) for giveaway_id in await redis.smembers(HOT_ROSTERS_KEY))
+
+
+async def flush_loop(redis: Redis, session_factory: async_sessionmaker = AsyncSessionLocal) -> None:
+    while True:
+        await asyncio.sleep(settings.hot_roster_flush_seconds)
+        try:
+            for giveaway_id in await hot_giveaway_ids(redis):
+                async with session_factory() as db:
+                    written = await flush(redis, db, giveaway_id, wait=False)
+                if written:
+                    logger.debug('hot_roster_flushed giveaway=%s written=%s', giveaway_id, written)
+        except Exception as exc:
+            # Dirty members stay queued and go out on the next pass.
+            logger.warning('hot_roster_flush_failed error=%s', exc)
@@ -1,7 +1,10 @@
 ﻿from datetime import datetime, timedelta, timezone
+import json
 from urllib.parse import urlencode
 
 import httpx
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -64,9 +67,8 @@ async def save_oauth_account(
         )
     )
     account = result.scalar_one_or_none()
-    expires_at = (
-        datetime.now(timezone.utc) + timedelta(seconds=expires_in) if expires_in else None
-    )
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(seconds=expires_in) if expires_in else None
     if account is None:
         account = OAuthAccount(
             user_id=user_id,
@@ -76,6 +78,8 @@ async def save_oauth_account(
             provider_user_id=provider_user_id,
             expires_at=expires_at,
             scopes=scopes,
+            token_valid=True,
+            validated_at=now,
         )
         db.add(account)
     else:
@@ -85,6 +89,9 @@ async def save_oauth_account(
         account.provider_user_id = provider_user_id
         account.expires_at = expires_at
         account.scopes = scopes
+        account.token_valid = True
+        account.validated_at = now
+        account.refresh_revoked_at = None
     await db.flush()
     return account
 
@@ -102,7 +109,7 @@ async def get_oauth_account(db: AsyncSession, user_id: int, provider: OAuthProvi
 async def twitch_exchange_code(code: str) -> dict:
     async with httpx.AsyncClient(timeout=20) as client:
         response = await client.post(
-            'https://id.twitch.tv/oauth2/token',
+            settings.twitch_token_url,
             params={
                 'client_id': settings.twitch_client_id,
                 'client_secret': settings.twitch_client_secret,
@@ -136,7 +143,7 @@ async def twitch_exchange_code(code: str) -> dict:
 async def google_exchange_code(code: str) -> dict:
     async with httpx.AsyncClient(timeout=20) as client:
         response = await client.post(
-            'https://oauth2.googleapis.com/token',
+            settings.google_token_url,
             data={
                 'code': code,
                 'client_id': settings.google_client_id,
@@ -183,32 +190,136 @@ async def google_exchange_code(code: str) -> dict:
     }
 
 
-async def get_google_live_chat_id(access_token: str, video_id: str | None = None) -> tuple[str, str] | None:
-    async with httpx.AsyncClient(timeout=20) as client:
-        if video_id:
-            resp = await client.get(
-                'https://www.googleapis.com/youtube/v3/videos',
-                params={'part': 'liveStreamingDetails,snippet', 'id': video_id},
-                headers={'Authorization': f'Bearer {access_token}'},
-            )
-            if resp.status_code >= 400:
-                return None
-            items = resp.json().get('items', [])
-            if not items:
-                return None
-            live_chat_id = items[0].get('liveStreamingDetails', {}).get('activeLiveChatId')
-            title = items[0].get('snippet', {}).get('title', video_id)
-            if not live_chat_id:
-                return None
-            return live_chat_id, title
+async def _post_refresh(client: httpx.AsyncClient, url: str, data: dict) -> dict:
+    response = await client.post(url, data=data, headers={'Content-Type': 'application/x-www-form-urlencoded'})
+    if response.status_code in (400, 401):
+        raise OAuthServiceError('Refresh token revogado ou inválido. Reconecte a conta.')
+    response.raise_for_status()
+    return response.json()
+
+
+async def refresh_google_token(client: httpx.AsyncClient, refresh_token: str) -> dict:
+    token_data = await _post_refresh(
+        client,
+        settings.google_token_url,
+        {
+            'client_id': settings.google_client_id,
+            'client_secret': settings.google_client_secret,
+            'refresh_token': refresh_token,
+            'grant_type': 'refresh_token',
+        },
+    )
+    return {
+        'access_token': token_data['access_token'],
+        'refresh_token': token_data.get('refresh_token'),
+        'expires_in': token_data.get('expires_in'),
+        'scopes': token_data.get('scope', ''),
+    }
+
+
+async def refresh_twitch_token(client: httpx.AsyncClient, refresh_token: str) -> dict:
+    token_data = await _post_refresh(
+        client,
+        settings.twitch_token_url,
+        {
+            'client_id': settings.twitch_client_id,
+            'client_secret': settings.twitch_client_secret,
+            'refresh_token': refresh_token,
+            'grant_type': 'refresh_token',
+        },
+    )
+    scope = token_data.get('scope', [])
+    return {
+        'access_token': token_data['access_token'],
+        'refresh_token': token_data.get('refresh_token'),
+        'expires_in': token_data.get('expires_in'),
+        'scopes': ' '.join(scope) if isinstance(scope, list) else scope,
+    }
+
+
+class _LiveChatLookupFailed(Exception):
+    pass
+
+
+def _live_chat_cache_key(video_id: str | None, channel_id: str | None) -> str | None:
+    if video_id:
+        return f'youtube:live_chat:video:{video_id}'
+    if channel_id:
+        return f'youtube:live_chat:channel:{channel_id}'
+    return None
+
+
+async def read_live_chat_cache(
+    redis: Redis | None,
+    video_id: str | None = None,
+    channel_id: str | None = None,
+) -> tuple[bool, tuple[str, str] | None]:
+    key = _live_chat_cache_key(video_id, channel_id)
+    if redis is None or key is None:
+        return False, None
+    try:
+        raw = await redis.get(key)
+    except RedisError:
+        return False, None
+    if raw is None:
+        return False, None
+    # An empty value is a cached "no live right now".
+    return True, tuple(json.loads(raw)) if raw else None
+
 
+async def _write_live_chat_cache(
+    redis: Redis,
+    video_id: str | None,
+    channel_id: str | None,
+    discovered: tuple[str, str] | None,
+) -> None:
+    key = _live_chat_cache_key(video_id, channel_id)
+    if key is None:
+        return
+    try:
+        if discovered:
+            await redis.set(key, json.dumps(discovered), ex=settings.youtube_live_chat_cache_seconds)
+        else:
+            await redis.set(key, '', ex=settings.youtube_live_chat_negative_cache_seconds)
+    except RedisError:
+        return
+
+
+async def _fetch_video_live_chat(client: httpx.AsyncClient, access_token: str, video_id: str) -> tuple[str, str] | None:
+    resp = await client.get(
+        'https://www.googleapis.com/youtube/v3/videos',
+        params={'part': 'liveStreamingDetails,snippet', 'id': video_id},
+        headers={'Authorization': f'Bearer {access_token}'},
+    )
+    if resp.status_code >= 400:
+        raise _LiveChatLookupFailed()
+    items = resp.json().get('items', [])
+    if not items:
+        return None
+    live_chat_id = items[0].get('liveStreamingDetails', {}).get('activeLiveChatId')
+    title = items[0].get('snippet', {}).get('title', video_id)
+    if not live_chat_id:
+        return None
+    return live_chat_id, title
+
+
+async def _lookup_live_chat_id(
+    client: httpx.AsyncClient,
+    access_token: str,
+    video_id: str | None,
+    channel_id: str | None,
+) -> tuple[str, str] | None:
+    if video_id:
+        return await _fetch_video_live_chat(client, access_token, video_id)
+
+    if not channel_id:
         me_resp = await client.get(
             'https://www.googleapis.com/youtube/v3/channels',
             params={'part': 'id', 'mine': 'true'},
             headers={'Authorization': f'Bearer {access_token}'},
         )
         if me_resp.status_code >= 400:
-            return None
+            raise _LiveChatLookupFailed()
         me_items = me_resp.json().get('items', [])
         if not me_items:
             return None
@@ -216,52 +327,57 @@ async def get_google_live_chat_id(access_token: str, video_id: str | None = None
         if not channel_id:
             return None
 
-        search_resp = await client.get(
-            'https://www.googleapis.com/youtube/v3/search',
-            params={
-                'part': 'id,snippet',
-                'channelId': channel_id,
-                'eventType': 'live',
-                'type': 'video',
-                'maxResults': 1,
-            },
-            headers={'Authorization': f'Bearer {access_token}'},
-        )
-        if search_resp.status_code >= 400:
-            return None
-        items = search_resp.json().get('items', [])
-        if not items:
-            return None
-        vid = items[0]['id']['videoId']
+    search_resp = await client.get(
+        'https://www.googleapis.com/youtube/v3/search',
+        params={
+            'part': 'id,snippet',
+            'channelId': channel_id,
+            'eventType': 'live',
+            'type': 'video',
+            'maxResults': 1,
+        },
+        headers={'Authorization': f'Bearer {access_token}'},
+    )
+    if search_resp.status_code >= 400:
+        raise _LiveChatLookupFailed()
+    items = search_resp.json().get('items', [])
+    if not items:
+        return None
+    return await _fetch_video_live_chat(client, access_token, items[0]['id']['videoId'])
 
-        video_resp = await client.get(
-            'https://www.googleapis.com/youtube/v3/videos',
-            params={'part': 'liveStreamingDetails,snippet', 'id': vid},
-            headers={'Authorization': f'Bearer {access_token}'},
-        )
-        if video_resp.status_code >= 400:
-            return None
-        video_items = video_resp.json().get('items', [])
-        if not video_items:
-            return None
-        live_chat_id = video_items[0].get('liveStreamingDetails', {}).get('activeLiveChatId')
-        title = video_items[0].get('snippet', {}).get('title', vid)
-        if not live_chat_id:
-            return None
-        return live_chat_id, title
+
+async def get_google_live_chat_id(
+    access_token: str,
+    video_id: str | None = None,
+    channel_id: str | None = None,
+    redis: Redis | None = None,
+) -> tuple[str, str] | None:
+    # channel_id is the Google account's provider_user_id, which saves the
+    # channels?mine=true call; results (including "not live") are cached so
+    # repeated starts and worker probes do not re-run the 100-unit search.
+    hit, cached = await read_live_chat_cache(redis, video_id, channel_id)
+    if hit:
+        return cached
+    try:
+        async with httpx.AsyncClient(timeout=20) as client:
+            discovered = await _lookup_live_chat_id(client, access_token, video_id, channel_id)
+    except _LiveChatLookupFailed:
+        return None
+    if redis is not None:
+        await _write_live_chat_cache(redis, video_id, channel_id, discovered)
+    return discovered
 
 
 def decrypt_access_token(account: OAuthAccount) -> str:
     return decrypt_value(account.access_token_enc)
 
 
-async def validate_twitch_access_token(access_token: str) -> bool | None:
+async def validate_twitch_access_token(client: httpx.AsyncClient, access_token: str) -> bool | None:
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            response = await client.get(
-                'https://id.twitch.tv/oauth2/validate',
-                headers={'Authorization': f'OAuth {access_token}'},
-            )
+        response = await client.get(
+            'https://id.twitch.tv/oauth2/validate',
+            headers={'Authorization': f'OAuth {access_token}'},
+        )
         if response.status_code == 200:
             return True
         if response.status_code in (400, 401):
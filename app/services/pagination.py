@@ -0,0 +1,88 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import Row, Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(ts: datetime, row_id: int) -> str:
+    raw = json.dumps([ts.isoformat(), row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        ts, row_id = json.loads(raw)
+        return datetime.fromisoformat(ts), int(row_id)
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Cursor inválido') from exc
+
+
+def encode_poll_cursor(row_id: int) -> str:
+    raw = json.dumps([row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_poll_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        (row_id,) = json.loads(raw)
+        return int(row_id)
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Cursor inválido') from exc
+
+
+async def fetch_keyset_page(
+    db: AsyncSession,
+    stmt: Select,
+    ts_column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    since: str | None = None,
+) -> dict:
+    # Pages walk newest -> oldest on (ts, id); `since` walks forward from a
+    # previous poll so clients only receive entries newer than what they hold.
+    # Polls follow the id alone: timestamps are taken before the row commits,
+    # so a (ts, id) cursor could step past a row that commits late.
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    key = tuple_(ts_column, id_column)
+
+    def row_cursor(row: Row) -> str:
+        return encode_cursor(row._mapping[ts_column], row._mapping[id_column])
+
+    def poll_cursor(rows: list[Row]) -> str:
+        return encode_poll_cursor(max(row._mapping[id_column] for row in rows))
+
+    if since:
+        rows = (
+            await db.execute(
+                stmt.where(id_column > decode_poll_cursor(since)).order_by(id_column.asc()).limit(limit)
+            )
+        ).all()
+        return {
+            'rows': rows,
+            'next_cursor': None,
+            'poll_cursor': poll_cursor(rows) if rows else since,
+        }
+
+    if cursor:
+        stmt = stmt.where(key < tuple_(*decode_cursor(cursor)))
+    rows = (
+        await db.execute(stmt.order_by(ts_column.desc(), id_column.desc()).limit(limit + 1))
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'rows': rows,
+        'next_cursor': row_cursor(rows[-1]) if has_more else None,
+        'poll_cursor': poll_cursor(rows) if rows and not cursor else None,
+    }
@@ -1,32 +1,61 @@
 ﻿import json
+import time
 from datetime import datetime
 
 from redis.asyncio import Redis
-from sqlalchemy import func, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import get_settings
 from app.models import Giveaway, Participant, Winner
+from app.services import hot_roster
+from app.services.recent_entrants import latest_entrants
+from app.services.roster_sample import sample_roster
 
 EVENT_CHANNEL = 'giveaway:events'
 CONTROL_CHANNEL = 'giveaway:control'
 
+settings = get_settings()
 
-async def build_giveaway_state(db: AsyncSession, giveaway_id: int) -> dict:
-    giveaway_result = await db.execute(select(Giveaway).where(Giveaway.id == giveaway_id))
-    giveaway = giveaway_result.scalar_one_or_none()
-    if not giveaway:
-        return {}
 
-    participants_count = await db.scalar(
-        select(func.count(Participant.id)).where(Participant.giveaway_id == giveaway_id)
-    )
-    participants_result = await db.execute(
-        select(Participant.display_name)
-        .where(Participant.giveaway_id == giveaway_id)
-        .order_by(Participant.first_seen.asc())
-    )
-    participant_names = [row[0] for row in participants_result.all()]
-    latest_participant = (
+# Winners whose draw animation is still running, scored by when the hold
+# lapses on its own; back-to-back draws each hold (and release) their own.
+PENDING_REVEAL_GC_MS = 60_000
+
+
+def _pending_reveal_key(giveaway_id: int) -> str:
+    return f'giveaway:{giveaway_id}:pending_reveals'
+
+
+async def hold_winner_reveal(redis: Redis, giveaway_id: int, winner_id: int, duration_ms: int) -> None:
+    now_ms = int(time.time() * 1000)
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.zremrangebyscore(_pending_reveal_key(giveaway_id), '-inf', now_ms)
+        pipe.zadd(_pending_reveal_key(giveaway_id), {str(winner_id): now_ms + duration_ms + 2000})
+        pipe.pexpire(_pending_reveal_key(giveaway_id), PENDING_REVEAL_GC_MS)
+        await pipe.execute()
+
+
+async def release_winner_reveal(redis: Redis, giveaway_id: int, winner_id: int) -> None:
+    await redis.zrem(_pending_reveal_key(giveaway_id), str(winner_id))
+
+
+async def pending_reveal_ids(redis: Redis, giveaway_id: int) -> list[int]:
+    held = await redis.zrangebyscore(_pending_reveal_key(giveaway_id), int(time.time() * 1000), '+inf')
+    return [int(winner_id) for winner_id in held]
+
+
+async def pending_reveal_ids_for(redis: Redis, giveaway_ids: list[int]) -> list[int]:
+    now_ms = int(time.time() * 1000)
+    async with redis.pipeline(transaction=False) as pipe:
+        for giveaway_id in giveaway_ids:
+            pipe.zrangebyscore(_pending_reveal_key(giveaway_id), now_ms, '+inf')
+        held = await pipe.execute()
+    return [int(winner_id) for winner_ids in held for winner_id in winner_ids]
+
+
+async def latest_participant_name(db: AsyncSession, giveaway_id: int) -> str | None:
+    return (
         await db.execute(
             select(Participant.display_name)
             .where(Participant.giveaway_id == giveaway_id)
@@ -35,9 +64,34 @@ async def build_giveaway_state(db: AsyncSession, giveaway_id: int) -> dict:
         )
     ).scalar_one_or_none()
 
-    winner_result = await db.execute(
-        select(Winner).where(Winner.giveaway_id == giveaway_id).order_by(Winner.drawn_at.desc()).limit(1)
+
+async def build_giveaway_state(db: AsyncSession, giveaway_id: int, redis: Redis | None = None) -> dict:
+    giveaway_result = await db.execute(select(Giveaway).where(Giveaway.id == giveaway_id))
+    giveaway = giveaway_result.scalar_one_or_none()
+    if not giveaway:
+        return {}
+
+    recent_entrants = (
+        await latest_entrants(redis, giveaway_id, settings.recent_entrants_ticker_size) if redis is not None else []
     )
+    # Every subscriber gets this payload on every entry, so it carries a
+    # bounded sample of names (the same one /roster-sample serves), never the
+    # whole roster.
+    sample = await sample_roster(db, redis, giveaway_id, mode='stratified')
+    participants_count, participant_names = sample['total'], sample['names']
+    if recent_entrants:
+        latest_participant = recent_entrants[0]['display_name']
+    elif redis is not None and await hot_roster.is_hot(redis, giveaway_id):
+        latest_participant = await hot_roster.latest_name(redis, giveaway_id)
+    else:
+        latest_participant = await latest_participant_name(db, giveaway_id)
+
+    winner_query = select(Winner).where(Winner.giveaway_id == giveaway_id)
+    if redis is not None:
+        hidden_winner_ids = await pending_reveal_ids(redis, giveaway_id)
+        if hidden_winner_ids:
+            winner_query = winner_query.where(Winner.id.notin_(hidden_winner_ids))
+    winner_result = await db.execute(winner_query.order_by(Winner.drawn_at.desc()).limit(1))
     last_winner = winner_result.scalar_one_or_none()
 
     return {
@@ -48,6 +102,7 @@ async def build_giveaway_state(db: AsyncSession, giveaway_id: int) -> dict:
         'participants_count': int(participants_count or 0),
         'participant_names': participant_names,
         'latest_participant': latest_participant,
+        'recent_entrants': [entrant['display_name'] for entrant in recent_entrants],
         'ticker_message': giveaway.ticker_message,
         'last_winner': (
             {
@@ -63,7 +118,7 @@ async def build_giveaway_state(db: AsyncSession, giveaway_id: int) -> dict:
 
 
 async def publish_state(redis: Redis, state: dict) -> None:
-    await redis.publish(EVENT_CHANNEL, json.dumps({'type': 'state', 'state': state}))
+    await redis.publish(EVENT_CHANNEL, json.dumps({'type': 'state', 'state': state, 'published_at': time.time()}))
 
 
 async def publish_draw_started(redis: Redis, giveaway_id: int, winner_name: str, duration_ms: int) -> None:
@@ -75,6 +130,7 @@ async def publish_draw_started(redis: Redis, giveaway_id: int, winner_name: str,
                 'giveaway_id': giveaway_id,
                 'winner_name': winner_name,
                 'duration_ms': duration_ms,
+                'published_at': time.time(),
             }
         ),
     )
@@ -85,3 +141,10 @@ async def publish_control(redis: Redis, action: str, giveaway_id: int, user_id:
         CONTROL_CHANNEL,
         json.dumps({'type': action, 'giveaway_id': giveaway_id, 'user_id': user_id}),
     )
+
+
+async def publish_oauth_event(redis: Redis, action: str, user_id: int, provider: str) -> None:
+    await redis.publish(
+        CONTROL_CHANNEL,
+        json.dumps({'type': action, 'user_id': user_id, 'provider': provider}),
+    )
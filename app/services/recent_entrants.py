@@ -0,0 +1,56 @@
+import json
+import time
+
+from redis.asyncio import Redis
+
+from app.core.config import get_settings
+from app.models import Platform
+
+settings = get_settings()
+
+
+def recent_entrants_key(giveaway_id: int) -> str:
+    return f'giveaway:{giveaway_id}:recent_entrants'
+
+
+async def record_entrant(
+    redis: Redis,
+    giveaway_id: int,
+    platform: Platform,
+    platform_user_id: str,
+    display_name: str,
+) -> None:
+    await record_entrants(redis, giveaway_id, [{'p': platform.value, 'u': platform_user_id, 'n': display_name}])
+
+
+async def record_entrants(redis: Redis, giveaway_id: int, entries: list[dict]) -> None:
+    """Push accepted entries ({'p', 'u', 'n'}, as queued or spooled) onto the ring."""
+    if not entries:
+        return
+    # Newest first, capped, so readers never need to touch `participants`.
+    key = recent_entrants_key(giveaway_id)
+    now_ms = int(time.time() * 1000)
+    async with redis.pipeline(transaction=True) as pipe:
+        for entry in entries:
+            pipe.lpush(key, json.dumps({'p': entry['p'], 'u': entry['u'], 'n': entry['n'], 't': now_ms}))
+        pipe.ltrim(key, 0, settings.recent_entrants_size - 1)
+        await pipe.execute()
+
+
+async def latest_entrants(redis: Redis, giveaway_id: int, count: int) -> list[dict]:
+    """Most recent distinct entrants, newest first."""
+    entrants = []
+    seen = set()
+    for raw in await redis.lrange(recent_entrants_key(giveaway_id), 0, -1):
+        entry = json.loads(raw)
+        if (entry['p'], entry['u']) in seen:
+            continue
+        seen.add((entry['p'], entry['u']))
+        entrants.append({'display_name': entry['n'], 'platform': entry['p'], 'ts': entry['t']})
+        if len(entrants) >= count:
+            break
+    return entrants
+
+
+async def clear_entrants(redis: Redis, giveaway_id: int) -> None:
+    await redis.delete(recent_entrants_key(giveaway_id))
@@ -0,0 +1,80 @@
+import json
+
+from redis.asyncio import Redis
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models import Participant
+from app.services import hot_roster
+from app.services.giveaway_version import get_giveaway_version
+
+settings = get_settings()
+
+SAMPLE_MODES = ('random', 'stratified')
+
+
+def _sample_key(giveaway_id: int, version: int, mode: str, size: int) -> str:
+    return f'giveaway:{giveaway_id}:roster_sample:{mode}:{size}:v{version}'
+
+
+async def _sample_from_db(db: AsyncSession, giveaway_id: int, size: int, stratified: bool) -> tuple[int, list[str]]:
+    total = int(
+        await db.scalar(select(func.count(Participant.id)).where(Participant.giveaway_id == giveaway_id)) or 0
+    )
+    if total <= size:
+        stmt = (
+            select(Participant.display_name)
+            .where(Participant.giveaway_id == giveaway_id)
+            .order_by(Participant.first_seen.asc(), Participant.id.asc())
+        )
+    elif stratified:
+        # The first entrant of each of `size` equal slices of the join order,
+        # so early and late entrants are both on the wheel.
+        position = func.row_number().over(order_by=(Participant.first_seen, Participant.id)).label('position')
+        ranked = select(Participant.display_name, position).where(Participant.giveaway_id == giveaway_id).subquery()
+        positions = [slot * total // size + 1 for slot in range(size)]
+        stmt = select(ranked.c.display_name).where(ranked.c.position.in_(positions)).order_by(ranked.c.position)
+    else:
+        stmt = (
+            select(Participant.display_name)
+            .where(Participant.giveaway_id == giveaway_id)
+            .order_by(func.random())
+            .limit(size)
+        )
+    return total, list((await db.execute(stmt)).scalars())
+
+
+def normalize_sample_request(size: int | None, mode: str) -> tuple[int, str]:
+    size = max(1, min(size or settings.roster_sample_default_size, settings.roster_sample_max_size))
+    return size, mode if mode in SAMPLE_MODES else 'random'
+
+
+async def sample_roster(
+    db: AsyncSession,
+    redis: Redis | None,
+    giveaway_id: int,
+    size: int | None = None,
+    mode: str = 'random',
+) -> dict:
+    """Bounded sample of display names plus the total, cached per giveaway version."""
+    size, mode = normalize_sample_request(size, mode)
+    stratified = mode == 'stratified'
+    if redis is None:
+        total, names = await _sample_from_db(db, giveaway_id, size, stratified)
+        return {'total': total, 'names': names, 'mode': mode, 'version': None}
+
+    version = await get_giveaway_version(redis, giveaway_id)
+    key = _sample_key(giveaway_id, version, mode, size)
+    cached = await redis.get(key)
+    if cached:
+        return json.loads(cached)
+
+    if await hot_roster.is_hot(redis, giveaway_id):
+        total, names = await hot_roster.sample(redis, giveaway_id, size, stratified)
+    else:
+        total, names = await _sample_from_db(db, giveaway_id, size, stratified)
+    sample = {'total': total, 'names': names, 'mode': mode, 'version': version}
+    # Every entry bumps the version, so old samples simply age out.
+    await redis.set(key, json.dumps(sample), ex=settings.roster_sample_cache_seconds)
+    return sample
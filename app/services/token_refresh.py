@@ -0,0 +1,154 @@
+import asyncio
+import heapq
+import logging
+import time
+from contextlib import suppress
+from datetime import datetime, timezone
+
+import httpx
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import get_settings
+from app.core.security import decrypt_value
+from app.db.session import AsyncSessionLocal
+from app.models import OAuthAccount, OAuthProvider
+from app.services.oauth_service import (
+    OAuthServiceError,
+    refresh_google_token,
+    refresh_twitch_token,
+    save_oauth_account,
+)
+from app.services.realtime import publish_oauth_event
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+REFRESH_RETRY_SECONDS = 60
+REFRESHERS = {
+    OAuthProvider.GOOGLE: refresh_google_token,
+    OAuthProvider.TWITCH: refresh_twitch_token,
+}
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class TokenRefreshScheduler:
+    def __init__(
+        self,
+        redis: Redis | None,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        client: httpx.AsyncClient | None = None,
+    ):
+        self.redis = redis
+        self.session_factory = session_factory
+        self.client = client
+        self._heap: list[tuple[float, int]] = []
+        self._wakeup = asyncio.Event()
+        self._reload_requested = True
+
+    def request_reload(self) -> None:
+        self._reload_requested = True
+        self._wakeup.set()
+
+    def _refresh_due(self, expires_at: datetime) -> float:
+        return _as_utc(expires_at).timestamp() - settings.oauth_refresh_lead_seconds
+
+    async def reload(self) -> None:
+        async with self.session_factory() as db:
+            rows = (
+                await db.execute(
+                    select(OAuthAccount.id, OAuthAccount.expires_at).where(
+                        OAuthAccount.refresh_token_enc.is_not(None),
+                        OAuthAccount.expires_at.is_not(None),
+                        # A rejected refresh token waits for the user to
+                        # reconnect, which clears refresh_revoked_at. A merely
+                        # invalid access token is exactly what a refresh fixes.
+                        OAuthAccount.refresh_revoked_at.is_(None),
+                    )
+                )
+            ).all()
+        self._heap = [(self._refresh_due(row.expires_at), row.id) for row in rows]
+        heapq.heapify(self._heap)
+        self._reload_requested = False
+
+    async def run(self) -> None:
+        owns_client = self.client is None
+        if owns_client:
+            self.client = httpx.AsyncClient(timeout=20)
+        next_reload = 0.0
+        try:
+            while True:
+                if self._reload_requested or time.time() >= next_reload:
+                    await self.reload()
+                    next_reload = time.time() + settings.oauth_refresh_reload_seconds
+                now = time.time()
+                while self._heap and self._heap[0][0] <= now:
+                    _, account_id = heapq.heappop(self._heap)
+                    await self.refresh_account(account_id)
+                wait = next_reload - time.time()
+                if self._heap:
+                    wait = min(wait, self._heap[0][0] - time.time())
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(wait, 0.05))
+                self._wakeup.clear()
+        finally:
+            if owns_client:
+                await self.client.aclose()
+                self.client = None
+
+    async def _acquire(self, account_id: int) -> bool:
+        if self.redis is None:
+            return True
+        return bool(await self.redis.set(f'oauth:refresh_lock:{account_id}', '1', nx=True, ex=REFRESH_RETRY_SECONDS))
+
+    async def refresh_account(self, account_id: int) -> bool:
+        if not await self._acquire(account_id):
+            return False
+        async with self.session_factory() as db:
+            account = await db.get(OAuthAccount, account_id)
+            if account is None or not account.refresh_token_enc or account.expires_at is None:
+                return False
+            if account.refresh_revoked_at is not None:
+                return False
+            due = self._refresh_due(account.expires_at)
+            if due > time.time():
+                # Someone refreshed or reconnected since the heap was built.
+                heapq.heappush(self._heap, (due, account_id))
+                return False
+
+            try:
+                data = await REFRESHERS[account.provider](self.client, decrypt_value(account.refresh_token_enc))
+            except OAuthServiceError:
+                logger.warning('oauth_refresh_revoked account=%s provider=%s', account_id, account.provider.value)
+                account.token_valid = False
+                account.refresh_revoked_at = datetime.now(timezone.utc)
+                await db.commit()
+                return False
+            except (httpx.HTTPError, KeyError, ValueError) as exc:
+                logger.warning('oauth_refresh_failed account=%s error=%s', account_id, exc)
+                heapq.heappush(self._heap, (time.time() + REFRESH_RETRY_SECONDS, account_id))
+                return False
+
+            account = await save_oauth_account(
+                db,
+                user_id=account.user_id,
+                provider=account.provider,
+                access_token=data['access_token'],
+                refresh_token=data.get('refresh_token'),
+                provider_user_id=account.provider_user_id,
+                expires_in=data.get('expires_in'),
+                scopes=data.get('scopes') or account.scopes,
+            )
+            await db.commit()
+            user_id, provider, expires_at = account.user_id, account.provider, account.expires_at
+
+        if expires_at is not None:
+            heapq.heappush(self._heap, (self._refresh_due(expires_at), account_id))
+        if self.redis is not None:
+            await publish_oauth_event(self.redis, 'token_refreshed', user_id, provider.value)
+        logger.info('oauth_token_refreshed account=%s provider=%s', account_id, provider.value)
+        return True
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from cryptography.fernet import InvalidToken
+from sqlalchemy import or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.models import OAuthAccount, OAuthProvider
+from app.services.oauth_service import decrypt_access_token, validate_twitch_access_token
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+VALIDATION_BATCH_SIZE = 100
+
+
+async def revalidate_twitch_tokens(
+    max_age_seconds: int,
+    session_factory: async_sessionmaker = AsyncSessionLocal,
+    client: httpx.AsyncClient | None = None,
+) -> dict[str, int]:
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=max_age_seconds)
+    async with session_factory() as db:
+        accounts = (
+            await db.execute(
+                select(OAuthAccount)
+                .where(
+                    OAuthAccount.provider == OAuthProvider.TWITCH,
+                    or_(OAuthAccount.validated_at.is_(None), OAuthAccount.validated_at < cutoff),
+                )
+                .order_by(OAuthAccount.validated_at.asc().nulls_first())
+                .limit(VALIDATION_BATCH_SIZE)
+            )
+        ).scalars().all()
+
+    # No connection is held while Twitch answers; verdicts are written in one
+    # short session at the end, and only to rows still holding the token that
+    # was checked, so a refresh or reconnect meanwhile is never overwritten.
+    checked_tokens = {account.id: account.access_token_enc for account in accounts}
+    verdicts: dict[int, bool] = {}
+    expired: list[int] = []
+    counts = {'checked': 0, 'invalid': 0, 'unknown': 0, 'expired': 0}
+    owns_client = client is None
+    client = client or httpx.AsyncClient(timeout=10)
+    try:
+        for account in accounts:
+            try:
+                access_token = decrypt_access_token(account)
+            except InvalidToken:
+                # Unreadable with the current keyring: nothing can use this token,
+                # so mark it invalid instead of retrying it first every cycle.
+                logger.warning('twitch_token_undecryptable account=%s', account.id)
+                verdicts[account.id] = False
+                continue
+            is_valid = await validate_twitch_access_token(client, access_token)
+            if is_valid is None:
+                # Twitch unreachable: keep the previous verdict and retry next round.
+                counts['unknown'] += 1
+                continue
+            if not is_valid and account.refresh_token_enc and account.refresh_revoked_at is None:
+                # A 401 is usually just an expired access token: hand it to the
+                # refresher, which marks the account invalid only if the
+                # refresh token itself is rejected.
+                expired.append(account.id)
+                continue
+            verdicts[account.id] = is_valid
+    finally:
+        if owns_client:
+            await client.aclose()
+
+    counts['checked'] = len(verdicts) + len(expired)
+    counts['invalid'] = sum(not is_valid for is_valid in verdicts.values())
+    counts['expired'] = len(expired)
+    if verdicts or expired:
+        async with session_factory() as db:
+            for is_valid in (True, False):
+                account_ids = [account_id for account_id, verdict in verdicts.items() if verdict is is_valid]
+                if account_ids:
+                    await db.execute(
+                        update(OAuthAccount)
+                        .where(_still_checked(checked_tokens, account_ids))
+                        .values(token_valid=is_valid, validated_at=now)
+                    )
+            if expired:
+                await db.execute(
+                    update(OAuthAccount)
+                    .where(_still_checked(checked_tokens, expired))
+                    .values(expires_at=now, validated_at=now)
+                )
+            await db.commit()
+    return counts
+
+
+def _still_checked(checked_tokens: dict[int, str], account_ids: list[int]):
+    return tuple_(OAuthAccount.id, OAuthAccount.access_token_enc).in_(
+        [(account_id, checked_tokens[account_id]) for account_id in account_ids]
+    )
+
+
+async def twitch_validation_loop(on_expired: Callable[[], None] | None = None) -> None:
+    # `on_expired` wakes the refresher so tokens found expired are refreshed
+    # now rather than at its next periodic reload.
+    while True:
+        try:
+            counts = await revalidate_twitch_tokens(settings.twitch_validation_interval_seconds)
+            if counts['checked'] or counts['unknown']:
+                logger.info(
+                    'twitch_tokens_validated checked=%s invalid=%s expired=%s unknown=%s',
+                    counts['checked'],
+                    counts['invalid'],
+                    counts['expired'],
+                    counts['unknown'],
+                )
+            if counts['expired'] and on_expired is not None:
+                on_expired()
+            if counts['checked'] >= VALIDATION_BATCH_SIZE:
+                continue
+        except Exception:
+            logger.exception('twitch_token_validation_failed')
+        await asyncio.sleep(settings.twitch_validation_poll_seconds)
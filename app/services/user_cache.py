@@ -0,0 +1,93 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import get_settings
+from app.models import User
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass(frozen=True, slots=True)
+class SessionUser:
+    id: int
+    email: str
+
+
+_local_users: OrderedDict[int, tuple[float, SessionUser]] = OrderedDict()
+
+
+def _redis_key(user_id: int) -> str:
+    return f'user:{user_id}:session'
+
+
+def _remember_local(user: SessionUser) -> None:
+    _local_users[user.id] = (time.monotonic() + settings.user_cache_ttl_seconds, user)
+    _local_users.move_to_end(user.id)
+    while len(_local_users) > settings.user_cache_max_entries:
+        _local_users.popitem(last=False)
+
+
+async def get_session_user(
+    session_factory: async_sessionmaker,
+    user_id: int,
+    redis: Redis | None = None,
+) -> SessionUser | None:
+    """Resolve the logged-in user from memory, then Redis, then the database.
+
+    Only a miss on both caches opens a session, and it is closed before
+    returning, so the lookup never holds a pooled connection alongside the
+    one the endpoint itself uses.
+    """
+    cached = _local_users.get(user_id)
+    if cached and cached[0] > time.monotonic():
+        _local_users.move_to_end(user_id)
+        return cached[1]
+
+    if redis is not None:
+        try:
+            raw = await redis.get(_redis_key(user_id))
+        except RedisError:
+            logger.warning('user_cache_redis_unavailable user=%s', user_id)
+            raw = None
+        if raw:
+            # Build from named fields so entries cached by older releases
+            # (which carried extra keys) still load.
+            data = json.loads(raw)
+            user = SessionUser(id=data['id'], email=data['email'])
+            _remember_local(user)
+            return user
+
+    async with session_factory() as db:
+        row = (
+            await db.execute(select(User.id, User.email).where(User.id == user_id))
+        ).one_or_none()
+    if row is None:
+        _local_users.pop(user_id, None)
+        return None
+
+    user = SessionUser(id=row.id, email=row.email)
+    _remember_local(user)
+    if redis is not None:
+        try:
+            await redis.set(_redis_key(user_id), json.dumps(asdict(user)), ex=settings.user_cache_redis_ttl_seconds)
+        except RedisError:
+            logger.warning('user_cache_redis_unavailable user=%s', user_id)
+    return user
+
+
+async def invalidate_session_user(user_id: int, redis: Redis | None = None) -> None:
+    _local_users.pop(user_id, None)
+    if redis is not None:
+        try:
+            await redis.delete(_redis_key(user_id))
+        except RedisError:
+            logger.warning('user_cache_redis_unavailable user=%s', user_id)
@@ -110,6 +110,36 @@
     });
   };
 
+  // The preview track shows the same bounded roster sample as the overlays,
+  // refetched (debounced) whenever the participant count moves.
+  const overlayToken = window.ROULETTE_OVERLAY_TOKEN;
+  let rouletteSampleCount = null;
+  let rouletteSampleTimer = null;
+
+  const loadRouletteSample = async () => {
+    if (!overlayToken) return;
+    try {
+      const resp = await fetch(
+        `/overlay/${giveawayId}/roster-sample?token=${encodeURIComponent(overlayToken)}&size=80`,
+        { credentials: 'same-origin' }
+      );
+      if (!resp.ok) return;
+      const sample = await resp.json();
+      const names = Array.isArray(sample.names) ? sample.names.map((n) => String(n || '')).filter(Boolean) : [];
+      if (roulettePhase !== 'resolving' && names.join('|') !== rouletteNamesKey) {
+        renderRouletteTrack(names);
+      }
+    } catch (_) {
+    }
+  };
+
+  const scheduleRouletteSample = (participantsCount) => {
+    if (participantsCount === rouletteSampleCount) return;
+    rouletteSampleCount = participantsCount;
+    clearTimeout(rouletteSampleTimer);
+    rouletteSampleTimer = setTimeout(loadRouletteSample, 400);
+  };
+
   const startRouletteSpin = () => {
     if (!rouletteTrack) return;
     if (roulettePhase === 'resolving') return;
@@ -272,24 +302,15 @@
     setStatus(Boolean(data.is_open));
     if (command) command.textContent = data.command || '!participar';
 
-    if (currentCount > lastCount && ticker) {
-      try {
-        const resp = await fetch(`/giveaways/${giveawayId}/participants/latest`, { credentials: 'same-origin' });
-        if (resp.ok) {
-          const latest = await resp.json();
-          if (latest.display_name) {
-            ticker.textContent = `Novo participante no sorteio: ${latest.display_name}`;
-            if (tickerResetTimer) {
-              clearTimeout(tickerResetTimer);
-            }
-            tickerResetTimer = setTimeout(() => {
-              ticker.textContent = tickerDefault;
-            }, 4500);
-          }
-        }
-      } catch {
-        ticker.textContent = 'Participantes atualizados em tempo real.';
+    if (currentCount > lastCount && ticker && data.latest_participant) {
+      // State carries the newest entrant from the Redis ring; no extra request.
+      ticker.textContent = `Novo participante no sorteio: ${data.latest_participant}`;
+      if (tickerResetTimer) {
+        clearTimeout(tickerResetTimer);
       }
+      tickerResetTimer = setTimeout(() => {
+        ticker.textContent = tickerDefault;
+      }, 4500);
     }
 
     if (data.last_winner) {
@@ -305,10 +326,8 @@
       }
     }
 
-    const names = Array.isArray(data.participant_names) ? data.participant_names : [];
-    const namesKey = names.join('|');
-    if (rouletteTrack && namesKey !== rouletteNamesKey) {
-      renderRouletteTrack(names);
+    if (rouletteTrack) {
+      scheduleRouletteSample(currentCount);
     }
 
     lastCount = currentCount;
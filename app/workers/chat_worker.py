@@ -1,39 +1,92 @@
 import asyncio
 import json
 import logging
+import os
+import socket
+import time
 from contextlib import suppress
 
 import httpx
 import websockets
 from redis.asyncio import Redis
 from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
 
 from app.core.config import get_settings
 from app.db.redis_client import redis_client
 from app.db.session import AsyncSessionLocal
 from app.models import Giveaway, OAuthProvider, Platform
+from app.services import hot_roster
 from app.services.audit import add_audit_log
+from app.services.entry_stream import append_entry
 from app.services.giveaway_service import add_or_refresh_participant, normalize_command
-from app.services.oauth_service import decrypt_access_token, get_google_live_chat_id, get_oauth_account
+from app.services.giveaway_version import bump_giveaway_version
+from app.services.oauth_service import (
+    decrypt_access_token,
+    get_google_live_chat_id,
+    get_oauth_account,
+    read_live_chat_cache,
+)
 from app.services.realtime import build_giveaway_state, publish_state
+from app.services.recent_entrants import record_entrant
+from app.services.token_refresh import TokenRefreshScheduler
+from app.services.token_validation import twitch_validation_loop
+from app.workers.entry_spool import EntrySpool, spool_maintenance_loop
+from app.workers.flood_guard import FloodGuard, SeenMessages
+from app.workers.youtube_scheduler import DISCOVERY_COST_UNITS, YouTubePollScheduler
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
+class TwitchAuthError(Exception):
+    pass
+
+
+class YouTubeStreamUnavailable(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f'stream status {status_code}')
+        self.status_code = status_code
+
+
+def chat_dropped_key(giveaway_id: int) -> str:
+    return f'giveaway:{giveaway_id}:chat_dropped'
+
+
+def youtube_checkpoint_key(giveaway_id: int) -> str:
+    return f'giveaway:{giveaway_id}:youtube_checkpoint'
+
+
 class GiveawayRunner:
-    def __init__(self, giveaway_id: int):
+    def __init__(
+        self,
+        giveaway_id: int,
+        youtube_scheduler: YouTubePollScheduler | None = None,
+        spool: EntrySpool | None = None,
+    ):
         self.giveaway_id = giveaway_id
+        self.youtube_scheduler = youtube_scheduler or YouTubePollScheduler(redis_client)
+        self.spool = spool or EntrySpool()
+        self.user_id: int | None = None
         self.tasks: list[asyncio.Task] = []
         self.stop_event = asyncio.Event()
+        self.wakeups = {Platform.TWITCH: asyncio.Event(), Platform.YOUTUBE: asyncio.Event()}
+        self.flood_guard = FloodGuard()
+        self.seen_messages = SeenMessages()
+        self.youtube_page_token: str | None = None
+        self.youtube_stream_retry_at = 0.0
+        self.state_changed = asyncio.Event()
 
     async def start(self) -> None:
         if self.tasks:
             return
         self.stop_event.clear()
+        self.youtube_scheduler.register(self.giveaway_id)
         self.tasks = [
             asyncio.create_task(self._run_twitch(), name=f'twitch-{self.giveaway_id}'),
             asyncio.create_task(self._run_youtube(), name=f'youtube-{self.giveaway_id}'),
+            asyncio.create_task(self._report_drops(), name=f'drops-{self.giveaway_id}'),
+            asyncio.create_task(self._publish_states(), name=f'state-{self.giveaway_id}'),
         ]
         logger.info('Runner started for giveaway=%s', self.giveaway_id)
 
@@ -47,15 +100,61 @@ class GiveawayRunner:
             with suppress(asyncio.CancelledError):
                 await task
         self.tasks = []
+        self.youtube_scheduler.unregister(self.giveaway_id)
+        await self._flush_drops()
         logger.info('Runner stopped for giveaway=%s', self.giveaway_id)
 
+    async def _report_drops(self) -> None:
+        while not self.stop_event.is_set():
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.stop_event.wait(), timeout=settings.chat_drop_report_seconds)
+            await self._flush_drops()
+
+    async def _flush_drops(self) -> None:
+        dropped = self.flood_guard.take_dropped()
+        if not any(dropped.values()):
+            return
+        logger.info(
+            'chat_flood_dropped giveaway=%s user=%s channel=%s',
+            self.giveaway_id,
+            dropped['user'],
+            dropped['channel'],
+        )
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for reason, count in dropped.items():
+                    if count:
+                        pipe.hincrby(chat_dropped_key(self.giveaway_id), reason, count)
+                await pipe.execute()
+        except Exception as exc:
+            logger.warning('chat_flood_report_failed giveaway=%s error=%s', self.giveaway_id, exc)
+
+    async def _publish_states(self) -> None:
+        # Hot-roster entries only mark the state as changed; this coalesces a
+        # burst into one version bump and one snapshot per interval instead of
+        # a DB session per chat message.
+        while not self.stop_event.is_set():
+            await self.state_changed.wait()
+            self.state_changed.clear()
+            try:
+                await bump_giveaway_version(redis_client, self.giveaway_id)
+                async with AsyncSessionLocal() as db:
+                    state = await build_giveaway_state(db, self.giveaway_id, redis=redis_client)
+                await publish_state(redis_client, state)
+            except Exception as exc:
+                logger.warning('state_publish_failed giveaway=%s error=%s', self.giveaway_id, exc)
+            await asyncio.sleep(settings.hot_roster_publish_seconds)
+
     async def _get_runtime_data(self) -> dict | None:
         async with AsyncSessionLocal() as db:
             giveaway_result = await db.execute(select(Giveaway).where(Giveaway.id == self.giveaway_id))
             giveaway = giveaway_result.scalar_one_or_none()
             if not giveaway:
                 return None
+            self.user_id = giveaway.user_id
             twitch = await get_oauth_account(db, giveaway.user_id, OAuthProvider.TWITCH)
+            if twitch and twitch.token_valid is False:
+                twitch = None
             google = await get_oauth_account(db, giveaway.user_id, OAuthProvider.GOOGLE)
             return {'giveaway': giveaway, 'twitch': twitch, 'google': google}
 
@@ -65,18 +164,22 @@ class GiveawayRunner:
             try:
                 data = await self._get_runtime_data()
                 if not data or not data['twitch']:
-                    await asyncio.sleep(5)
+                    await self._park(Platform.TWITCH)
                     continue
                 giveaway = data['giveaway']
                 token = decrypt_access_token(data['twitch'])
                 channel_login = await self._fetch_twitch_login(token)
                 if not channel_login:
-                    await asyncio.sleep(10)
+                    await self._park(Platform.TWITCH, timeout=backoff)
+                    backoff = min(backoff * 2, 60)
                     continue
 
                 cmd = normalize_command(giveaway.command)
                 await self._consume_twitch_ws(token, channel_login, cmd)
                 backoff = 1
+            except TwitchAuthError:
+                logger.warning('Twitch login rejected giveaway=%s; waiting for new credentials', self.giveaway_id)
+                await self._park(Platform.TWITCH)
             except Exception as exc:
                 logger.warning('Twitch runner error giveaway=%s error=%s', self.giveaway_id, exc)
                 await asyncio.sleep(backoff)
@@ -96,15 +199,21 @@ class GiveawayRunner:
                 if message.startswith('PING'):
                     await ws.send(message.replace('PING', 'PONG', 1))
                     continue
+                if ' NOTICE ' in message and 'authentication failed' in message.lower():
+                    raise TwitchAuthError(message)
                 parsed = self._parse_twitch_privmsg(message)
                 if not parsed:
                     continue
                 if parsed['text'].strip().lower() == cmd:
-                    await self._register_participant(
+                    if self.seen_messages.seen(parsed['message_id']):
+                        continue
+                    if await self._register_participant(
                         platform=Platform.TWITCH,
                         platform_user_id=parsed['user_id'],
                         display_name=parsed['display_name'],
-                    )
+                        weight=self._ticket_weight(parsed['is_subscriber']),
+                    ):
+                        self.seen_messages.add(parsed['message_id'])
 
     async def _fetch_twitch_login(self, token: str) -> str | None:
         async with httpx.AsyncClient(timeout=20) as client:
@@ -129,10 +238,15 @@ class GiveawayRunner:
             tags, remainder = raw.split(' ', 1)
             user_id = ''
             display_name = ''
+            message_id = ''
+            is_subscriber = False
             if tags.startswith('@'):
                 tag_dict = dict(part.split('=', 1) if '=' in part else (part, '') for part in tags[1:].split(';'))
                 user_id = tag_dict.get('user-id', '')
                 display_name = tag_dict.get('display-name', '')
+                message_id = tag_dict.get('id', '')
+                badges = tag_dict.get('badges', '')
+                is_subscriber = tag_dict.get('subscriber') == '1' or 'subscriber/' in badges or 'founder/' in badges
             if not display_name and '!' in remainder and remainder.startswith(':'):
                 display_name = remainder[1:].split('!', 1)[0]
             parts = remainder.split(' :', 1)
@@ -143,24 +257,39 @@ class GiveawayRunner:
                 'user_id': user_id or display_name or 'unknown',
                 'display_name': display_name or 'twitch-user',
                 'text': text,
+                'is_subscriber': is_subscriber,
+                'message_id': message_id,
             }
         except Exception:
             return None
 
     async def _run_youtube(self) -> None:
         backoff = settings.youtube_polling_floor_seconds
-        page_token = None
+        probe = settings.youtube_stream_probe_initial_seconds
+        last_chat_id = None
         while not self.stop_event.is_set():
             try:
                 data = await self._get_runtime_data()
                 if not data or not data['google']:
-                    await asyncio.sleep(5)
+                    await self._park(Platform.YOUTUBE)
                     continue
                 giveaway = data['giveaway']
                 token = decrypt_access_token(data['google'])
                 chat_id = giveaway.youtube_live_chat_id
                 if not chat_id:
-                    discovered = await get_google_live_chat_id(token, giveaway.youtube_video_id)
+                    google = data['google']
+                    hit, discovered = await read_live_chat_cache(
+                        redis_client, giveaway.youtube_video_id, google.provider_user_id
+                    )
+                    if not hit:
+                        discovery_cost = DISCOVERY_COST_UNITS['video' if giveaway.youtube_video_id else 'search']
+                        await self.youtube_scheduler.charge(google.id, discovery_cost)
+                        discovered = await get_google_live_chat_id(
+                            token,
+                            giveaway.youtube_video_id,
+                            channel_id=google.provider_user_id,
+                            redis=redis_client,
+                        )
                     if discovered:
                         chat_id, _ = discovered
                         async with AsyncSessionLocal() as db:
@@ -169,83 +298,248 @@ class GiveawayRunner:
                                 db_giveaway.youtube_live_chat_id = chat_id
                                 await db.commit()
                     else:
-                        await asyncio.sleep(10)
+                        # Stream not live yet: probe slowly, or sooner if the video changes.
+                        if await self._park(Platform.YOUTUBE, timeout=probe):
+                            probe = settings.youtube_stream_probe_initial_seconds
+                        else:
+                            probe = min(probe * 2, settings.youtube_stream_probe_cap_seconds)
                         continue
+                probe = settings.youtube_stream_probe_initial_seconds
+                if chat_id != last_chat_id:
+                    self.youtube_page_token = await self._load_youtube_checkpoint(chat_id)
+                    last_chat_id = chat_id
+                cmd = normalize_command(giveaway.command)
 
+                if youtube_streaming_enabled() and time.monotonic() >= self.youtube_stream_retry_at:
+                    try:
+                        async with httpx.AsyncClient(timeout=self._stream_timeout()) as client:
+                            await self.youtube_scheduler.charge(data['google'].id)
+                            pages = await self._stream_youtube(client, token, chat_id, cmd)
+                        if pages:
+                            backoff = settings.youtube_polling_floor_seconds
+                        else:
+                            await asyncio.sleep(backoff)
+                            backoff = min(backoff * 2, settings.youtube_backoff_cap_seconds)
+                        continue
+                    except YouTubeStreamUnavailable as exc:
+                        if exc.status_code == 401:
+                            await self._park(Platform.YOUTUBE, timeout=settings.youtube_backoff_cap_seconds)
+                            continue
+                        logger.warning(
+                            'youtube_stream_unavailable giveaway=%s status=%s; polling for %ss',
+                            self.giveaway_id,
+                            exc.status_code,
+                            settings.youtube_stream_retry_seconds,
+                        )
+                        self.youtube_stream_retry_at = time.monotonic() + settings.youtube_stream_retry_seconds
+
+                await self.youtube_scheduler.wait_turn(self.giveaway_id)
                 async with httpx.AsyncClient(timeout=20) as client:
+                    await self.youtube_scheduler.charge(data['google'].id)
                     resp = await client.get(
                         'https://www.googleapis.com/youtube/v3/liveChat/messages',
                         params={
                             'part': 'snippet,authorDetails',
                             'liveChatId': chat_id,
                             'maxResults': 200,
-                            'pageToken': page_token,
+                            'pageToken': self.youtube_page_token,
                         },
                         headers={'Authorization': f'Bearer {token}'},
                     )
+                    if resp.status_code == 401:
+                        # Expired token: the refresh scheduler notifies us with a new one.
+                        await self._park(Platform.YOUTUBE, timeout=settings.youtube_backoff_cap_seconds)
+                        continue
+                    if resp.status_code == 403 and 'quotaExceeded' in resp.text:
+                        self.youtube_scheduler.mark_exhausted()
                     if resp.status_code in {403, 429, 500, 503}:
                         await asyncio.sleep(backoff)
                         backoff = min(backoff * 2, settings.youtube_backoff_cap_seconds)
                         continue
                     resp.raise_for_status()
                     data_json = resp.json()
-                    page_token = data_json.get('nextPageToken')
+                    self.youtube_page_token = data_json.get('nextPageToken')
                     interval_ms = data_json.get('pollingIntervalMillis', 3000)
-                    cmd = normalize_command(giveaway.command)
-                    for item in data_json.get('items', []):
-                        text = item.get('snippet', {}).get('displayMessage', '').strip().lower()
-                        if text != cmd:
-                            continue
-                        author = item.get('authorDetails', {})
-                        channel_id = author.get('channelId', '')
-                        display_name = author.get('displayName', 'youtube-user')
-                        if not channel_id:
-                            continue
-                        await self._register_participant(
-                            platform=Platform.YOUTUBE,
-                            platform_user_id=channel_id,
-                            display_name=display_name,
-                        )
+                    items = data_json.get('items', [])
+                    entries = await self._handle_youtube_items(items, cmd)
+                    await self._save_youtube_checkpoint(chat_id)
                     backoff = settings.youtube_polling_floor_seconds
-                    await asyncio.sleep(max(interval_ms / 1000.0, settings.youtube_polling_floor_seconds))
+                    self.youtube_scheduler.record_poll(self.giveaway_id, interval_ms, len(items), entries)
             except Exception as exc:
                 logger.warning('YouTube runner error giveaway=%s error=%s', self.giveaway_id, exc)
                 await asyncio.sleep(backoff)
                 backoff = min(backoff * 2, settings.youtube_backoff_cap_seconds)
 
-    async def _register_participant(self, platform: Platform, platform_user_id: str, display_name: str) -> None:
-        async with AsyncSessionLocal() as db:
-            giveaway = await db.get(Giveaway, self.giveaway_id)
-            if not giveaway or not giveaway.is_open:
-                return
-            _, created = await add_or_refresh_participant(
-                db,
-                giveaway_id=self.giveaway_id,
-                platform=platform,
-                platform_user_id=platform_user_id,
-                display_name=display_name,
-            )
-            await add_audit_log(
-                db,
-                user_id=giveaway.user_id,
-                giveaway_id=self.giveaway_id,
-                action='participant_seen',
-                payload={'platform': platform.value, 'platform_user_id': platform_user_id, 'created': created},
+    def _stream_timeout(self) -> httpx.Timeout:
+        # The stream may stay quiet for a while; a read timeout just means reconnect.
+        return httpx.Timeout(20, read=settings.youtube_stream_idle_timeout_seconds)
+
+    async def _stream_youtube(self, client: httpx.AsyncClient, token: str, chat_id: str, cmd: str) -> int:
+        # One long-lived request per chat: the server pushes one JSON page per
+        # line, and each page's nextPageToken lets a reconnect resume in place.
+        async with client.stream(
+            'GET',
+            settings.youtube_stream_url,
+            params={
+                'part': 'snippet,authorDetails',
+                'liveChatId': chat_id,
+                'maxResults': 200,
+                'pageToken': self.youtube_page_token,
+            },
+            headers={'Authorization': f'Bearer {token}'},
+        ) as resp:
+            if resp.status_code >= 400:
+                raise YouTubeStreamUnavailable(resp.status_code)
+            pages = 0
+            async for line in resp.aiter_lines():
+                if self.stop_event.is_set():
+                    break
+                if not line.strip():
+                    continue
+                page = json.loads(line)
+                await self._handle_youtube_items(page.get('items', []), cmd)
+                self.youtube_page_token = page.get('nextPageToken') or self.youtube_page_token
+                await self._save_youtube_checkpoint(chat_id)
+                pages += 1
+        return pages
+
+    async def _load_youtube_checkpoint(self, chat_id: str) -> str | None:
+        try:
+            raw = await redis_client.get(youtube_checkpoint_key(self.giveaway_id))
+        except Exception as exc:
+            logger.warning('youtube_checkpoint_load_failed giveaway=%s error=%s', self.giveaway_id, exc)
+            return None
+        if not raw:
+            return None
+        checkpoint = json.loads(raw)
+        return checkpoint.get('page_token') if checkpoint.get('chat_id') == chat_id else None
+
+    async def _save_youtube_checkpoint(self, chat_id: str) -> None:
+        if not self.youtube_page_token:
+            return
+        try:
+            await redis_client.set(
+                youtube_checkpoint_key(self.giveaway_id),
+                json.dumps({'chat_id': chat_id, 'page_token': self.youtube_page_token}),
+                ex=settings.youtube_checkpoint_ttl_seconds,
             )
-            await db.commit()
-            state = await build_giveaway_state(db, self.giveaway_id)
-            await publish_state(redis_client, state)
+        except Exception as exc:
+            logger.warning('youtube_checkpoint_save_failed giveaway=%s error=%s', self.giveaway_id, exc)
+
+    async def _handle_youtube_items(self, items: list[dict], cmd: str) -> int:
+        entries = 0
+        for item in items:
+            text = item.get('snippet', {}).get('displayMessage', '').strip().lower()
+            if text != cmd:
+                continue
+            if self.seen_messages.seen(item.get('id', '')):
+                continue
+            author = item.get('authorDetails', {})
+            channel_id = author.get('channelId', '')
+            display_name = author.get('displayName', 'youtube-user')
+            if not channel_id:
+                continue
+            if await self._register_participant(
+                platform=Platform.YOUTUBE,
+                platform_user_id=channel_id,
+                display_name=display_name,
+                weight=self._ticket_weight(bool(author.get('isChatSponsor'))),
+            ):
+                self.seen_messages.add(item.get('id', ''))
+                entries += 1
+        return entries
+
+    async def _park(self, platform: Platform, timeout: float | None = None) -> bool:
+        # Without a timeout a parked loop holds no timer at all; only wake()
+        # (OAuth connected/refreshed, video changed) or stop() brings it back.
+        woken = False
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self.wakeups[platform].wait(), timeout=timeout)
+            woken = True
+        self.wakeups[platform].clear()
+        return woken
+
+    def wake(self, platform: Platform) -> None:
+        self.wakeups[platform].set()
+
+    def _ticket_weight(self, is_subscriber: bool) -> int:
+        return max(settings.subscriber_ticket_weight, 1) if is_subscriber else 1
+
+    async def _register_participant(
+        self,
+        platform: Platform,
+        platform_user_id: str,
+        display_name: str,
+        weight: int = 1,
+    ) -> bool:
+        if not self.flood_guard.allow(platform, platform_user_id):
+            return False
+        if settings.chat_pipeline_mode == 'stream':
+            # Ingest only: persisters (app.workers.entry_persister) write the
+            # DB, so a slow database never stalls the chat sockets. They also
+            # record the entrant, once the entry is actually accepted.
+            await append_entry(redis_client, self.giveaway_id, platform, platform_user_id, display_name, weight)
+            return True
+        if settings.hot_roster_enabled and await hot_roster.is_hot(redis_client, self.giveaway_id):
+            # Redis holds the roster while the giveaway is open; the flush
+            # loop writes it to `participants` behind our back.
+            await hot_roster.add_entry(redis_client, self.giveaway_id, platform, platform_user_id, display_name, weight)
+            await record_entrant(redis_client, self.giveaway_id, platform, platform_user_id, display_name)
+            self.state_changed.set()
+            return True
+        record = {'g': self.giveaway_id, 'p': platform.value, 'u': platform_user_id, 'n': display_name, 'w': weight}
+        if self.spool.active:
+            # Spool replay records the entrant after writing it to the DB.
+            self.spool.append(record)
+            return True
+        committed = False
+        try:
+            async with AsyncSessionLocal() as db:
+                giveaway = await db.get(Giveaway, self.giveaway_id)
+                if not giveaway or not giveaway.is_open:
+                    return False
+                _, created = await add_or_refresh_participant(
+                    db,
+                    giveaway_id=self.giveaway_id,
+                    platform=platform,
+                    platform_user_id=platform_user_id,
+                    display_name=display_name,
+                    weight=weight,
+                )
+                await add_audit_log(
+                    db,
+                    user_id=giveaway.user_id,
+                    giveaway_id=self.giveaway_id,
+                    action='participant_seen',
+                    payload={'platform': platform.value, 'platform_user_id': platform_user_id, 'created': created},
+                )
+                await db.commit()
+                committed = True
+                await record_entrant(redis_client, self.giveaway_id, platform, platform_user_id, display_name)
+                await bump_giveaway_version(redis_client, self.giveaway_id, roster=True)
+                state = await build_giveaway_state(db, self.giveaway_id, redis=redis_client)
+                await publish_state(redis_client, state)
+        except (SQLAlchemyError, OSError) as exc:
+            if committed:
+                raise
+            # Database unavailable (e.g. failover): keep the entry on local disk
+            # and let the spool replay it once the DB answers again.
+            logger.warning('chat_entry_spooled giveaway=%s error=%s', self.giveaway_id, exc)
+            self.spool.append(record)
+        return True
 
 
 class RunnerManager:
     def __init__(self, redis: Redis):
         self.redis = redis
         self.runners: dict[int, GiveawayRunner] = {}
+        self.youtube_scheduler = YouTubePollScheduler(redis)
+        self.spool = EntrySpool()
 
     async def start_giveaway(self, giveaway_id: int) -> None:
         runner = self.runners.get(giveaway_id)
         if runner is None:
-            runner = GiveawayRunner(giveaway_id)
+            runner = GiveawayRunner(giveaway_id, self.youtube_scheduler, self.spool)
             self.runners[giveaway_id] = runner
         await runner.start()
 
@@ -256,14 +550,43 @@ class RunnerManager:
         await runner.stop()
         self.runners.pop(giveaway_id, None)
 
+    def notify_credentials(self, user_id: int, provider: str) -> None:
+        platform = Platform.TWITCH if provider == OAuthProvider.TWITCH else Platform.YOUTUBE
+        for runner in self.runners.values():
+            if runner.user_id == user_id:
+                runner.wake(platform)
+
+    def notify_video_changed(self, giveaway_id: int) -> None:
+        runner = self.runners.get(giveaway_id)
+        if runner:
+            runner.wake(Platform.YOUTUBE)
+
     async def shutdown(self) -> None:
         ids = list(self.runners.keys())
         for giveaway_id in ids:
             await self.stop_giveaway(giveaway_id)
 
 
+def youtube_streaming_enabled() -> bool:
+    # There is no default stream endpoint: streaming needs a gateway that was
+    # configured on purpose.
+    return settings.youtube_ingest_mode == 'stream' and bool(settings.youtube_stream_url)
+
+
 async def worker_loop() -> None:
+    if settings.youtube_ingest_mode == 'stream' and not settings.youtube_stream_url:
+        logger.warning('youtube_stream_url_missing mode=stream; set YOUTUBE_STREAM_URL, polling until then')
     manager = RunnerManager(redis_client)
+    refresher = TokenRefreshScheduler(redis_client)
+    background_tasks = [
+        asyncio.create_task(twitch_validation_loop(refresher.request_reload), name='twitch-token-validator'),
+        asyncio.create_task(refresher.run(), name='oauth-token-refresher'),
+        asyncio.create_task(
+            spool_maintenance_loop(manager.spool, redis_client, f'{socket.gethostname()}-{os.getpid()}'),
+            name='chat-spool',
+        ),
+        asyncio.create_task(hot_roster.flush_loop(redis_client), name='hot-roster-flush'),
+    ]
     pubsub = redis_client.pubsub()
     await pubsub.subscribe('giveaway:control')
     logger.info('Worker subscribed to giveaway:control')
@@ -275,13 +598,26 @@ async def worker_loop() -> None:
                 continue
             payload = json.loads(message['data'])
             action = payload.get('type')
+            if action in {'oauth_connected', 'token_refreshed'}:
+                if action == 'oauth_connected':
+                    refresher.request_reload()
+                manager.notify_credentials(int(payload['user_id']), payload.get('provider', ''))
+                continue
             giveaway_id = int(payload['giveaway_id'])
             if action == 'start':
                 await manager.start_giveaway(giveaway_id)
             elif action in {'stop', 'clear'}:
                 await manager.stop_giveaway(giveaway_id)
+            elif action == 'video_changed':
+                manager.notify_video_changed(giveaway_id)
     finally:
+        for task in background_tasks:
+            task.cancel()
+        for task in background_tasks:
+            with suppress(asyncio.CancelledError):
+                await task
         await manager.shutdown()
+        manager.spool.close()
         await pubsub.unsubscribe('giveaway:control')
         await pubsub.close()
 
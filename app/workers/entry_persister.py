@@ -0,0 +1,222 @@
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import time
+
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.redis_client import redis_client
+from app.db.session import AsyncSessionLocal
+from app.models import Giveaway, Platform
+from app.services import hot_roster
+from app.services.audit import add_audit_log
+from app.services.entry_stream import (
+    ENTRY_GROUP,
+    ENTRY_STREAMS_KEY,
+    discard_entries,
+    ensure_entry_group,
+    entry_stream_key,
+    giveaway_id_from_stream,
+)
+from app.services.giveaway_service import add_or_refresh_participant
+from app.services.giveaway_version import bump_giveaway_version
+from app.services.realtime import build_giveaway_state, publish_state
+from app.services.recent_entrants import record_entrants
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+async def persist_entry_batch(
+    db: AsyncSession,
+    giveaway_id: int,
+    entries: list[dict],
+    closing: bool = False,
+) -> int | None:
+    giveaway = await db.get(Giveaway, giveaway_id)
+    if giveaway is None:
+        return None
+    if not giveaway.is_open and not closing:
+        # Same rule as the inline path: nothing is written once the giveaway
+        # closes. Entries queued before that are drained by drain_entries().
+        return 0
+    for fields in entries:
+        platform = Platform(fields['p'])
+        _, created = await add_or_refresh_participant(
+            db,
+            giveaway_id=giveaway_id,
+            platform=platform,
+            platform_user_id=fields['u'],
+            display_name=fields['n'],
+            weight=int(fields.get('w', 1)),
+        )
+        await add_audit_log(
+            db,
+            user_id=giveaway.user_id,
+            giveaway_id=giveaway_id,
+            action='participant_seen',
+            payload={'platform': platform.value, 'platform_user_id': fields['u'], 'created': created},
+        )
+    await db.commit()
+    return len(entries)
+
+
+class EntryPersister:
+    """Drains per-giveaway entry streams into the database in batches.
+
+    Any number of persister processes can run side by side: they share one
+    consumer group, so each entry is written once, and entries left pending
+    by a crashed consumer are claimed back after CHAT_PERSISTER_CLAIM_IDLE_MS.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        consumer: str,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+    ) -> None:
+        self.redis = redis
+        self.consumer = consumer
+        self.session_factory = session_factory
+        self._groups: set[str] = set()
+        self.persisted_total = 0
+        self.batches_total = 0
+
+    async def _streams(self) -> list[str]:
+        streams = sorted(await self.redis.smembers(ENTRY_STREAMS_KEY))
+        for key in streams:
+            if key not in self._groups:
+                await ensure_entry_group(self.redis, key)
+                self._groups.add(key)
+        return streams
+
+    async def handle(self, stream_key: str, messages: list[tuple[str, dict]], closing: bool = False) -> None:
+        if not messages:
+            return
+        giveaway_id = giveaway_id_from_stream(stream_key)
+        ids = [message_id for message_id, _ in messages]
+        started = time.perf_counter()
+        async with self.session_factory() as db:
+            persisted = await persist_entry_batch(db, giveaway_id, [fields for _, fields in messages], closing)
+            if persisted is None:
+                await self.redis.xack(stream_key, ENTRY_GROUP, *ids)
+                await discard_entries(self.redis, giveaway_id)
+                self._groups.discard(stream_key)
+                return
+            await self.redis.xack(stream_key, ENTRY_GROUP, *ids)
+            if not persisted:
+                return
+            entries = [fields for _, fields in messages]
+            if await hot_roster.is_hot(self.redis, giveaway_id):
+                # Hot giveaways are read from the Redis roster, so it must see
+                # what the stream pipeline wrote to the table.
+                await hot_roster.mirror_entries(self.redis, giveaway_id, entries)
+            await record_entrants(self.redis, giveaway_id, entries)
+            await bump_giveaway_version(self.redis, giveaway_id, roster=True)
+            state = await build_giveaway_state(db, giveaway_id, redis=self.redis)
+        await publish_state(self.redis, state)
+        self.persisted_total += persisted
+        self.batches_total += 1
+        logger.debug(
+            'entry_batch_persisted giveaway=%s size=%s ms=%.1f',
+            giveaway_id,
+            persisted,
+            (time.perf_counter() - started) * 1000,
+        )
+
+    async def claim_stale(self) -> None:
+        for key in await self._streams():
+            _, messages, _ = await self.redis.xautoclaim(
+                key,
+                ENTRY_GROUP,
+                self.consumer,
+                min_idle_time=settings.chat_persister_claim_idle_ms,
+                start_id='0-0',
+                count=settings.chat_persister_batch_size,
+            )
+            await self.handle(key, messages)
+
+    async def run(self) -> None:
+        next_claim = 0.0
+        while True:
+            try:
+                if time.monotonic() >= next_claim:
+                    await self.claim_stale()
+                    next_claim = time.monotonic() + settings.chat_persister_claim_idle_ms / 1000
+                streams = await self._streams()
+                if not streams:
+                    await asyncio.sleep(1)
+                    continue
+                response = await self.redis.xreadgroup(
+                    ENTRY_GROUP,
+                    self.consumer,
+                    {key: '>' for key in streams},
+                    count=settings.chat_persister_batch_size,
+                    block=1000,
+                )
+                for stream_key, messages in response or []:
+                    await self.handle(stream_key, messages)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                # Unacked entries stay pending and are claimed again later.
+                logger.warning('entry_persister_error consumer=%s error=%s', self.consumer, exc)
+                self._groups.clear()
+                await asyncio.sleep(1)
+
+
+async def drain_entries(
+    redis: Redis,
+    giveaway_id: int,
+    session_factory: async_sessionmaker = AsyncSessionLocal,
+) -> int:
+    """Persist every entry still queued for a giveaway that was just closed.
+
+    Called by stop: persisters drop entries of closed giveaways, so anything
+    left in the stream, including entries pending on another consumer, is
+    claimed and written here. Returns how many entries were persisted.
+    """
+    key = entry_stream_key(giveaway_id)
+    if not await redis.exists(key):
+        return 0
+    await ensure_entry_group(redis, key)
+    persister = EntryPersister(redis, f'drain-{giveaway_id}', session_factory)
+    while True:
+        _, claimed, _ = await redis.xautoclaim(
+            key,
+            ENTRY_GROUP,
+            persister.consumer,
+            min_idle_time=0,
+            start_id='0-0',
+            count=settings.chat_persister_batch_size,
+        )
+        response = await redis.xreadgroup(
+            ENTRY_GROUP, persister.consumer, {key: '>'}, count=settings.chat_persister_batch_size
+        )
+        fresh = [message for _, messages in response or [] for message in messages]
+        if not claimed and not fresh:
+            break
+        await persister.handle(key, claimed, closing=True)
+        await persister.handle(key, fresh, closing=True)
+    if persister.persisted_total:
+        logger.info('entry_stream_drained giveaway=%s persisted=%s', giveaway_id, persister.persisted_total)
+    return persister.persisted_total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Persist queued chat entries from Redis Streams.')
+    parser.add_argument('--consumer', default=f'{socket.gethostname()}-{os.getpid()}')
+    args = parser.parse_args()
+    asyncio.run(EntryPersister(redis_client, args.consumer).run())
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import logging
+import os
+import struct
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+from redis.asyncio import Redis
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.models import Giveaway, Platform
+from app.services.audit import add_audit_log
+from app.services.giveaway_service import add_or_refresh_participant
+from app.services.giveaway_version import bump_giveaway_version
+from app.services.realtime import build_giveaway_state, publish_state
+from app.services.recent_entrants import record_entrants
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+RECORD_HEADER = struct.Struct('>I')
+SPOOL_METRICS_KEY = 'chat:spool_metrics'
+
+
+def _iter_records(path: Path) -> Iterator[dict]:
+    with path.open('rb') as handle:
+        while True:
+            header = handle.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            (size,) = RECORD_HEADER.unpack(header)
+            payload = handle.read(size)
+            if len(payload) < size:
+                # Torn write from a crash mid-append: everything before it is intact.
+                logger.warning('chat_spool_truncated_record path=%s', path)
+                return
+            yield json.loads(payload)
+
+
+class EntrySpool:
+    """Append-only local file for chat entries the database could not take.
+
+    Records are length-prefixed JSON, fsynced in batches. Once anything is
+    spooled, new entries keep going to the spool until replay has drained
+    it, so the database sees entries in the order they arrived.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path = Path(path or settings.chat_spool_path)
+        self.replay_path = self.path.with_name(self.path.name + '.replaying')
+        self._handle = None
+        self._unsynced = 0
+        self.spooled_total = 0
+        self.replayed_total = 0
+        self.last_replay_rate = 0.0
+        # Leftovers from a previous run must drain before new entries hit the DB.
+        self.active = self.size_bytes() > 0
+
+    def size_bytes(self) -> int:
+        size = 0
+        for path in (self.path, self.replay_path):
+            if path.exists():
+                size += path.stat().st_size
+        return size
+
+    def append(self, record: dict) -> None:
+        if self._handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = self.path.open('ab')
+        payload = json.dumps(record, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        self._handle.write(RECORD_HEADER.pack(len(payload)) + payload)
+        self.active = True
+        self.spooled_total += 1
+        self._unsynced += 1
+        if self._unsynced >= settings.chat_spool_fsync_batch:
+            self.sync()
+
+    def sync(self) -> None:
+        if self._handle is None or not self._unsynced:
+            return
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._unsynced = 0
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self.sync()
+            self._handle.close()
+            self._handle = None
+
+    def _rotate(self) -> bool:
+        if self.replay_path.exists():
+            return True
+        self.close()
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return False
+        self.path.rename(self.replay_path)
+        return True
+
+    async def replay(self, session_factory: async_sessionmaker = AsyncSessionLocal) -> dict[int, list[dict]]:
+        """Drain the oldest spool file into the DB; returns the written records per giveaway."""
+        if not self._rotate():
+            self.active = False
+            return {}
+        started = time.perf_counter()
+        touched: dict[int, list[dict]] = {}
+        replayed = 0
+        batch: list[dict] = []
+        for record in _iter_records(self.replay_path):
+            batch.append(record)
+            if len(batch) >= settings.chat_spool_replay_batch:
+                await self._persist(session_factory, batch, touched)
+                replayed += len(batch)
+                batch = []
+        if batch:
+            await self._persist(session_factory, batch, touched)
+            replayed += len(batch)
+        # Replaying twice is harmless (entries upsert on uq_participant_unique),
+        # so the file is only removed once every batch has committed.
+        self.replay_path.unlink()
+        self.active = self._unsynced > 0 or self.size_bytes() > 0
+        elapsed = time.perf_counter() - started
+        self.replayed_total += replayed
+        self.last_replay_rate = replayed / elapsed if elapsed > 0 else float(replayed)
+        logger.info('chat_spool_replayed records=%s rate=%.1f/s', replayed, self.last_replay_rate)
+        return touched
+
+    async def _persist(
+        self,
+        session_factory: async_sessionmaker,
+        records: list[dict],
+        touched: dict[int, list[dict]],
+    ) -> None:
+        written: dict[int, list[dict]] = {}
+        async with session_factory() as db:
+            owners: dict[int, int | None] = {}
+            for record in records:
+                giveaway_id = int(record['g'])
+                if giveaway_id not in owners:
+                    # Spooled entries skipped the inline is_open check, so a
+                    # giveaway closed by replay time gets none of them.
+                    giveaway = await db.get(Giveaway, giveaway_id)
+                    owners[giveaway_id] = giveaway.user_id if giveaway and giveaway.is_open else None
+                if owners[giveaway_id] is None:
+                    continue
+                platform = Platform(record['p'])
+                _, created = await add_or_refresh_participant(
+                    db,
+                    giveaway_id=giveaway_id,
+                    platform=platform,
+                    platform_user_id=record['u'],
+                    display_name=record['n'],
+                    weight=int(record.get('w', 1)),
+                )
+                await add_audit_log(
+                    db,
+                    user_id=owners[giveaway_id],
+                    giveaway_id=giveaway_id,
+                    action='participant_seen',
+                    payload={'platform': platform.value, 'platform_user_id': record['u'], 'created': created, 'spooled': True},
+                )
+                written.setdefault(giveaway_id, []).append(record)
+            await db.commit()
+        for giveaway_id, entries in written.items():
+            touched.setdefault(giveaway_id, []).extend(entries)
+
+    def metrics(self) -> dict:
+        return {
+            'size_bytes': self.size_bytes(),
+            'spooled_total': self.spooled_total,
+            'replayed_total': self.replayed_total,
+            'last_replay_rate': round(self.last_replay_rate, 1),
+        }
+
+
+async def database_healthy(session_factory: async_sessionmaker = AsyncSessionLocal) -> bool:
+    try:
+        async with session_factory() as db:
+            await db.execute(text('SELECT 1'))
+        return True
+    except Exception:
+        return False
+
+
+async def _announce_replay(redis: Redis, replayed: dict[int, list[dict]]) -> None:
+    for giveaway_id, entries in replayed.items():
+        await record_entrants(redis, giveaway_id, entries)
+        await bump_giveaway_version(redis, giveaway_id, roster=True)
+        async with AsyncSessionLocal() as db:
+            state = await build_giveaway_state(db, giveaway_id, redis=redis)
+        await publish_state(redis, state)
+
+
+async def spool_maintenance_loop(spool: EntrySpool, redis: Redis, worker_id: str) -> None:
+    next_replay = 0.0
+    while True:
+        await asyncio.sleep(settings.chat_spool_fsync_interval_seconds)
+        spool.sync()
+        if time.monotonic() < next_replay:
+            continue
+        next_replay = time.monotonic() + settings.chat_spool_replay_interval_seconds
+        try:
+            if spool.active and await database_healthy():
+                await _announce_replay(redis, await spool.replay())
+            await redis.hset(SPOOL_METRICS_KEY, worker_id, json.dumps(spool.metrics()))
+        except Exception as exc:
+            logger.warning('chat_spool_maintenance_failed error=%s', exc)
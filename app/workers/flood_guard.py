@@ -0,0 +1,89 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from app.core.config import get_settings
+from app.models import Platform
+
+settings = get_settings()
+
+
+class FloodGuard:
+    """Drops repeated chat commands before they reach the database.
+
+    Every viewer gets a small token bucket and the channel as a whole gets one
+    more; buckets live in an LRU so memory stays bounded. An evicted bucket
+    would have refilled anyway, so eviction never lets a flood through.
+    """
+
+    def __init__(
+        self,
+        user_burst: int | None = None,
+        user_refill_seconds: float | None = None,
+        channel_per_second: float | None = None,
+        max_users: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.user_burst = float(user_burst or settings.chat_user_burst)
+        self.user_rate = 1.0 / (user_refill_seconds or settings.chat_user_refill_seconds)
+        self.channel_rate = channel_per_second or settings.chat_channel_max_per_second
+        self.max_users = max_users or settings.chat_guard_max_users
+        self.clock = clock
+        self._users: OrderedDict[tuple[Platform, str], tuple[float, float]] = OrderedDict()
+        self._channel = (self.channel_rate, clock())
+        self.dropped = {'user': 0, 'channel': 0}
+
+    def allow(self, platform: Platform, platform_user_id: str) -> bool:
+        now = self.clock()
+        key = (platform, platform_user_id)
+        tokens, ts = self._users.pop(key, (self.user_burst, now))
+        tokens = min(self.user_burst, tokens + (now - ts) * self.user_rate)
+        if tokens < 1:
+            self._remember(key, tokens, now)
+            self.dropped['user'] += 1
+            return False
+
+        channel_tokens, channel_ts = self._channel
+        channel_tokens = min(self.channel_rate, channel_tokens + (now - channel_ts) * self.channel_rate)
+        if channel_tokens < 1:
+            self._channel = (channel_tokens, now)
+            self._remember(key, tokens, now)
+            self.dropped['channel'] += 1
+            return False
+
+        self._channel = (channel_tokens - 1, now)
+        self._remember(key, tokens - 1, now)
+        return True
+
+    def _remember(self, key: tuple[Platform, str], tokens: float, now: float) -> None:
+        self._users[key] = (tokens, now)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+
+    def take_dropped(self) -> dict[str, int]:
+        dropped, self.dropped = self.dropped, {'user': 0, 'channel': 0}
+        return dropped
+
+
+class SeenMessages:
+    """Bounded window of recently handled chat message ids.
+
+    Reconnects and resumed pages can replay messages we already counted;
+    remembering the last few thousand ids drops those before any DB work.
+    """
+
+    def __init__(self, max_size: int | None = None) -> None:
+        self.max_size = max_size or settings.chat_seen_window_size
+        self._ids: OrderedDict[str, None] = OrderedDict()
+
+    def seen(self, message_id: str) -> bool:
+        return bool(message_id) and message_id in self._ids
+
+    def add(self, message_id: str) -> None:
+        # Called only once the entry was registered, so a message whose
+        # registration failed is retried when it is replayed.
+        if not message_id:
+            return
+        self._ids[message_id] = None
+        if len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
@@ -0,0 +1,63 @@
+import argparse
+import asyncio
+import logging
+
+from cryptography.fernet import InvalidToken
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.security import rotate_value
+from app.db.session import AsyncSessionLocal
+from app.models import OAuthAccount
+
+logger = logging.getLogger(__name__)
+
+REENCRYPT_BATCH_SIZE = 200
+
+
+async def reencrypt_oauth_accounts(
+    session_factory: async_sessionmaker = AsyncSessionLocal,
+    batch_size: int = REENCRYPT_BATCH_SIZE,
+) -> dict[str, int]:
+    # Walks oauth_accounts by id, one committed chunk at a time, so a rotation
+    # can be interrupted and resumed without holding a long transaction.
+    counts = {'rotated': 0, 'failed': 0}
+    last_id = 0
+    while True:
+        async with session_factory() as db:
+            accounts = (
+                await db.execute(
+                    select(OAuthAccount)
+                    .where(OAuthAccount.id > last_id)
+                    .order_by(OAuthAccount.id.asc())
+                    .limit(batch_size)
+                )
+            ).scalars().all()
+            if not accounts:
+                return counts
+            for account in accounts:
+                try:
+                    account.access_token_enc = rotate_value(account.access_token_enc)
+                    if account.refresh_token_enc:
+                        account.refresh_token_enc = rotate_value(account.refresh_token_enc)
+                except InvalidToken:
+                    logger.warning('oauth_reencrypt_failed account=%s', account.id)
+                    counts['failed'] += 1
+                    continue
+                counts['rotated'] += 1
+            await db.commit()
+            last_id = accounts[-1].id
+        logger.info('oauth_reencrypt_progress last_id=%s rotated=%s', last_id, counts['rotated'])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Re-encrypt stored OAuth tokens with the current TOKEN_ENCRYPTION_KEY.')
+    parser.add_argument('--batch-size', type=int, default=REENCRYPT_BATCH_SIZE)
+    args = parser.parse_args()
+    counts = asyncio.run(reencrypt_oauth_accounts(batch_size=args.batch_size))
+    logger.info('oauth_reencrypt_done rotated=%s failed=%s', counts['rotated'], counts['failed'])
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
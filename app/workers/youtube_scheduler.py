@@ -0,0 +1,168 @@
+import asyncio
+import bisect
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# YouTube Data API quota resets at midnight Pacific time.
+QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+POLL_COST_UNITS = 5
+DISCOVERY_COST_UNITS = {'video': 1, 'search': 101}
+
+
+@dataclass
+class PollSlot:
+    interval: float
+    effective_interval: float
+    last_poll_at: float = float('-inf')
+    last_entry_at: float = float('-inf')
+    due_at: float = 0.0
+
+
+class YouTubePollScheduler:
+    """Hands out liveChat/messages polling turns to every runner in the worker.
+
+    Quota units are counted per Google project (shared by every token issued
+    to our client id) and per token. Each runner asks for its next turn;
+    turns are spaced apart, stretched when a chat goes quiet, and when the
+    project's remaining daily quota cannot sustain every runner the budget
+    goes first to giveaways that received entries recently.
+    """
+
+    def __init__(self, redis: Redis | None, clock: Callable[[], float] = time.time) -> None:
+        self.redis = redis
+        self.clock = clock
+        self.project = settings.google_client_id or 'default'
+        self.slots: dict[int, PollSlot] = {}
+        self.spent_project = 0
+        self.spent_tokens: dict[int, int] = {}
+        self._quota_day = self._today()
+        self._reserved: list[float] = []
+
+    def _today(self) -> str:
+        return datetime.fromtimestamp(self.clock(), QUOTA_TIMEZONE).strftime('%Y%m%d')
+
+    def _seconds_until_reset(self) -> float:
+        now = datetime.fromtimestamp(self.clock(), QUOTA_TIMEZONE)
+        midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return (midnight - now).total_seconds()
+
+    def _roll_day(self) -> None:
+        today = self._today()
+        if today != self._quota_day:
+            self._quota_day = today
+            self.spent_project = 0
+            self.spent_tokens.clear()
+
+    def register(self, giveaway_id: int) -> None:
+        floor = settings.youtube_polling_floor_seconds
+        self.slots.setdefault(giveaway_id, PollSlot(interval=floor, effective_interval=floor))
+
+    def unregister(self, giveaway_id: int) -> None:
+        self.slots.pop(giveaway_id, None)
+
+    def remaining_units(self) -> int:
+        self._roll_day()
+        return settings.youtube_daily_quota_units - settings.youtube_quota_reserve_units - self.spent_project
+
+    def _plan(self, now: float) -> None:
+        budget_rate = max(self.remaining_units(), 0) / POLL_COST_UNITS / max(self._seconds_until_reset(), 60)
+        recent = now - settings.youtube_priority_window_seconds
+        priority = [slot for slot in self.slots.values() if slot.last_entry_at >= recent]
+        others = [slot for slot in self.slots.values() if slot.last_entry_at < recent]
+        for group in (priority, others):
+            wanted = sum(1 / slot.interval for slot in group)
+            share = min(1.0, budget_rate / wanted) if wanted else 1.0
+            for slot in group:
+                if share > 0:
+                    slot.effective_interval = slot.interval / share
+                else:
+                    slot.effective_interval = settings.youtube_quota_starved_seconds
+                slot.effective_interval = min(slot.effective_interval, settings.youtube_quota_starved_seconds)
+            budget_rate = max(budget_rate - wanted * share, 0.0)
+
+    def _reserve(self, due: float, now: float) -> float:
+        spacing = settings.youtube_poll_spacing_seconds
+        del self._reserved[: bisect.bisect_left(self._reserved, now - spacing)]
+        for reserved in self._reserved:
+            if reserved <= due - spacing:
+                continue
+            if reserved >= due + spacing:
+                break
+            due = reserved + spacing
+        bisect.insort(self._reserved, due)
+        return due
+
+    def next_turn(self, giveaway_id: int) -> float:
+        now = self.clock()
+        self.register(giveaway_id)
+        self._plan(now)
+        slot = self.slots[giveaway_id]
+        slot.due_at = self._reserve(max(slot.last_poll_at + slot.effective_interval, now), now)
+        return slot.due_at
+
+    async def wait_turn(self, giveaway_id: int) -> None:
+        delay = self.next_turn(giveaway_id) - self.clock()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def charge(self, account_id: int, units: int = POLL_COST_UNITS) -> None:
+        self._roll_day()
+        self.spent_project += units
+        self.spent_tokens[account_id] = self.spent_tokens.get(account_id, 0) + units
+        if self.redis is None:
+            return
+        # Redis totals include every worker process on the same project.
+        project_key = f'youtube:quota:{self.project}:{self._quota_day}'
+        token_key = f'{project_key}:token:{account_id}'
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.incrby(project_key, units)
+                pipe.expire(project_key, 2 * 24 * 3600)
+                pipe.incrby(token_key, units)
+                pipe.expire(token_key, 2 * 24 * 3600)
+                project_total, _, token_total, _ = await pipe.execute()
+        except RedisError as exc:
+            logger.warning('youtube_quota_redis_unavailable error=%s', exc)
+            return
+        self.spent_project = max(self.spent_project, int(project_total))
+        self.spent_tokens[account_id] = max(self.spent_tokens[account_id], int(token_total))
+
+    def mark_exhausted(self) -> None:
+        self._roll_day()
+        self.spent_project = max(self.spent_project, settings.youtube_daily_quota_units)
+        logger.warning('youtube_quota_exhausted project=%s', self.project)
+
+    def record_poll(self, giveaway_id: int, interval_ms: int | None, items: int, entries: int) -> None:
+        slot = self.slots.get(giveaway_id)
+        if slot is None:
+            return
+        now = self.clock()
+        base = max((interval_ms or 0) / 1000.0, settings.youtube_polling_floor_seconds)
+        if items:
+            slot.interval = base
+        else:
+            slot.interval = min(max(slot.interval, base) * 1.5, max(settings.youtube_idle_poll_cap_seconds, base))
+        if entries:
+            slot.last_entry_at = now
+        slot.last_poll_at = now
+
+    def snapshot(self) -> dict:
+        return {
+            'project': self.project,
+            'units_spent': self.spent_project,
+            'units_remaining': self.remaining_units(),
+            'tokens': dict(self.spent_tokens),
+            'intervals': {giveaway_id: round(slot.effective_interval, 2) for giveaway_id, slot in self.slots.items()},
+        }
@@ -1,5 +1,6 @@
 ﻿import asyncio
 
+import fakeredis
 import pytest
 import pytest_asyncio
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
@@ -25,3 +26,11 @@ async def db_session():
         yield session
 
     await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def redis():
+    # A private in-memory server per test, decoding like the app's client.
+    client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True)
+    yield client
+    await client.aclose()
@@ -0,0 +1,92 @@
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db import session as db_session_module
+from app.db.session import PRIMARY_STICKY_SESSION_KEY, TrackedSession, get_db_session, read_session_factory
+from app.models import User
+from app.services.dependencies import get_current_user
+from app.services.user_cache import _local_users
+
+
+class _Request:
+    def __init__(self, session: dict | None = None):
+        self.scope = {'session': session} if session is not None else {}
+        self.session = session
+
+
+class _CountingFactory:
+    def __init__(self, factory):
+        self.factory = factory
+        self.opened = 0
+
+    def __call__(self):
+        self.opened += 1
+        return self.factory()
+
+
+@pytest.fixture
+def with_replica(monkeypatch):
+    monkeypatch.setattr(db_session_module, 'replica_engine', object())
+
+
+def test_reads_go_to_the_replica_outside_the_sticky_window(with_replica):
+    assert read_session_factory({'user_id': 1}) is db_session_module.ReadSessionLocal
+    assert read_session_factory({'user_id': 1, PRIMARY_STICKY_SESSION_KEY: time.time() - 1}) is (
+        db_session_module.ReadSessionLocal
+    )
+    assert read_session_factory({'user_id': 1, PRIMARY_STICKY_SESSION_KEY: time.time() + 5}) is (
+        db_session_module.AsyncSessionLocal
+    )
+    # Without session state there is no sticky window to honour.
+    assert read_session_factory(None) is db_session_module.AsyncSessionLocal
+
+
+def test_without_a_replica_everything_reads_the_primary():
+    assert db_session_module.replica_engine is None
+    assert read_session_factory({'user_id': 1}) is db_session_module.AsyncSessionLocal
+
+
+@pytest.mark.asyncio
+async def test_commit_through_the_request_session_starts_the_sticky_window(db_session, with_replica, monkeypatch):
+    tracked = async_sessionmaker(
+        db_session.bind, class_=AsyncSession, expire_on_commit=False, sync_session_class=TrackedSession
+    )
+    monkeypatch.setattr(db_session_module, 'AsyncSessionLocal', tracked)
+
+    reader = _Request({'user_id': 1})
+    dependency = get_db_session(reader)
+    session = await anext(dependency)
+    await session.execute(text('select 1'))
+    with pytest.raises(StopAsyncIteration):
+        await anext(dependency)
+    assert PRIMARY_STICKY_SESSION_KEY not in reader.session
+
+    writer = _Request({'user_id': 1})
+    dependency = get_db_session(writer)
+    session = await anext(dependency)
+    session.add(User(email='sticky@example.com', password_hash='hash'))
+    await session.commit()
+    with pytest.raises(StopAsyncIteration):
+        await anext(dependency)
+    assert writer.session[PRIMARY_STICKY_SESSION_KEY] > time.time()
+    assert read_session_factory(writer.session) is tracked
+
+
+@pytest.mark.asyncio
+async def test_current_user_opens_a_session_only_on_a_cache_miss(db_session, monkeypatch):
+    user = User(email='current@example.com', password_hash='hash')
+    db_session.add(user)
+    await db_session.commit()
+    factory = _CountingFactory(async_sessionmaker(db_session.bind, expire_on_commit=False))
+    monkeypatch.setattr('app.services.dependencies.read_session_factory', lambda session_data: factory)
+    _local_users.pop(user.id, None)
+
+    request = _Request({'user_id': user.id})
+    assert (await get_current_user(request, redis=None)).email == 'current@example.com'
+    assert (await get_current_user(request, redis=None)).email == 'current@example.com'
+
+    assert factory.opened == 1
+    _local_users.pop(user.id, None)
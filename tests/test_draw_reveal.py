@@ -0,0 +1,96 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models import Giveaway, Platform, User, Winner
+from app.services import draw_scheduler
+from app.services.draw_scheduler import RevealScheduler
+from app.services.realtime import build_giveaway_state, hold_winner_reveal, pending_reveal_ids, release_winner_reveal
+
+
+async def _giveaway_with_winners(db_session) -> tuple[Giveaway, list[Winner]]:
+    user = User(email='reveal@example.com', password_hash='hash')
+    db_session.add(user)
+    await db_session.flush()
+    giveaway = Giveaway(user_id=user.id, name='Reveal', command='!participar', is_open=False)
+    db_session.add(giveaway)
+    await db_session.flush()
+    drawn_at = datetime.now(timezone.utc)
+    winners = [
+        Winner(
+            giveaway_id=giveaway.id,
+            platform=Platform.TWITCH,
+            platform_user_id=str(index),
+            display_name=name,
+            drawn_at=drawn_at + timedelta(seconds=index),
+        )
+        for index, name in enumerate(['Ana', 'Bia', 'Caio'])
+    ]
+    db_session.add_all(winners)
+    await db_session.commit()
+    return giveaway, winners
+
+
+@pytest.mark.asyncio
+async def test_back_to_back_draws_keep_their_own_hold(db_session, redis):
+    giveaway, (first, second, third) = await _giveaway_with_winners(db_session)
+
+    await hold_winner_reveal(redis, giveaway.id, second.id, 3000)
+    await hold_winner_reveal(redis, giveaway.id, third.id, 5000)
+    state = await build_giveaway_state(db_session, giveaway.id, redis=redis)
+    assert state['last_winner']['display_name'] == 'Ana'
+
+    # The first animation ends: only its own winner is revealed.
+    await release_winner_reveal(redis, giveaway.id, second.id)
+    assert await pending_reveal_ids(redis, giveaway.id) == [third.id]
+    state = await build_giveaway_state(db_session, giveaway.id, redis=redis)
+    assert state['last_winner']['display_name'] == 'Bia'
+
+    await release_winner_reveal(redis, giveaway.id, third.id)
+    state = await build_giveaway_state(db_session, giveaway.id, redis=redis)
+    assert state['last_winner']['display_name'] == 'Caio'
+
+
+@pytest.mark.asyncio
+async def test_lapsed_hold_no_longer_hides_the_winner(db_session, redis):
+    giveaway, (_, _, third) = await _giveaway_with_winners(db_session)
+
+    await hold_winner_reveal(redis, giveaway.id, third.id, -5000)
+
+    assert await pending_reveal_ids(redis, giveaway.id) == []
+    state = await build_giveaway_state(db_session, giveaway.id, redis=redis)
+    assert state['last_winner']['display_name'] == 'Caio'
+
+
+@pytest.mark.asyncio
+async def test_reveal_scheduler_releases_in_due_order(db_session, monkeypatch, redis):
+    giveaway, (_, second, third) = await _giveaway_with_winners(db_session)
+    published = []
+
+    async def fake_publish(redis, state):
+        published.append(state['last_winner']['display_name'])
+
+    monkeypatch.setattr(draw_scheduler, 'redis_client', redis)
+    monkeypatch.setattr(draw_scheduler, 'AsyncSessionLocal', async_sessionmaker(db_session.bind, expire_on_commit=False))
+    monkeypatch.setattr(draw_scheduler, 'publish_state', fake_publish)
+    await hold_winner_reveal(redis, giveaway.id, second.id, 3000)
+    await hold_winner_reveal(redis, giveaway.id, third.id, 3000)
+
+    scheduler = RevealScheduler()
+    await scheduler.start()
+    scheduler.schedule(giveaway.id, third.id, 30)
+    scheduler.schedule(giveaway.id, second.id, 0.01)
+    for _ in range(200):
+        if published:
+            break
+        await asyncio.sleep(0.01)
+
+    assert published == ['Bia']
+    assert scheduler.pending() == 1
+
+    # Shutting down reveals whatever is still queued.
+    await scheduler.stop()
+    assert published == ['Bia', 'Caio']
+    assert scheduler.pending() == 0
@@ -0,0 +1,117 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models import AuditLog, Giveaway, Participant, Platform, User
+from app.services.entry_stream import (
+    ENTRY_GROUP,
+    append_entry,
+    ensure_entry_group,
+    entry_stream_key,
+    giveaway_id_from_stream,
+)
+from app.workers.entry_persister import drain_entries, persist_entry_batch
+
+
+@pytest.mark.asyncio
+async def test_batch_persists_entries_in_one_transaction(db_session):
+    user = User(email='stream@example.com', password_hash='hash')
+    db_session.add(user)
+    await db_session.flush()
+    giveaway = Giveaway(user_id=user.id, name='Stream', command='!participar', is_open=True)
+    db_session.add(giveaway)
+    await db_session.commit()
+
+    entries = [
+        {'p': 'twitch', 'u': '1', 'n': 'Ana', 'w': '1', 't': '0'},
+        {'p': 'youtube', 'u': 'UC2', 'n': 'Bia', 'w': '2', 't': '0'},
+        {'p': 'twitch', 'u': '1', 'n': 'Ana B', 'w': '1', 't': '0'},
+    ]
+    assert await persist_entry_batch(db_session, giveaway.id, entries) == 3
+
+    participants = (
+        await db_session.execute(select(Participant).where(Participant.giveaway_id == giveaway.id).order_by(Participant.id))
+    ).scalars().all()
+    assert [(p.platform_user_id, p.display_name, p.weight) for p in participants] == [('1', 'Ana B', 1), ('UC2', 'Bia', 2)]
+    assert await db_session.scalar(select(func.count(AuditLog.id))) == 3
+
+    assert await persist_entry_batch(db_session, giveaway.id + 100, entries) is None
+    assert giveaway_id_from_stream(entry_stream_key(giveaway.id)) == giveaway.id
+
+
+@pytest.mark.asyncio
+async def test_conflict_mid_batch_keeps_earlier_entries(db_session, monkeypatch):
+    from app.services import giveaway_service
+
+    user = User(email='stream-race@example.com', password_hash='hash')
+    db_session.add(user)
+    await db_session.flush()
+    giveaway = Giveaway(user_id=user.id, name='Race', command='!participar', is_open=True)
+    db_session.add(giveaway)
+    await db_session.flush()
+    db_session.add(Participant(giveaway_id=giveaway.id, platform=Platform.YOUTUBE, platform_user_id='UC2', display_name='Bia'))
+    await db_session.commit()
+
+    # Another persister inserted UC2 between our lookup and our insert.
+    find = giveaway_service._find_participant
+    raced = []
+
+    async def racing_find(db, giveaway_id, platform, platform_user_id):
+        if platform_user_id == 'UC2' and not raced:
+            raced.append(True)
+            return None
+        return await find(db, giveaway_id, platform, platform_user_id)
+
+    monkeypatch.setattr(giveaway_service, '_find_participant', racing_find)
+    entries = [
+        {'p': 'twitch', 'u': '1', 'n': 'Ana', 'w': '1', 't': '0'},
+        {'p': 'youtube', 'u': 'UC2', 'n': 'Bia B', 'w': '1', 't': '0'},
+        {'p': 'twitch', 'u': '3', 'n': 'Caio', 'w': '1', 't': '0'},
+    ]
+    assert await persist_entry_batch(db_session, giveaway.id, entries) == 3
+
+    assert raced
+    names = (
+        await db_session.execute(select(Participant.display_name).where(Participant.giveaway_id == giveaway.id).order_by(Participant.id))
+    ).scalars().all()
+    assert names == ['Bia B', 'Ana', 'Caio']
+    assert await db_session.scalar(select(func.count(AuditLog.id)).where(AuditLog.giveaway_id == giveaway.id)) == 3
+
+
+@pytest.mark.asyncio
+async def test_closed_giveaway_drops_queued_entries(db_session):
+    user = User(email='stream-closed@example.com', password_hash='hash')
+    db_session.add(user)
+    await db_session.flush()
+    giveaway = Giveaway(user_id=user.id, name='Closed', command='!participar', is_open=False)
+    db_session.add(giveaway)
+    await db_session.commit()
+
+    assert await persist_entry_batch(db_session, giveaway.id, [{'p': 'twitch', 'u': '1', 'n': 'Ana', 'w': '1'}]) == 0
+    assert await db_session.scalar(select(func.count(Participant.id)).where(Participant.giveaway_id == giveaway.id)) == 0
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_entries_still_queued(db_session, redis):
+    user = User(email='stream-drain@example.com', password_hash='hash')
+    db_session.add(user)
+    await db_session.flush()
+    giveaway = Giveaway(user_id=user.id, name='Drain', command='!participar', is_open=True)
+    db_session.add(giveaway)
+    await db_session.commit()
+    await append_entry(redis, giveaway.id, Platform.TWITCH, '1', 'Ana')
+    await append_entry(redis, giveaway.id, Platform.YOUTUBE, 'UC2', 'Bia')
+    # Another persister already read the first entry but has not acked it.
+    await ensure_entry_group(redis, entry_stream_key(giveaway.id))
+    await redis.xreadgroup(ENTRY_GROUP, 'busy', {entry_stream_key(giveaway.id): '>'}, count=1)
+
+    giveaway.is_open = False
+    await db_session.commit()
+    session_factory = async_sessionmaker(db_session.bind, expire_on_commit=False)
+    assert await drain_entries(redis, giveaway.id, session_factory) == 2
+
+    names = (
+        await db_session.execute(select(Participant.display_name).where(Participant.giveaway_id == giveaway.id).order_by(Participant.id))
+    ).scalars().all()
+    assert names == ['Ana', 'Bia']
+    assert (await redis.xpending(entry_stream_key(giveaway.id), ENTRY_GROUP))['pending'] == 0
@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models import Giveaway, Participant, Platform, User
+from app.workers.entry_spool import EntrySpool, _iter_records
+
+
+def test_records_round_trip_and_torn_tail_is_ignored(tmp_path):
+    spool = EntrySpool(str(tmp_path / 'spool.bin'))
+    spool.append({'g': 1, 'p': 'twitch', 'u': '1', 'n': 'Ána', 'w': 1})
+    spool.append({'g': 1, 'p': 'youtube', 'u': 'UC2', 'n': 'Bia', 'w': 2})
+    spool.close()
+    with spool.path.open('ab') as handle:
+        handle.write(b'\x00\x00\x00\x40{"g":1')
+
+    records = list(_iter_records(spool.path))
+
+    assert [record['n'] for record in records] == ['Ána', 'Bia']
+    assert spool.active is True
+
+
+@pytest.mark.asyncio
+async def test_replay_drains_in_order_and_dedupes(db_session, tmp_path):
+    user = User(email='spool@example.com', password_hash='hash')
+    db_session.add(user)
+    await db_session.flush()
+    giveaway = Giveaway(user_id=user.id, name='Spool', command='!participar', is_open=True)
+    db_session.add(giveaway)
+    await db_session.commit()
+
+    spool = EntrySpool(str(tmp_path / 'spool.bin'))
+    spool.append({'g': giveaway.id, 'p': 'twitch', 'u': '1', 'n': 'Ana', 'w': 1})
+    spool.append({'g': giveaway.id, 'p': 'twitch', 'u': '1', 'n': 'Ana Renomeada', 'w': 1})
+    spool.append({'g': giveaway.id + 99, 'p': 'twitch', 'u': '9', 'n': 'Sumiu', 'w': 1})
+
+    session_factory = async_sessionmaker(db_session.bind, expire_on_commit=False)
+    replayed = await spool.replay(session_factory)
+
+    assert [record['n'] for record in replayed[giveaway.id]] == ['Ana', 'Ana Renomeada']
+    assert list(replayed) == [giveaway.id]
+    assert spool.active is False
+    assert not spool.replay_path.exists()
+    assert spool.metrics()['replayed_total'] == 3
+    names = (await db_session.execute(select(Participant.display_name))).scalars().all()
+    assert names == ['Ana Renomeada']
+
+
+@pytest.mark.asyncio
+async def test_replay_survives_conflicts_and_skips_closed_giveaways(db_session, tmp_path, monkeypatch):
+    from app.services import giveaway_service
+
+    user = User(email='spool-race@example.com', password_hash='hash')
+    db_session.add(user)
+    await db_session.flush()
+    open_giveaway = Giveaway(user_id=user.id, name='Aberto', command='!participar', is_open=True)
+    closed_giveaway = Giveaway(user_id=user.id, name='Fechado', command='!participar', is_open=False)
+    db_session.add_all([open_giveaway, closed_giveaway])
+    await db_session.flush()
+    db_session.add(Participant(giveaway_id=open_giveaway.id, platform=Platform.TWITCH, platform_user_id='2', display_name='Bia'))
+    await db_session.commit()
+
+    # A live worker inserted user 2 between the replay's lookup and insert.
+    find = giveaway_service._find_participant
+    raced = []
+
+    async def racing_find(db, giveaway_id, platform, platform_user_id):
+        if platform_user_id == '2' and not raced:
+            raced.append(True)
+            return None
+        return await find(db, giveaway_id, platform, platform_user_id)
+
+    monkeypatch.setattr(giveaway_service, '_find_participant', racing_find)
+    spool = EntrySpool(str(tmp_path / 'spool.bin'))
+    spool.append({'g': open_giveaway.id, 'p': 'twitch', 'u': '1', 'n': 'Ana', 'w': 1})
+    spool.append({'g': open_giveaway.id, 'p': 'twitch', 'u': '2', 'n': 'Bia B', 'w': 1})
+    spool.append({'g': closed_giveaway.id, 'p': 'twitch', 'u': '3', 'n': 'Tarde', 'w': 1})
+
+    replayed = await spool.replay(async_sessionmaker(db_session.bind, expire_on_commit=False))
+
+    assert raced
+    assert list(replayed) == [open_giveaway.id]
+    rows = (
+        await db_session.execute(select(Participant.giveaway_id, Participant.display_name).order_by(Participant.id))
+    ).all()
+    assert [tuple(row) for row in rows] == [(open_giveaway.id, 'Bia B'), (open_giveaway.id, 'Ana')]
@@ -0,0 +1,56 @@
+import gzip
+import json
+
+import pytest
+
+from app.models import Giveaway, Platform, User
+from app.services.export_service import stream_participants_export
+from app.services.giveaway_service import add_or_refresh_participant
+
+
+async def _seed(db_session) -> int:
+    user = User(email='export@example.com', password_hash='hash')
+    db_session.add(user)
+    await db_session.flush()
+    giveaway = Giveaway(user_id=user.id, name='Export', command='!participar', is_open=True)
+    db_session.add(giveaway)
+    await db_session.flush()
+    await add_or_refresh_participant(db_session, giveaway.id, Platform.TWITCH, '1', 'Ana')
+    await add_or_refresh_participant(db_session, giveaway.id, Platform.YOUTUBE, 'UC2', 'Bruno, o "B"')
+    await db_session.commit()
+    return giveaway.id
+
+
+@pytest.mark.asyncio
+async def test_csv_export_streams_header_and_rows(db_session):
+    giveaway_id = await _seed(db_session)
+
+    chunks = [chunk async for chunk in stream_participants_export(db_session, giveaway_id, 'csv')]
+    lines = b''.join(chunks).decode('utf-8').splitlines()
+
+    assert lines == ['platform,platform_user_id,display_name', 'twitch,1,Ana', 'youtube,UC2,"Bruno, o ""B"""']
+
+
+@pytest.mark.asyncio
+async def test_ndjson_export_is_gzip_encoded(db_session):
+    giveaway_id = await _seed(db_session)
+
+    chunks = [chunk async for chunk in stream_participants_export(db_session, giveaway_id, 'ndjson', compress=True)]
+    rows = [json.loads(line) for line in gzip.decompress(b''.join(chunks)).decode('utf-8').splitlines()]
+
+    assert [row['display_name'] for row in rows] == ['Ana', 'Bruno, o "B"']
+    assert rows[1]['platform'] == 'youtube'
+
+
+@pytest.mark.asyncio
+async def test_json_stream_is_a_bare_list(db_session):
+    giveaway_id = await _seed(db_session)
+
+    chunks = [chunk async for chunk in stream_participants_export(db_session, giveaway_id, 'json')]
+    rows = json.loads(b''.join(chunks))
+
+    assert rows == [
+        {'platform': 'twitch', 'platform_user_id': '1', 'display_name': 'Ana'},
+        {'platform': 'youtube', 'platform_user_id': 'UC2', 'display_name': 'Bruno, o "B"'},
+    ]
+    assert json.loads(b''.join([chunk async for chunk in stream_participants_export(db_session, 999, 'json')])) == []
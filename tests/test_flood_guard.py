@@ -0,0 +1,48 @@
+from app.models import Platform
+from app.workers.flood_guard import FloodGuard, SeenMessages
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_repeated_commands_are_dropped_until_bucket_refills():
+    clock = _Clock()
+    guard = FloodGuard(user_burst=2, user_refill_seconds=5, channel_per_second=100, max_users=10, clock=clock)
+
+    results = [guard.allow(Platform.TWITCH, 'spammer') for _ in range(20)]
+    assert results.count(True) == 2
+    assert guard.allow(Platform.YOUTUBE, 'spammer') is True
+
+    clock.now += 5
+    assert guard.allow(Platform.TWITCH, 'spammer') is True
+    assert guard.take_dropped() == {'user': 18, 'channel': 0}
+    assert guard.take_dropped() == {'user': 0, 'channel': 0}
+
+
+def test_channel_cap_and_lru_bound():
+    clock = _Clock()
+    guard = FloodGuard(user_burst=1, user_refill_seconds=60, channel_per_second=3, max_users=2, clock=clock)
+
+    results = [guard.allow(Platform.TWITCH, f'viewer-{idx}') for idx in range(5)]
+
+    assert results == [True, True, True, False, False]
+    assert guard.dropped['channel'] == 2
+    assert len(guard._users) == 2
+
+
+def test_seen_messages_window_is_bounded():
+    seen = SeenMessages(max_size=2)
+
+    assert seen.seen('a') is False
+    seen.add('a')
+    assert seen.seen('a') is True
+    seen.add('b')
+    seen.add('c')
+    assert seen.seen('a') is False
+    seen.add('')
+    assert seen.seen('') is False
@@ -2,7 +2,8 @@
 from sqlalchemy import select
 
 from app.models import Giveaway, Participant, Platform, User
-from app.services.giveaway_service import add_or_refresh_participant, draw_winner
+from app.services.giveaway_service import AliasTable, add_or_refresh_participant, draw_winner, prepare_alias_table
+from app.services.giveaway_version import bump_giveaway_version
 
 
 @pytest.mark.asyncio
@@ -53,3 +54,46 @@ async def test_draw_uses_secrets_choice(db_session, monkeypatch):
     assert called['ok'] is True
     assert winner is not None
     assert winner.display_name == 'B'
+
+
+def test_alias_table_preserves_weights():
+    table = AliasTable([10, 20, 30], [1, 2, 5])
+
+    # every column's kept mass plus the mass it donates through aliases must
+    # add back up to the original weights
+    mass = {10: 0, 20: 0, 30: 0}
+    for column, participant_id in enumerate(table.participant_ids):
+        mass[participant_id] += table.prob[column]
+        mass[table.participant_ids[table.alias[column]]] += table.total - table.prob[column]
+
+    assert len(table) == 3
+    assert mass == {10: 1 * 3, 20: 2 * 3, 30: 5 * 3}
+
+
+@pytest.mark.asyncio
+async def test_weighted_draw_reuses_alias_table_until_roster_changes(db_session, redis):
+    user = User(email='u3@example.com', password_hash='hash')
+    db_session.add(user)
+    await db_session.flush()
+    giveaway = Giveaway(user_id=user.id, name='Peso', command='!participar', is_open=False, weighted_draw=True)
+    db_session.add(giveaway)
+    await db_session.flush()
+
+    await add_or_refresh_participant(db_session, giveaway.id, Platform.TWITCH, '1', 'A', weight=1)
+    await add_or_refresh_participant(db_session, giveaway.id, Platform.TWITCH, '2', 'B', weight=3)
+
+    table = await prepare_alias_table(db_session, giveaway.id, redis)
+    assert await prepare_alias_table(db_session, giveaway.id, redis) is table
+
+    winner = await draw_winner(db_session, giveaway, redis=redis)
+    assert winner is not None
+    assert winner.display_name in {'A', 'B'}
+    # Draws bump the giveaway version but leave the roster alone.
+    await bump_giveaway_version(redis, giveaway.id)
+    assert await prepare_alias_table(db_session, giveaway.id, redis) is table
+
+    await add_or_refresh_participant(db_session, giveaway.id, Platform.YOUTUBE, '3', 'C', weight=2)
+    await bump_giveaway_version(redis, giveaway.id, roster=True)
+    rebuilt = await prepare_alias_table(db_session, giveaway.id, redis)
+    assert rebuilt is not table
+    assert len(rebuilt) == 3
@@ -0,0 +1,63 @@
+import pytest
+
+from app.models import Giveaway, Participant, Platform, User, Winner
+from app.services.giveaway_summary import get_giveaway_summary, list_giveaway_summaries
+from app.services.realtime import hold_winner_reveal, release_winner_reveal
+
+
+@pytest.mark.asyncio
+async def test_summaries_carry_counts_and_latest_names(db_session):
+    user = User(email='summary@example.com', password_hash='hash')
+    other = User(email='summary-other@example.com', password_hash='hash')
+    db_session.add_all([user, other])
+    await db_session.flush()
+    busy = Giveaway(user_id=user.id, name='Busy', command='!participar', is_open=True)
+    empty = Giveaway(user_id=user.id, name='Empty', command='!participar')
+    foreign = Giveaway(user_id=other.id, name='Foreign', command='!participar')
+    db_session.add_all([busy, empty, foreign])
+    await db_session.flush()
+    db_session.add_all(
+        [
+            Participant(giveaway_id=busy.id, platform=Platform.TWITCH, platform_user_id='1', display_name='Ana'),
+            Participant(giveaway_id=busy.id, platform=Platform.YOUTUBE, platform_user_id='UC2', display_name='Bia'),
+            Winner(giveaway_id=busy.id, platform=Platform.TWITCH, platform_user_id='1', display_name='Ana'),
+        ]
+    )
+    await db_session.commit()
+
+    summaries = await list_giveaway_summaries(db_session, user.id)
+    assert [summary.giveaway.name for summary in summaries] == ['Empty', 'Busy']
+    assert summaries[0].as_dict()['participants_count'] == 0
+    assert summaries[0].last_winner is None and summaries[0].last_entrant is None
+    busy_summary = summaries[1]
+    assert (busy_summary.participants_count, busy_summary.winners_count, busy_summary.last_winner) == (2, 1, 'Ana')
+    assert busy_summary.last_entrant == 'Bia'
+
+    assert (await get_giveaway_summary(db_session, busy.id, user.id)).participants_count == 2
+    assert await get_giveaway_summary(db_session, foreign.id, user.id) is None
+
+
+@pytest.mark.asyncio
+async def test_summary_hides_winners_still_held_for_reveal(db_session, redis):
+    user = User(email='summary-reveal@example.com', password_hash='hash')
+    db_session.add(user)
+    await db_session.flush()
+    giveaway = Giveaway(user_id=user.id, name='Reveal', command='!participar')
+    db_session.add(giveaway)
+    await db_session.flush()
+    revealed = Winner(giveaway_id=giveaway.id, platform=Platform.TWITCH, platform_user_id='1', display_name='Ana')
+    db_session.add(revealed)
+    await db_session.flush()
+    held = Winner(giveaway_id=giveaway.id, platform=Platform.TWITCH, platform_user_id='2', display_name='Bia')
+    db_session.add(held)
+    await db_session.commit()
+    await hold_winner_reveal(redis, giveaway.id, held.id, 5000)
+
+    summary = await get_giveaway_summary(db_session, giveaway.id, user.id, redis)
+    assert (summary.winners_count, summary.last_winner) == (1, 'Ana')
+    (listed,) = await list_giveaway_summaries(db_session, user.id, redis)
+    assert (listed.winners_count, listed.last_winner) == (1, 'Ana')
+
+    await release_winner_reveal(redis, giveaway.id, held.id)
+    summary = await get_giveaway_summary(db_session, giveaway.id, user.id, redis)
+    assert (summary.winners_count, summary.last_winner) == (2, 'Bia')
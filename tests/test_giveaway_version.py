@@ -0,0 +1,49 @@
+import pytest
+from starlette.requests import Request
+
+from app.services.giveaway_version import bump_giveaway_version, check_not_modified
+
+
+def _request(path: str, query: str = '', if_none_match: str | None = None) -> Request:
+    headers = [(b'if-none-match', if_none_match.encode())] if if_none_match else []
+    return Request({'type': 'http', 'method': 'GET', 'path': path, 'query_string': query.encode(), 'headers': headers})
+
+
+@pytest.mark.asyncio
+async def test_matching_etag_returns_304_until_the_version_is_bumped(redis):
+    path = '/giveaways/7/participants'
+
+    etag, not_modified = await check_not_modified(_request(path), redis, 7)
+    assert not_modified is None
+
+    _, not_modified = await check_not_modified(_request(path, if_none_match=etag), redis, 7)
+    assert not_modified.status_code == 304
+    assert not_modified.headers['etag'] == etag
+
+    await bump_giveaway_version(redis, 7)
+    new_etag, not_modified = await check_not_modified(_request(path, if_none_match=etag), redis, 7)
+    assert not_modified is None
+    assert new_etag != etag
+
+
+@pytest.mark.asyncio
+async def test_etag_varies_by_query_and_giveaway(redis):
+    first, _ = await check_not_modified(_request('/overlay/7/roster-sample', 'size=10'), redis, 7)
+    second, _ = await check_not_modified(_request('/overlay/7/roster-sample', 'size=20'), redis, 7)
+    other, _ = await check_not_modified(_request('/overlay/7/roster-sample', 'size=10'), redis, 8)
+
+    assert len({first, second, other}) == 3
+    _, not_modified = await check_not_modified(
+        _request('/overlay/7/roster-sample', 'size=20', if_none_match=f'"x", {first}'), redis, 7
+    )
+    assert not_modified is None
+
+
+@pytest.mark.asyncio
+async def test_etag_includes_the_resolved_variant(redis):
+    request = _request('/overlay/7/roster-sample', 'token=t')
+
+    default, _ = await check_not_modified(request, redis, 7, variant='random:48')
+    stratified, _ = await check_not_modified(request, redis, 7, variant='stratified:48')
+
+    assert default != stratified
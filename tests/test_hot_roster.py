@@ -0,0 +1,152 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models import AuditLog, Giveaway, Participant, Platform, User
+from app.services import hot_roster
+from app.services.entry_stream import entry_stream_key
+from app.services.giveaway_service import draw_winner
+from app.services.realtime import build_giveaway_state
+from app.workers.entry_persister import EntryPersister
+
+
+async def _open_giveaway(db_session, email):
+    user = User(email=email, password_hash='hash')
+    db_session.add(user)
+    await db_session.flush()
+    giveaway = Giveaway(user_id=user.id, name='Hot', command='!participar', is_open=True)
+    db_session.add(giveaway)
+    await db_session.flush()
+    db_session.add(Participant(giveaway_id=giveaway.id, platform=Platform.TWITCH, platform_user_id='1', display_name='Ana'))
+    await db_session.commit()
+    return giveaway
+
+
+@pytest.mark.asyncio
+async def test_hot_roster_serves_state_and_flushes_to_table(db_session, redis):
+    giveaway = await _open_giveaway(db_session, 'hot@example.com')
+    await hot_roster.activate(redis, db_session, giveaway.id)
+
+    assert await hot_roster.add_entry(redis, giveaway.id, Platform.YOUTUBE, 'UC2', 'Bia', 2) is True
+    assert await hot_roster.add_entry(redis, giveaway.id, Platform.TWITCH, '1', 'Ana B') is False
+
+    state = await build_giveaway_state(db_session, giveaway.id, redis=redis)
+    assert state['participants_count'] == 2
+    assert state['participant_names'] == ['Ana B', 'Bia']
+    assert state['latest_participant'] in {'Ana B', 'Bia'}
+    assert await db_session.scalar(select(Participant.display_name).where(Participant.platform_user_id == '1')) == 'Ana'
+
+    assert await hot_roster.flush(redis, db_session, giveaway.id) == 2
+    assert await hot_roster.flush(redis, db_session, giveaway.id) == 0
+    rows = (
+        await db_session.execute(
+            select(Participant.platform_user_id, Participant.display_name, Participant.weight)
+            .where(Participant.giveaway_id == giveaway.id)
+            .order_by(Participant.id)
+        )
+    ).all()
+    assert [tuple(row) for row in rows] == [('1', 'Ana B', 1), ('UC2', 'Bia', 2)]
+
+    await hot_roster.flush_and_deactivate(redis, db_session, giveaway.id)
+    assert not await hot_roster.is_hot(redis, giveaway.id)
+    state = await build_giveaway_state(db_session, giveaway.id, redis=redis)
+    assert state['participants_count'] == 2
+
+
+@pytest.mark.asyncio
+async def test_hot_draw_flushes_before_picking(db_session, redis):
+    giveaway = await _open_giveaway(db_session, 'hotdraw@example.com')
+    await hot_roster.activate(redis, db_session, giveaway.id)
+    await hot_roster.clear(redis, giveaway.id)
+    await hot_roster.add_entry(redis, giveaway.id, Platform.YOUTUBE, 'UC9', 'Caio')
+
+    winner = await draw_winner(db_session, giveaway, redis=redis)
+
+    assert (winner.platform, winner.platform_user_id, winner.display_name) == (Platform.YOUTUBE, 'UC9', 'Caio')
+    assert await db_session.scalar(select(Participant.display_name).where(Participant.platform_user_id == 'UC9')) == 'Caio'
+
+
+@pytest.mark.asyncio
+async def test_background_flush_skips_locked_giveaway(db_session, redis):
+    giveaway = await _open_giveaway(db_session, 'hotlock@example.com')
+    await hot_roster.activate(redis, db_session, giveaway.id)
+    await hot_roster.add_entry(redis, giveaway.id, Platform.YOUTUBE, 'UC3', 'Duda')
+    await redis.set(hot_roster._flush_lock_key(giveaway.id), 'other-worker')
+
+    assert await hot_roster.flush(redis, db_session, giveaway.id, wait=False) == 0
+    assert await redis.smembers(hot_roster._dirty_key(giveaway.id)) == {'youtube:UC3'}
+
+    await redis.delete(hot_roster._flush_lock_key(giveaway.id))
+    assert await hot_roster.flush(redis, db_session, giveaway.id) == 1
+    assert await redis.get(hot_roster._flush_lock_key(giveaway.id)) is None
+
+
+@pytest.mark.asyncio
+async def test_flush_tolerates_rows_inserted_concurrently(db_session, redis):
+    giveaway = await _open_giveaway(db_session, 'hotrace@example.com')
+    await hot_roster.activate(redis, db_session, giveaway.id)
+    await hot_roster.add_entry(redis, giveaway.id, Platform.YOUTUBE, 'UC4', 'Eva')
+    await hot_roster.add_entry(redis, giveaway.id, Platform.YOUTUBE, 'UC5', 'Fábio')
+
+    # Another writer inserts UC5 after the flush looked for existing rows.
+    existing = hot_roster._existing_participants
+
+    async def racing_existing(db, giveaway_id, keys):
+        found = await existing(db, giveaway_id, keys)
+        if (Platform.YOUTUBE, 'UC5') in keys and len(keys) > 1:
+            db.add(Participant(giveaway_id=giveaway_id, platform=Platform.YOUTUBE, platform_user_id='UC5', display_name='Fabio'))
+            await db.flush()
+        return found
+
+    hot_roster._existing_participants = racing_existing
+    try:
+        assert await hot_roster.flush(redis, db_session, giveaway.id) == 2
+    finally:
+        hot_roster._existing_participants = existing
+
+    rows = (
+        await db_session.execute(
+            select(Participant.platform_user_id, Participant.display_name)
+            .where(Participant.giveaway_id == giveaway.id)
+            .order_by(Participant.platform_user_id)
+        )
+    ).all()
+    assert [tuple(row) for row in rows] == [('1', 'Ana'), ('UC4', 'Eva'), ('UC5', 'Fábio')]
+
+
+@pytest.mark.asyncio
+async def test_reactivating_keeps_unflushed_entries_and_audits_flush(db_session, redis):
+    giveaway = await _open_giveaway(db_session, 'hotagain@example.com')
+    await hot_roster.activate(redis, db_session, giveaway.id)
+    await hot_roster.add_entry(redis, giveaway.id, Platform.YOUTUBE, 'UC3', 'Duda')
+    await hot_roster.activate(redis, db_session, giveaway.id)
+
+    assert await hot_roster.flush(redis, db_session, giveaway.id) == 1
+    assert await db_session.scalar(select(Participant.display_name).where(Participant.platform_user_id == 'UC3')) == 'Duda'
+    payloads = (
+        await db_session.execute(
+            select(AuditLog.payload_json).where(AuditLog.giveaway_id == giveaway.id, AuditLog.action == 'participant_seen')
+        )
+    ).scalars().all()
+    assert payloads == [{'platform': 'youtube', 'platform_user_id': 'UC3', 'created': True, 'hot': True}]
+
+
+@pytest.mark.asyncio
+async def test_stream_pipeline_feeds_hot_roster(db_session, redis):
+    giveaway = await _open_giveaway(db_session, 'hotstream@example.com')
+    await hot_roster.activate(redis, db_session, giveaway.id)
+    persister = EntryPersister(redis, 'test', async_sessionmaker(db_session.bind, expire_on_commit=False))
+
+    await persister.handle(
+        entry_stream_key(giveaway.id),
+        [('1-0', {'p': 'youtube', 'u': 'UC4', 'n': 'Eva', 'w': '1', 't': '1700000000000'})],
+    )
+
+    state = await build_giveaway_state(db_session, giveaway.id, redis=redis)
+    assert state['participants_count'] == 2
+    assert 'Eva' in state['participant_names']
+    # Already in the table: the mirror must not queue it for another write.
+    assert await hot_roster.flush(redis, db_session, giveaway.id) == 0
+    giveaway.weighted_draw = True
+    winners = {(await draw_winner(db_session, giveaway, redis=redis)).display_name for _ in range(30)}
+    assert winners == {'Ana', 'Eva'}
@@ -0,0 +1,45 @@
+import httpx
+import pytest
+
+from app.services import oauth_service
+
+
+@pytest.mark.asyncio
+async def test_known_channel_skips_channels_lookup():
+    paths = []
+
+    def google(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        if request.url.path.endswith('/search'):
+            return httpx.Response(200, json={'items': [{'id': {'videoId': 'vid1'}}]})
+        return httpx.Response(
+            200,
+            json={'items': [{'liveStreamingDetails': {'activeLiveChatId': 'chat1'}, 'snippet': {'title': 'Live'}}]},
+        )
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(google)) as client:
+        discovered = await oauth_service._lookup_live_chat_id(client, 'token', None, 'UC123')
+
+    assert discovered == ('chat1', 'Live')
+    assert paths == ['/youtube/v3/search', '/youtube/v3/videos']
+
+
+@pytest.mark.asyncio
+async def test_discovery_results_are_cached_including_misses(monkeypatch, redis):
+    calls = []
+
+    async def fake_lookup(client, access_token, video_id, channel_id):
+        calls.append((video_id, channel_id))
+        return None if video_id == 'offline' else ('chat9', 'Title')
+
+    monkeypatch.setattr(oauth_service, '_lookup_live_chat_id', fake_lookup)
+
+    assert await oauth_service.get_google_live_chat_id('t', 'offline', redis=redis) is None
+    assert await oauth_service.get_google_live_chat_id('t', 'offline', redis=redis) is None
+    assert await oauth_service.get_google_live_chat_id('t', channel_id='UC1', redis=redis) == ('chat9', 'Title')
+    assert await oauth_service.read_live_chat_cache(redis, channel_id='UC1') == (True, ('chat9', 'Title'))
+
+    assert calls == [('offline', None), (None, 'UC1')]
+    settings = oauth_service.settings
+    assert await redis.ttl('youtube:live_chat:video:offline') == settings.youtube_live_chat_negative_cache_seconds
+    assert await redis.ttl('youtube:live_chat:channel:UC1') == settings.youtube_live_chat_cache_seconds
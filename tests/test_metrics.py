@@ -0,0 +1,60 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.ops import ops_status
+from app.core.metrics import HTTP_REQUEST_DURATION, Counter, Histogram, PrometheusMiddleware, Registry
+from app.models import Platform
+from app.services.entry_stream import append_entry
+from app.workers.entry_spool import SPOOL_METRICS_KEY
+
+
+def test_registry_renders_exposition_format():
+    registry = Registry()
+    latency = registry.register(Histogram('demo_seconds', 'Demo latency.', ('route',), buckets=(0.1, 1.0)))
+    hits = registry.register(Counter('demo_total', 'Demo hits.', ('path',)))
+    latency.observe(0.05, route='/a')
+    latency.observe(0.5, route='/a')
+    latency.observe(3.0, route='/a')
+    hits.inc(path='say "hi"\n')
+
+    text = registry.render()
+
+    assert '# TYPE demo_seconds histogram' in text
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{route="/a"} 3' in text
+    assert 'demo_seconds_sum{route="/a"} 3.55' in text
+    assert 'demo_total{path="say \\"hi\\"\\n"} 1' in text
+
+
+def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+    app.add_middleware(PrometheusMiddleware)
+
+    @app.get('/items/{item_id}')
+    async def item(item_id: int):
+        return {'id': item_id}
+
+    with TestClient(app) as client:
+        client.get('/items/1')
+        client.get('/items/2')
+
+    counts, _ = HTTP_REQUEST_DURATION.series[('GET', '/items/{item_id}', '200')]
+    assert sum(counts) == 2
+
+
+@pytest.mark.asyncio
+async def test_status_reports_only_aggregates(redis):
+    await append_entry(redis, 4242, Platform.TWITCH, '1', 'Ana')
+    await redis.hset(SPOOL_METRICS_KEY, 'host-a-123', json.dumps({'size_bytes': 10, 'spooled_total': 2, 'replayed_total': 1}))
+    await redis.hset(SPOOL_METRICS_KEY, 'host-b-456', json.dumps({'size_bytes': 5, 'spooled_total': 1, 'replayed_total': 1}))
+
+    status = await ops_status(redis)
+
+    assert status['entry_pipeline']['streams'] == 1
+    assert status['chat_spool'] == {'workers': 2, 'size_bytes': 15, 'spooled_total': 3, 'replayed_total': 2}
+    assert '4242' not in json.dumps(status) and 'host-a' not in json.dumps(status)
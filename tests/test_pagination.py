@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.models import Giveaway, Participant, Platform, User
+from app.services.giveaway_service import add_or_refresh_participant
+from app.services.pagination import fetch_keyset_page
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_and_since_polling(db_session):
+    user = User(email='u4@example.com', password_hash='hash')
+    db_session.add(user)
+    await db_session.flush()
+    giveaway = Giveaway(user_id=user.id, name='Paginas', command='!participar', is_open=True)
+    db_session.add(giveaway)
+    await db_session.flush()
+    for idx in range(5):
+        await add_or_refresh_participant(db_session, giveaway.id, Platform.TWITCH, str(idx), f'P{idx}')
+
+    stmt = select(Participant.id, Participant.display_name, Participant.first_seen).where(
+        Participant.giveaway_id == giveaway.id
+    )
+    first = await fetch_keyset_page(db_session, stmt, Participant.first_seen, Participant.id, limit=3)
+    second = await fetch_keyset_page(
+        db_session, stmt, Participant.first_seen, Participant.id, limit=3, cursor=first['next_cursor']
+    )
+    assert [row.display_name for row in first['rows']] == ['P4', 'P3', 'P2']
+    assert [row.display_name for row in second['rows']] == ['P1', 'P0']
+    assert second['next_cursor'] is None
+
+    await add_or_refresh_participant(db_session, giveaway.id, Platform.YOUTUBE, 'new', 'P5')
+    polled = await fetch_keyset_page(
+        db_session, stmt, Participant.first_seen, Participant.id, since=first['poll_cursor']
+    )
+    assert [row.display_name for row in polled['rows']] == ['P5']
+    assert polled['poll_cursor'] != first['poll_cursor']
+
+
+@pytest.mark.asyncio
+async def test_since_polling_does_not_skip_rows_with_older_timestamps(db_session):
+    user = User(email='u5@example.com', password_hash='hash')
+    db_session.add(user)
+    await db_session.flush()
+    giveaway = Giveaway(user_id=user.id, name='Atraso', command='!participar', is_open=True)
+    db_session.add(giveaway)
+    await db_session.flush()
+    await add_or_refresh_participant(db_session, giveaway.id, Platform.TWITCH, '1', 'A')
+    stmt = select(Participant.id, Participant.display_name, Participant.first_seen).where(
+        Participant.giveaway_id == giveaway.id
+    )
+    first = await fetch_keyset_page(db_session, stmt, Participant.first_seen, Participant.id)
+
+    # A writer that stamped first_seen earlier but committed after the poll.
+    late, _ = await add_or_refresh_participant(db_session, giveaway.id, Platform.TWITCH, '2', 'B')
+    late.first_seen = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    await db_session.flush()
+
+    polled = await fetch_keyset_page(db_session, stmt, Participant.first_seen, Participant.id, since=first['poll_cursor'])
+    assert [row.display_name for row in polled['rows']] == ['B']
@@ -0,0 +1,30 @@
+import pytest
+
+from app.core import security
+from app.core.config import get_settings
+from app.core.metrics import REGISTRY
+
+
+@pytest.mark.asyncio
+async def test_async_hash_round_trip():
+    password_hash = await security.hash_password_async('s3nha-forte')
+
+    assert await security.verify_password_async('s3nha-forte', password_hash) is True
+    assert await security.verify_password_async('errada', password_hash) is False
+    assert security.get_password_hash_metrics()['pending'] == 0
+
+
+@pytest.mark.asyncio
+async def test_hashing_sheds_load_past_pending_cap(monkeypatch):
+    monkeypatch.setattr(get_settings(), 'password_hash_max_pending', 1)
+    monkeypatch.setattr(security, '_password_pending', 1)
+    rejected = security.get_password_hash_metrics()['rejected_total']
+
+    with pytest.raises(security.PasswordHasherBusy):
+        await security.hash_password_async('s3nha-forte')
+
+    assert security.get_password_hash_metrics()['rejected_total'] == rejected + 1
+    text = REGISTRY.render()
+    assert f'liveroll_password_hash_rejections_total {rejected + 1}' in text
+    assert f'liveroll_password_hash_workers {get_settings().password_hash_workers}' in text
+    assert 'state="workers"' not in text
@@ -0,0 +1,94 @@
+import pytest
+from fastapi import HTTPException
+from redis.exceptions import ConnectionError as RedisConnectionError
+from starlette.requests import Request
+
+from app.core.config import get_settings
+from app.core.rate_limit import RateLimiter
+
+
+class _StubScript:
+    def __init__(self, client):
+        self.registered_client = client
+
+    async def __call__(self, keys, args):
+        self.registered_client.calls += 1
+        if self.registered_client.error:
+            raise self.registered_client.error
+        return self.registered_client.reply
+
+
+class _StubRedis:
+    def __init__(self, reply=(1, '0'), error=None):
+        self.reply = list(reply)
+        self.error = error
+        self.calls = 0
+
+    def register_script(self, source):
+        return _StubScript(self)
+
+
+def _request() -> Request:
+    return Request({'type': 'http', 'client': ('10.0.0.1', 1234), 'session': {'user_id': 7}, 'headers': []})
+
+
+@pytest.mark.asyncio
+async def test_local_bucket_rejects_without_touching_redis():
+    limiter = RateLimiter('test', max_requests=2, window_seconds=60)
+    redis = _StubRedis(reply=(1, '1'))
+
+    await limiter(_request(), redis)
+    await limiter(_request(), redis)
+    with pytest.raises(HTTPException) as exc:
+        await limiter(_request(), redis)
+
+    assert exc.value.status_code == 429
+    assert int(exc.value.headers['Retry-After']) >= 1
+    assert redis.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_verdict_is_mirrored_locally():
+    limiter = RateLimiter('test', max_requests=5, window_seconds=60)
+    redis = _StubRedis(reply=(0, '0.2'))
+
+    with pytest.raises(HTTPException):
+        await limiter(_request(), redis)
+    with pytest.raises(HTTPException):
+        await limiter(_request(), redis)
+
+    assert redis.calls == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(('fail_open', 'expected_status'), [(True, None), (False, 503)])
+async def test_redis_outage_honours_fail_mode(monkeypatch, fail_open, expected_status):
+    monkeypatch.setattr(get_settings(), 'rate_limit_fail_open', fail_open)
+    limiter = RateLimiter('test', max_requests=5, window_seconds=60)
+    redis = _StubRedis(error=RedisConnectionError('down'))
+
+    if expected_status is None:
+        await limiter(_request(), redis)
+    else:
+        with pytest.raises(HTTPException) as exc:
+            await limiter(_request(), redis)
+        assert exc.value.status_code == expected_status
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_script_is_shared_between_processes(redis):
+    # Two limiters stand in for two API processes: each local bucket still has
+    # tokens, but the Lua bucket in Redis is global.
+    first = RateLimiter('lua', max_requests=3, window_seconds=60)
+    second = RateLimiter('lua', max_requests=3, window_seconds=60)
+
+    await first(_request(), redis)
+    await first(_request(), redis)
+    await second(_request(), redis)
+    with pytest.raises(HTTPException) as exc:
+        await second(_request(), redis)
+
+    assert exc.value.status_code == 429
+    tokens = float(await redis.hget('ratelimit:lua:7:10.0.0.1', 'tokens'))
+    assert 0 <= tokens < 1
+    assert 0 < await redis.ttl('ratelimit:lua:7:10.0.0.1') <= 60
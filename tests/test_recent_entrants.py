@@ -0,0 +1,35 @@
+import pytest
+
+from app.models import Giveaway, Platform, User
+from app.services.realtime import build_giveaway_state
+from app.services.recent_entrants import latest_entrants, record_entrant, record_entrants
+
+
+@pytest.mark.asyncio
+async def test_ring_is_capped_and_feeds_state(db_session, monkeypatch, redis):
+    monkeypatch.setattr('app.services.recent_entrants.settings.recent_entrants_size', 3)
+    user = User(email='ring@example.com', password_hash='hash')
+    db_session.add(user)
+    await db_session.flush()
+    giveaway = Giveaway(user_id=user.id, name='Ring', command='!participar', is_open=True)
+    db_session.add(giveaway)
+    await db_session.commit()
+
+    for uid, name in [('1', 'Ana'), ('2', 'Bia'), ('1', 'Ana'), ('3', 'Caio'), ('4', 'Duda')]:
+        await record_entrant(redis, giveaway.id, Platform.TWITCH, uid, name)
+
+    assert await redis.llen(f'giveaway:{giveaway.id}:recent_entrants') == 3
+    assert [entrant['display_name'] for entrant in await latest_entrants(redis, giveaway.id, 10)] == ['Duda', 'Caio', 'Ana']
+    state = await build_giveaway_state(db_session, giveaway.id, redis=redis)
+    assert state['latest_participant'] == 'Duda'
+    assert state['recent_entrants'] == ['Duda', 'Caio', 'Ana']
+
+
+@pytest.mark.asyncio
+async def test_persisted_batches_are_recorded_in_arrival_order(redis):
+    # Stream fields and spool records carry the same short keys.
+    batch = [{'p': 'twitch', 'u': '1', 'n': 'Ana', 'w': '1'}, {'g': 7, 'p': 'youtube', 'u': 'UC2', 'n': 'Bia'}]
+    await record_entrants(redis, 7, batch)
+    await record_entrants(redis, 7, [])
+
+    assert [entrant['display_name'] for entrant in await latest_entrants(redis, 7, 10)] == ['Bia', 'Ana']
@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import get_settings
+from app.core.security import decrypt_value, encrypt_value, get_keyring
+from app.models import OAuthAccount, OAuthProvider, User
+from app.workers.reencrypt_tokens import reencrypt_oauth_accounts
+
+OLD_KEY = 'old_token_encryption_key_for_rotation_tests'
+NEW_KEY = 'new_token_encryption_key_for_rotation_tests'
+
+
+@pytest.fixture
+def rotate_keys(monkeypatch):
+    settings = get_settings()
+
+    def use(current: str, previous: str = '') -> None:
+        monkeypatch.setattr(settings, 'token_encryption_key', current)
+        monkeypatch.setattr(settings, 'token_encryption_previous_keys', previous)
+        get_keyring.cache_clear()
+
+    yield use
+    monkeypatch.undo()
+    get_keyring.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_reencrypt_moves_tokens_to_current_key(db_session, rotate_keys):
+    rotate_keys(OLD_KEY)
+    user = User(email='rotate@example.com', password_hash='hash')
+    db_session.add(user)
+    await db_session.flush()
+    for provider, refresh in ((OAuthProvider.TWITCH, 'twitch-refresh'), (OAuthProvider.GOOGLE, None)):
+        db_session.add(
+            OAuthAccount(
+                user_id=user.id,
+                provider=provider,
+                provider_user_id=f'{provider.value}-id',
+                access_token_enc=encrypt_value(f'{provider.value}-access'),
+                refresh_token_enc=encrypt_value(refresh) if refresh else None,
+                scopes='',
+            )
+        )
+    await db_session.commit()
+
+    rotate_keys(NEW_KEY, previous=OLD_KEY)
+    session_factory = async_sessionmaker(db_session.bind, expire_on_commit=False)
+    counts = await reencrypt_oauth_accounts(session_factory, batch_size=1)
+    assert counts == {'rotated': 2, 'failed': 0}
+
+    rotate_keys(NEW_KEY)
+    db_session.expire_all()
+    accounts = {account.provider: account for account in (await db_session.execute(OAuthAccount.__table__.select())).all()}
+    assert decrypt_value(accounts[OAuthProvider.TWITCH].access_token_enc) == 'twitch-access'
+    assert decrypt_value(accounts[OAuthProvider.TWITCH].refresh_token_enc) == 'twitch-refresh'
+    assert decrypt_value(accounts[OAuthProvider.GOOGLE].access_token_enc) == 'google-access'
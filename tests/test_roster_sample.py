@@ -0,0 +1,60 @@
+import pytest
+
+from app.core.config import get_settings
+from app.models import Giveaway, Participant, Platform, User
+from app.services.realtime import build_giveaway_state
+from app.services.roster_sample import sample_roster
+
+
+async def _giveaway_with_entrants(db_session, total):
+    user = User(email='sample@example.com', password_hash='hash')
+    db_session.add(user)
+    await db_session.flush()
+    giveaway = Giveaway(user_id=user.id, name='Sample', command='!participar', is_open=True)
+    db_session.add(giveaway)
+    await db_session.flush()
+    for index in range(total):
+        db_session.add(
+            Participant(giveaway_id=giveaway.id, platform=Platform.TWITCH, platform_user_id=str(index), display_name=f'user{index}')
+        )
+    await db_session.commit()
+    return giveaway
+
+
+@pytest.mark.asyncio
+async def test_sample_is_bounded_and_cached_per_version(db_session, redis):
+    giveaway = await _giveaway_with_entrants(db_session, 30)
+
+    stratified = await sample_roster(db_session, redis, giveaway.id, size=10, mode='stratified')
+    assert stratified['total'] == 30
+    assert stratified['names'] == [f'user{index}' for index in range(0, 30, 3)]
+
+    first = await sample_roster(db_session, redis, giveaway.id, size=10)
+    assert first['total'] == 30 and len(first['names']) == 10
+    assert len(set(first['names'])) == 10
+    assert await sample_roster(db_session, redis, giveaway.id, size=10) == first
+
+    small = await sample_roster(db_session, redis, giveaway.id, size=500)
+    assert len(small['names']) == 30
+
+
+@pytest.mark.asyncio
+async def test_stratified_sample_fills_every_slot(db_session, redis):
+    giveaway = await _giveaway_with_entrants(db_session, 81)
+
+    sample = await sample_roster(db_session, redis, giveaway.id, size=80, mode='stratified')
+
+    assert len(sample['names']) == 80
+    assert sample['names'][0] == 'user0' and sample['names'][-1] == 'user79'
+    assert len(set(sample['names'])) == 80
+
+
+@pytest.mark.asyncio
+async def test_state_carries_a_bounded_sample(db_session, redis, monkeypatch):
+    monkeypatch.setattr(get_settings(), 'roster_sample_default_size', 6)
+    giveaway = await _giveaway_with_entrants(db_session, 30)
+
+    state = await build_giveaway_state(db_session, giveaway.id, redis=redis)
+
+    assert state['participants_count'] == 30
+    assert state['participant_names'] == [f'user{index}' for index in range(0, 30, 5)]
@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from app.models import Platform
+from app.workers.chat_worker import GiveawayRunner, RunnerManager
+
+
+@pytest.mark.asyncio
+async def test_parked_runner_wakes_on_oauth_signal_only_for_its_user():
+    manager = RunnerManager(redis=None)
+    runner = GiveawayRunner(1)
+    runner.user_id = 42
+    manager.runners[1] = runner
+
+    parked = asyncio.create_task(runner._park(Platform.TWITCH))
+    await asyncio.sleep(0)
+    manager.notify_credentials(7, 'twitch')
+    manager.notify_credentials(42, 'google')
+    await asyncio.sleep(0)
+    assert not parked.done()
+
+    manager.notify_credentials(42, 'twitch')
+    assert await asyncio.wait_for(parked, timeout=1) is True
+    assert not runner.wakeups[Platform.TWITCH].is_set()
+
+
+@pytest.mark.asyncio
+async def test_stream_probe_times_out_unless_video_changes():
+    manager = RunnerManager(redis=None)
+    runner = GiveawayRunner(5)
+    manager.runners[5] = runner
+
+    assert await runner._park(Platform.YOUTUBE, timeout=0.01) is False
+
+    parked = asyncio.create_task(runner._park(Platform.YOUTUBE, timeout=5))
+    await asyncio.sleep(0)
+    manager.notify_video_changed(5)
+    assert await asyncio.wait_for(parked, timeout=1) is True
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.security import decrypt_value, encrypt_value
+from app.models import OAuthAccount, OAuthProvider, User
+from app.services.oauth_service import save_oauth_account
+from app.services.token_refresh import TokenRefreshScheduler
+
+
+async def _seed_account(db_session) -> int:
+    user = User(email='refresh@example.com', password_hash='hash')
+    db_session.add(user)
+    await db_session.flush()
+    account = OAuthAccount(
+        user_id=user.id,
+        provider=OAuthProvider.GOOGLE,
+        provider_user_id='UC123',
+        access_token_enc=encrypt_value('old-access'),
+        refresh_token_enc=encrypt_value('refresh-1'),
+        expires_at=datetime.now(timezone.utc) + timedelta(seconds=30),
+        scopes='youtube.readonly',
+    )
+    db_session.add(account)
+    await db_session.commit()
+    return account.id
+
+
+def _scheduler(db_session, handler) -> TokenRefreshScheduler:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    session_factory = async_sessionmaker(db_session.bind, expire_on_commit=False)
+    return TokenRefreshScheduler(None, session_factory=session_factory, client=client)
+
+
+@pytest.mark.asyncio
+async def test_refresh_account_swaps_expiring_token(db_session):
+    account_id = await _seed_account(db_session)
+    seen = []
+
+    def token_endpoint(request: httpx.Request) -> httpx.Response:
+        seen.append(request.content.decode())
+        return httpx.Response(200, json={'access_token': 'new-access', 'expires_in': 3600})
+
+    scheduler = _scheduler(db_session, token_endpoint)
+    await scheduler.reload()
+    assert [entry[1] for entry in scheduler._heap] == [account_id]
+    scheduler._heap.clear()
+
+    assert await scheduler.refresh_account(account_id) is True
+    assert 'refresh_token=refresh-1' in seen[0]
+
+    account = await db_session.get(OAuthAccount, account_id)
+    await db_session.refresh(account)
+    assert decrypt_value(account.access_token_enc) == 'new-access'
+    assert decrypt_value(account.refresh_token_enc) == 'refresh-1'
+    assert scheduler._heap[0][0] > datetime.now(timezone.utc).timestamp()
+
+
+@pytest.mark.asyncio
+async def test_revoked_refresh_token_marks_account_invalid(db_session):
+    account_id = await _seed_account(db_session)
+    scheduler = _scheduler(db_session, lambda request: httpx.Response(400, json={'error': 'invalid_grant'}))
+
+    assert await scheduler.refresh_account(account_id) is False
+
+    account = await db_session.get(OAuthAccount, account_id)
+    await db_session.refresh(account)
+    assert account.token_valid is False
+    assert account.refresh_revoked_at is not None
+    assert scheduler._heap == []
+
+
+@pytest.mark.asyncio
+async def test_invalid_access_token_is_still_refreshed(db_session):
+    account_id = await _seed_account(db_session)
+    account = await db_session.get(OAuthAccount, account_id)
+    account.token_valid = False
+    await db_session.commit()
+    scheduler = _scheduler(db_session, lambda request: httpx.Response(200, json={'access_token': 'new-access', 'expires_in': 3600}))
+
+    await scheduler.reload()
+    assert [entry[1] for entry in scheduler._heap] == [account_id]
+    assert await scheduler.refresh_account(account_id) is True
+
+    await db_session.refresh(account)
+    assert account.token_valid is True
+
+
+@pytest.mark.asyncio
+async def test_reload_skips_rejected_refresh_tokens(db_session):
+    account_id = await _seed_account(db_session)
+    calls = []
+    scheduler = _scheduler(db_session, lambda request: calls.append(request) or httpx.Response(400, json={}))
+
+    assert await scheduler.refresh_account(account_id) is False
+    await scheduler.reload()
+    assert scheduler._heap == []
+
+    # Reconnecting stores a fresh refresh token and brings the account back.
+    account = await db_session.get(OAuthAccount, account_id)
+    await db_session.refresh(account)
+    await save_oauth_account(
+        db_session,
+        user_id=account.user_id,
+        provider=account.provider,
+        access_token='reconnected',
+        refresh_token='refresh-2',
+        provider_user_id=account.provider_user_id,
+        expires_in=30,
+        scopes=account.scopes,
+    )
+    await db_session.commit()
+    await scheduler.reload()
+    assert [entry[1] for entry in scheduler._heap] == [account_id]
+    assert len(calls) == 1
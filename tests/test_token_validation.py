@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.security import encrypt_value
+from app.models import OAuthAccount, OAuthProvider, User
+from app.services.token_validation import revalidate_twitch_tokens
+
+
+async def _seed_accounts(db_session) -> dict[str, int]:
+    tokens = {'valid': encrypt_value('good'), 'revoked': encrypt_value('revoked'), 'garbled': 'not-a-fernet-token'}
+    ids = {}
+    for name, access_token_enc in tokens.items():
+        user = User(email=f'{name}@example.com', password_hash='hash')
+        db_session.add(user)
+        await db_session.flush()
+        account = OAuthAccount(
+            user_id=user.id, provider=OAuthProvider.TWITCH, provider_user_id=name, access_token_enc=access_token_enc
+        )
+        db_session.add(account)
+        await db_session.flush()
+        ids[name] = account.id
+    await db_session.commit()
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_revalidation_records_verdicts_and_survives_undecryptable_tokens(db_session):
+    ids = await _seed_accounts(db_session)
+    seen = []
+
+    def validate_endpoint(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers['Authorization'])
+        status = 200 if request.headers['Authorization'] == 'OAuth good' else 401
+        return httpx.Response(status, json={})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(validate_endpoint))
+    session_factory = async_sessionmaker(db_session.bind, expire_on_commit=False)
+
+    counts = await revalidate_twitch_tokens(3600, session_factory=session_factory, client=client)
+
+    assert counts == {'checked': 3, 'invalid': 2, 'unknown': 0, 'expired': 0}
+    assert sorted(seen) == ['OAuth good', 'OAuth revoked']
+    rows = dict((await db_session.execute(select(OAuthAccount.id, OAuthAccount.token_valid))).all())
+    assert rows == {ids['valid']: True, ids['revoked']: False, ids['garbled']: False}
+
+    # Freshly validated accounts are left alone on the next pass.
+    assert await revalidate_twitch_tokens(3600, session_factory=session_factory, client=client) == {
+        'checked': 0,
+        'invalid': 0,
+        'unknown': 0,
+        'expired': 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_unreachable_twitch_keeps_previous_verdict(db_session):
+    ids = await _seed_accounts(db_session)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(503)))
+    session_factory = async_sessionmaker(db_session.bind, expire_on_commit=False)
+
+    counts = await revalidate_twitch_tokens(3600, session_factory=session_factory, client=client)
+
+    assert counts == {'checked': 1, 'invalid': 1, 'unknown': 2, 'expired': 0}
+    account = await db_session.get(OAuthAccount, ids['valid'])
+    await db_session.refresh(account)
+    assert account.token_valid is None
+    assert account.validated_at is None
+
+
+@pytest.mark.asyncio
+async def test_expired_token_with_refresh_token_is_handed_to_refresher(db_session):
+    ids = await _seed_accounts(db_session)
+    refreshable = await db_session.get(OAuthAccount, ids['revoked'])
+    refreshable.refresh_token_enc = encrypt_value('refresh')
+    refreshable.expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    await db_session.commit()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(401, json={})))
+    session_factory = async_sessionmaker(db_session.bind, expire_on_commit=False)
+
+    counts = await revalidate_twitch_tokens(3600, session_factory=session_factory, client=client)
+
+    assert counts == {'checked': 3, 'invalid': 2, 'unknown': 0, 'expired': 1}
+    await db_session.refresh(refreshable)
+    # Not marked invalid: the refresher now sees it as due.
+    assert refreshable.token_valid is None
+    assert refreshable.expires_at.replace(tzinfo=timezone.utc) <= datetime.now(timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_verdict_is_not_written_over_a_newer_token(db_session):
+    ids = await _seed_accounts(db_session)
+    session_factory = async_sessionmaker(db_session.bind, expire_on_commit=False)
+
+    async def validate_endpoint(request: httpx.Request) -> httpx.Response:
+        # The user reconnects while Twitch is still answering about the old token.
+        if request.headers['Authorization'] == 'OAuth revoked':
+            async with session_factory() as db:
+                account = await db.get(OAuthAccount, ids['revoked'])
+                account.access_token_enc = encrypt_value('reconnected')
+                account.token_valid = True
+                await db.commit()
+        return httpx.Response(200 if request.headers['Authorization'] == 'OAuth good' else 401, json={})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(validate_endpoint))
+    await revalidate_twitch_tokens(3600, session_factory=session_factory, client=client)
+
+    rows = dict((await db_session.execute(select(OAuthAccount.id, OAuthAccount.token_valid))).all())
+    assert rows == {ids['valid']: True, ids['revoked']: True, ids['garbled']: False}
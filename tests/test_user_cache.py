@@ -0,0 +1,66 @@
+import json
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models import User
+from app.services import user_cache
+from app.services.user_cache import get_session_user, invalidate_session_user
+
+
+class _CountingFactory:
+    def __init__(self, factory):
+        self.factory = factory
+        self.opened = 0
+
+    def __call__(self):
+        self.opened += 1
+        return self.factory()
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    user_cache._local_users.clear()
+    yield
+    user_cache._local_users.clear()
+
+
+async def _seed_users(db_session, count: int) -> list[int]:
+    users = [User(email=f'cache{index}@example.com', password_hash='hash') for index in range(count)]
+    db_session.add_all(users)
+    await db_session.commit()
+    return [user.id for user in users]
+
+
+@pytest.mark.asyncio
+async def test_local_tier_evicts_least_recently_used(db_session, monkeypatch):
+    monkeypatch.setattr(user_cache.settings, 'user_cache_max_entries', 2)
+    first, second, third = await _seed_users(db_session, 3)
+    factory = _CountingFactory(async_sessionmaker(db_session.bind, expire_on_commit=False))
+
+    await get_session_user(factory, first)
+    await get_session_user(factory, second)
+    await get_session_user(factory, first)
+    await get_session_user(factory, third)
+
+    assert list(user_cache._local_users) == [first, third]
+    assert factory.opened == 3
+
+
+@pytest.mark.asyncio
+async def test_redis_tier_and_invalidation(db_session, redis):
+    (user_id,) = await _seed_users(db_session, 1)
+    factory = _CountingFactory(async_sessionmaker(db_session.bind, expire_on_commit=False))
+
+    user = await get_session_user(factory, user_id, redis)
+    assert json.loads(await redis.get(f'user:{user_id}:session'))['email'] == user.email
+
+    # Another process: its local tier is empty but Redis answers.
+    user_cache._local_users.clear()
+    assert await get_session_user(factory, user_id, redis) == user
+    assert factory.opened == 1
+
+    await invalidate_session_user(user_id, redis)
+    assert await redis.keys() == []
+    assert user_id not in user_cache._local_users
+    assert await get_session_user(factory, user_id + 99, redis) is None
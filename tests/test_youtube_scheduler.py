@@ -0,0 +1,63 @@
+import pytest
+
+from app.core.config import get_settings
+from app.workers.youtube_scheduler import POLL_COST_UNITS, YouTubePollScheduler
+
+
+class _Clock:
+    def __init__(self):
+        # 08:00 Pacific, so sixteen hours remain before the quota resets.
+        self.now = 1_760_000_000.0 - (1_760_000_000 % 86400) + 15 * 3600
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_quiet_chats_poll_less_often_and_quota_is_counted():
+    clock = _Clock()
+    scheduler = YouTubePollScheduler(None, clock=clock)
+    scheduler.register(1)
+
+    await scheduler.charge(account_id=9)
+    scheduler.record_poll(1, interval_ms=3000, items=4, entries=1)
+    assert scheduler.slots[1].interval == 3.0
+
+    for _ in range(10):
+        scheduler.record_poll(1, interval_ms=3000, items=0, entries=0)
+    assert scheduler.slots[1].interval == get_settings().youtube_idle_poll_cap_seconds
+    assert scheduler.snapshot()['tokens'] == {9: POLL_COST_UNITS}
+
+
+def test_turns_are_spread_apart():
+    clock = _Clock()
+    scheduler = YouTubePollScheduler(None, clock=clock)
+
+    turns = [scheduler.next_turn(giveaway_id) for giveaway_id in (1, 2, 3)]
+
+    spacing = get_settings().youtube_poll_spacing_seconds
+    assert turns == [clock.now, clock.now + spacing, clock.now + 2 * spacing]
+
+
+def test_low_quota_favours_giveaways_with_recent_entries(monkeypatch):
+    clock = _Clock()
+    scheduler = YouTubePollScheduler(None, clock=clock)
+    for giveaway_id in (1, 2):
+        scheduler.register(giveaway_id)
+        scheduler.record_poll(giveaway_id, interval_ms=5000, items=3, entries=int(giveaway_id == 1))
+    # Only enough quota left for roughly one poll every 4 seconds.
+    seconds_left = scheduler._seconds_until_reset()
+    settings = get_settings()
+    scheduler.spent_project = (
+        settings.youtube_daily_quota_units - settings.youtube_quota_reserve_units - int(seconds_left / 4 * POLL_COST_UNITS)
+    )
+
+    scheduler._plan(clock.now)
+
+    active, idle = scheduler.slots[1], scheduler.slots[2]
+    assert active.effective_interval == pytest.approx(5.0)
+    assert idle.effective_interval > active.effective_interval * 1.5
+
+    scheduler.mark_exhausted()
+    scheduler._plan(clock.now)
+    assert active.effective_interval == settings.youtube_quota_starved_seconds
@@ -0,0 +1,103 @@
+import json
+
+import httpx
+import pytest
+
+from app.models import Platform
+from app.workers import chat_worker
+from app.workers.chat_worker import GiveawayRunner, YouTubeStreamUnavailable
+
+
+def _message(channel_id: str, name: str, text: str) -> dict:
+    return {
+        'id': f'msg-{channel_id}',
+        'snippet': {'displayMessage': text},
+        'authorDetails': {'channelId': channel_id, 'displayName': name},
+    }
+
+
+def _runner(monkeypatch, redis) -> tuple[GiveawayRunner, list]:
+    monkeypatch.setattr(chat_worker, 'redis_client', redis)
+    monkeypatch.setattr(chat_worker.settings, 'youtube_stream_url', 'https://gateway.example/stream')
+    runner = GiveawayRunner(1)
+    registered = []
+
+    async def fake_register(platform, platform_user_id, display_name, weight=1):
+        registered.append((platform, platform_user_id, display_name))
+        return True
+
+    monkeypatch.setattr(runner, '_register_participant', fake_register)
+    return runner, registered
+
+
+@pytest.mark.asyncio
+async def test_stream_consumes_pages_and_keeps_resume_token(monkeypatch, redis):
+    runner, registered = _runner(monkeypatch, redis)
+    runner.youtube_page_token = 'resume-here'
+    seen_tokens = []
+    pages = [
+        {'items': [_message('UC1', 'Ana', '!participar'), _message('UC2', 'Bia', 'oi')], 'nextPageToken': 'p2'},
+        {'items': [_message('UC3', 'Caio', '!PARTICIPAR ')], 'nextPageToken': 'p3'},
+    ]
+
+    def stand_in(request: httpx.Request) -> httpx.Response:
+        seen_tokens.append(request.url.params.get('pageToken'))
+        body = ''.join(json.dumps(page) + '\n' for page in pages)
+        return httpx.Response(200, content=body.encode('utf-8'))
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(stand_in)) as client:
+        count = await runner._stream_youtube(client, 'token', 'chat1', '!participar')
+
+    assert count == 2
+    assert seen_tokens == ['resume-here']
+    assert registered == [(Platform.YOUTUBE, 'UC1', 'Ana'), (Platform.YOUTUBE, 'UC3', 'Caio')]
+    assert runner.youtube_page_token == 'p3'
+
+    # A restarted runner resumes from the checkpoint and skips replayed ids.
+    restarted = GiveawayRunner(1)
+    assert await restarted._load_youtube_checkpoint('chat1') == 'p3'
+    assert await restarted._load_youtube_checkpoint('other-chat') is None
+    assert await runner._handle_youtube_items([_message('UC1', 'Ana', '!participar')], '!participar') == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_reports_unavailable_for_fallback(monkeypatch, redis):
+    runner, _ = _runner(monkeypatch, redis)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(404))) as client:
+        with pytest.raises(YouTubeStreamUnavailable) as exc:
+            await runner._stream_youtube(client, 'token', 'chat1', '!participar')
+
+    assert exc.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_failed_registration_leaves_message_unseen(monkeypatch, redis):
+    runner, _ = _runner(monkeypatch, redis)
+    attempts = []
+
+    async def flaky_register(platform, platform_user_id, display_name, weight=1):
+        attempts.append(platform_user_id)
+        if len(attempts) == 1:
+            raise OSError('redis down')
+        return len(attempts) == 2
+
+    monkeypatch.setattr(runner, '_register_participant', flaky_register)
+    item = _message('UC1', 'Ana', '!participar')
+
+    with pytest.raises(OSError):
+        await runner._handle_youtube_items([item], '!participar')
+    assert await runner._handle_youtube_items([item], '!participar') == 1
+    # Accepted once: the replayed message is now skipped before registering.
+    assert await runner._handle_youtube_items([item], '!participar') == 0
+    assert attempts == ['UC1', 'UC1']
+
+
+def test_stream_mode_needs_a_configured_gateway(monkeypatch):
+    settings = chat_worker.settings
+    monkeypatch.setattr(settings, 'youtube_ingest_mode', 'stream')
+    monkeypatch.setattr(settings, 'youtube_stream_url', '')
+    assert chat_worker.youtube_streaming_enabled() is False
+
+    monkeypatch.setattr(settings, 'youtube_stream_url', 'https://gateway.example/stream')
+    assert chat_worker.youtube_streaming_enabled() is True